@@ -0,0 +1,48 @@
+"""Compare the vectorized DT_DATE conversion with the former per value conversion.
+
+Usage: python -m benchmarks.bench_date_conversion [number_of_rows]
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import time
+
+import numpy as np
+import pyarrow as pa
+
+from external_data_file import to_asam_ods_time
+
+TICKS_PER_SECOND = {"ms": 10**3, "us": 10**6, "ns": 10**9}
+
+
+def per_value_conversion(values: pa.ChunkedArray) -> list[str]:
+    return [re.sub("[^0-9]", "", str(value)) for value in values]
+
+
+def main(number_of_rows: int) -> None:
+    rng = np.random.default_rng(42)
+    print(f"{'unit':>4} {'rows':>10} {'per value [s]':>14} {'vectorized [s]':>15} {'speedup':>8}")
+    for unit, ticks_per_second in TICKS_PER_SECOND.items():
+        ticks = rng.integers(1_500_000_000 * ticks_per_second, 1_600_000_000 * ticks_per_second, number_of_rows)
+        values = pa.chunked_array([pa.array(ticks, pa.timestamp(unit))])
+
+        start = time.perf_counter()
+        expected = per_value_conversion(values)
+        per_value_duration = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = to_asam_ods_time(values).to_pylist()
+        vectorized_duration = time.perf_counter() - start
+
+        if expected != actual:
+            raise AssertionError(f"Vectorized conversion differs for unit {unit}!")
+        print(
+            f"{unit:>4} {number_of_rows:>10} {per_value_duration:>14.3f} {vectorized_duration:>15.3f} "
+            f"{per_value_duration / vectorized_duration:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
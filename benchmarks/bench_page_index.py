@@ -0,0 +1,59 @@
+"""Measure random small window reads inside large row groups with and without the page index.
+
+Usage: python -m benchmarks.bench_page_index [number_of_rows] [window_size] [number_of_windows]
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import exd_api
+
+from external_data_file import ExternalDataFile
+
+
+def main(number_of_rows: int, window_size: int, number_of_windows: int) -> None:
+    rng = np.random.default_rng(42)
+    columns = {
+        "time": pa.array(np.arange(number_of_rows, dtype=np.int64)),
+        "signal": pa.array(rng.normal(size=number_of_rows)),
+        "counter": pa.array(rng.integers(0, 1000, number_of_rows).astype(np.int32)),
+    }
+    starts = rng.integers(0, number_of_rows - window_size, number_of_windows)
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "large_row_groups.parquet")
+        pq.write_table(pa.table(columns), file_path, row_group_size=number_of_rows, write_page_index=True)
+
+        print(f"{'page_index':>10} {'rows':>10} {'window':>8} {'mean [ms]':>10} {'p95 [ms]':>10}")
+        for page_index in (False, True):
+            durations = []
+            for start in starts:
+                # a new handle per window, so that no cached column chunk is reused
+                file = ExternalDataFile(file_path, f"page_index={str(page_index).lower()}")
+                try:
+                    request = exd_api.ValuesRequest(
+                        group_id=0, channel_ids=[0, 1, 2], start=int(start), limit=window_size
+                    )
+                    begin = time.perf_counter()
+                    file.get_values(request)
+                    durations.append(time.perf_counter() - begin)
+                finally:
+                    file.close()
+            print(
+                f"{str(page_index):>10} {number_of_rows:>10} {window_size:>8} {np.mean(durations) * 1000:>10.2f} "
+                f"{np.percentile(durations, 95) * 1000:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 4_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1000,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 50,
+    )
@@ -0,0 +1,57 @@
+"""Measure get_values on a wide file for different worker pool sizes.
+
+Usage: python -m benchmarks.bench_parallel_channels [number_of_rows] [number_of_channels]
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import exd_api
+
+from external_data_file import ExternalDataFile, worker_pool
+
+DTYPES = [np.int32, np.float32, np.uint32, np.int16]
+
+
+def main(number_of_rows: int, number_of_channels: int) -> None:
+    rng = np.random.default_rng(42)
+    columns = {
+        f"c{i}": pa.array(rng.integers(0, 1000, number_of_rows).astype(DTYPES[i % len(DTYPES)]))
+        for i in range(number_of_channels)
+    }
+    request = exd_api.ValuesRequest(group_id=0, channel_ids=range(number_of_channels), start=0, limit=number_of_rows)
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "wide.parquet")
+        pq.write_table(pa.table(columns), file_path)
+
+        print(f"{'workers':>7} {'rows':>10} {'channels':>8} {'get_values [s]':>15} {'speedup':>8}")
+        baseline = None
+        for max_workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+            worker_pool.resize(max_workers)
+            file = ExternalDataFile(file_path)
+            try:
+                file.get_values(request)  # fill the column cache, only the conversion is measured
+                start = time.perf_counter()
+                file.get_values(request)
+                duration = time.perf_counter() - start
+            finally:
+                file.close()
+            baseline = baseline or duration
+            print(
+                f"{max_workers:>7} {number_of_rows:>10} {number_of_channels:>8} {duration:>15.3f} "
+                f"{baseline / duration:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 64,
+    )
@@ -0,0 +1,54 @@
+"""Compare filling packed protobuf arrays by extend with encoding them from the numpy buffers.
+
+Usage: python -m benchmarks.bench_protobuf_encoding [number_of_rows]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+
+import numpy as np
+from ods_exd_api_box import ods
+
+from external_data_file import extend_packed
+
+
+def generate_values(number_of_rows: int) -> dict[str, tuple[str, np.ndarray]]:
+    rng = np.random.default_rng(42)
+    return {
+        "int32 counter": ("long_array", np.arange(number_of_rows, dtype=np.int32)),
+        "int32 random": ("long_array", rng.integers(-(2**31), 2**31, number_of_rows).astype(np.int32)),
+        "int64 random": ("longlong_array", rng.integers(-(2**62), 2**62, number_of_rows)),
+        "float32": ("float_array", rng.normal(size=number_of_rows).astype(np.float32)),
+        "float64": ("double_array", rng.normal(size=number_of_rows)),
+        "bool": ("boolean_array", rng.integers(0, 2, number_of_rows).astype(bool)),
+    }
+
+
+def main(number_of_rows: int) -> None:
+    print(f"{'type':>14} {'rows':>10} {'extend [s]':>11} {'packed [s]':>11} {'speedup':>8}")
+    for name, (field_name, values) in generate_values(number_of_rows).items():
+        # both include serializing the message as done when the response is sent
+        start = time.perf_counter()
+        expected = ods.DataMatrix.Column.UnknownArray()
+        getattr(expected, field_name).values.extend(values)
+        expected_bytes = expected.SerializeToString()
+        extend_duration = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = ods.DataMatrix.Column.UnknownArray()
+        extend_packed(getattr(actual, field_name), values.view(np.uint8) if values.dtype == bool else values)
+        actual_bytes = actual.SerializeToString()
+        packed_duration = time.perf_counter() - start
+
+        if expected_bytes != actual_bytes:
+            raise AssertionError(f"Packed encoding differs for {name}!")
+        print(
+            f"{name:>14} {number_of_rows:>10} {extend_duration:>11.3f} {packed_duration:>11.3f} "
+            f"{extend_duration / packed_duration:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
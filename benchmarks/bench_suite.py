@@ -0,0 +1,195 @@
+"""Measure Open, GetStructure and GetValues of the plugin on a synthetic file and compare against a baseline.
+
+Usage: python -m benchmarks.bench_suite [--output results.json] [--baseline benchmarks/baseline.json] [--threshold 0.2]
+       [--rows N] [--columns N] [--types float64:4,string:1] [--row-group-size N] [--compression snappy]
+       [--null-ratio 0.0] [--parameters "key=value;..."] [--repeat 5]
+
+The process exits with 1 if a metric is worse than the baseline by more than the threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pathlib
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+
+import numpy as np
+import pyarrow as pa
+from ods_exd_api_box import ExternalDataReader, FileHandlerRegistry, exd_api
+
+from benchmarks.synthetic import SyntheticSpec, add_arguments, spec_from_arguments
+from external_data_file import ExternalDataFile
+from tests.mock_servicer_context import MockServicerContext
+
+# pylint: disable=no-member
+
+SMALL_WINDOW = 1000
+LARGE_WINDOW = 1_000_000
+
+# metrics where a higher value is better, all others are latencies
+THROUGHPUT_METRICS = {
+    "get_values_small_rows_per_s",
+    "get_values_small_mb_per_s",
+    "get_values_large_rows_per_s",
+    "get_values_large_mb_per_s",
+}
+
+
+def median_duration(function: Callable[[], object], repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def run(file_path: str, parameters: str, repeat: int) -> dict[str, float]:
+    """Drive the plugin through ExternalDataReader and collect the metrics."""
+    FileHandlerRegistry.register(file_type_name="PARQUET", factory=ExternalDataFile)
+    context = MockServicerContext()
+    service = ExternalDataReader()
+    identifier = exd_api.Identifier(url=pathlib.Path(file_path).resolve().as_uri(), parameters=parameters)
+
+    def open_close() -> None:
+        service.Close(service.Open(identifier, context), context)
+
+    metrics: dict[str, float] = {"open_s": median_duration(open_close, repeat)}
+
+    handle = service.Open(identifier, context)
+    try:
+        metrics["get_structure_s"] = median_duration(
+            lambda: service.GetStructure(exd_api.StructureRequest(handle=handle), context), repeat
+        )
+        structure = service.GetStructure(exd_api.StructureRequest(handle=handle), context)
+        number_of_rows = structure.groups[0].number_of_rows
+        channel_ids = [channel.id for channel in structure.groups[0].channels]
+
+        # small windows at random positions, cold and warm cache mixed as an importer browsing the file would
+        starts = np.random.default_rng(42).integers(0, max(number_of_rows - SMALL_WINDOW, 1), 10 * repeat)
+        response_bytes = 0
+        start_time = time.perf_counter()
+        for start in starts:
+            values = service.GetValues(
+                exd_api.ValuesRequest(
+                    handle=handle, group_id=0, channel_ids=channel_ids, start=int(start), limit=SMALL_WINDOW
+                ),
+                context,
+            )
+            response_bytes += values.ByteSize()
+        duration = time.perf_counter() - start_time
+        metrics["get_values_small_rows_per_s"] = len(starts) * min(SMALL_WINDOW, number_of_rows) / duration
+        metrics["get_values_small_mb_per_s"] = response_bytes / duration / 1e6
+
+        # large windows paging through the whole file as an export would
+        response_bytes = 0
+        start_time = time.perf_counter()
+        for start in range(0, number_of_rows, LARGE_WINDOW):
+            values = service.GetValues(
+                exd_api.ValuesRequest(
+                    handle=handle, group_id=0, channel_ids=channel_ids, start=start, limit=LARGE_WINDOW
+                ),
+                context,
+            )
+            response_bytes += values.ByteSize()
+            del values
+        duration = time.perf_counter() - start_time
+        metrics["get_values_large_rows_per_s"] = number_of_rows / duration
+        metrics["get_values_large_mb_per_s"] = response_bytes / duration / 1e6
+    finally:
+        service.Close(handle, context)
+
+    # ru_maxrss is given in KiB on linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    metrics["peak_rss_mb"] = max_rss / (1e6 if "darwin" == sys.platform else 1e3)
+    return metrics
+
+
+def synthetic_arguments(spec: SyntheticSpec) -> list[str]:
+    return [
+        f"--rows={spec.rows}",
+        f"--columns={spec.columns}",
+        f"--types={spec.type_mix}",
+        f"--row-group-size={spec.row_group_size}",
+        f"--compression={spec.compression}",
+        f"--null-ratio={spec.null_ratio}",
+        f"--seed={spec.seed}",
+    ]
+
+
+def compare(metrics: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    """Print the metrics next to the baseline and return the names of the regressed ones."""
+    regressions = []
+    print(f"{'metric':<30} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, value in metrics.items():
+        reference = baseline.get(name)
+        if not reference:
+            print(f"{name:<30} {'':>12} {value:>12.4g}")
+            continue
+        change = value / reference - 1
+        worse = -change if name in THROUGHPUT_METRICS else change
+        flag = " REGRESSION" if worse > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<30} {reference:>12.4g} {value:>12.4g} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main() -> int:
+    argument_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(argument_parser)
+    argument_parser.add_argument("--parameters", default="", help="parameters passed to Open")
+    argument_parser.add_argument("--repeat", type=int, default=5)
+    argument_parser.add_argument("--output", help="write the results as JSON to this file")
+    argument_parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    argument_parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression")
+    arguments = argument_parser.parse_args()
+    spec: SyntheticSpec = spec_from_arguments(arguments)
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "synthetic.parquet")
+        # generated in a child process to keep the table out of the measured peak RSS
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.synthetic", file_path] + synthetic_arguments(spec),
+            check=True,
+            cwd=pathlib.Path(__file__).resolve().parent.parent,
+        )
+        metrics = run(file_path, arguments.parameters, arguments.repeat)
+
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "pyarrow": pa.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "spec": vars(spec),
+        "parameters": arguments.parameters,
+        "metrics": metrics,
+    }
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    baseline: dict[str, float] = {}
+    if arguments.baseline:
+        with open(arguments.baseline, encoding="utf-8") as file:
+            baseline_results = json.load(file)
+        if baseline_results.get("spec") != results["spec"]:
+            print("Warning: the baseline was measured on a different file spec!")
+        baseline = baseline_results["metrics"]
+    return 1 if compare(metrics, baseline, arguments.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Measure Open and GetStructure of a wide file with and without a warm footer index directory.
+
+Usage: python -m benchmarks.bench_wide_reopen [number_of_columns] [number_of_row_groups]
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import exd_api
+
+from external_data_file import ExternalDataFile, shared_file_cache
+
+
+def open_and_structure(file_path: str) -> tuple[float, float]:
+    start = time.perf_counter()
+    file = ExternalDataFile(file_path)
+    try:
+        opened = time.perf_counter()
+        file.fill_structure(exd_api.StructureResult())
+        return opened - start, time.perf_counter() - opened
+    finally:
+        file.close()
+
+
+def main(number_of_columns: int, number_of_row_groups: int) -> None:
+    rng = np.random.default_rng(42)
+    row_group_size = 500
+    columns = {
+        f"c{i}": pa.array(rng.normal(size=row_group_size * number_of_row_groups)) for i in range(number_of_columns)
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "wide.parquet")
+        pq.write_table(pa.table(columns), file_path, row_group_size=row_group_size)
+        del columns
+
+        print(f"{'index':>6} {'columns':>8} {'row groups':>10} {'open [s]':>9} {'structure [s]':>14}")
+        for name, index_directory in [
+            ("none", None),
+            ("cold", os.path.join(directory, "index")),
+            ("warm", os.path.join(directory, "index")),
+        ]:
+            with mock.patch.object(shared_file_cache, "index_directory", index_directory):
+                open_duration, structure_duration = open_and_structure(file_path)
+            print(
+                f"{name:>6} {number_of_columns:>8} {number_of_row_groups:>10} {open_duration:>9.3f} "
+                f"{structure_duration:>14.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    )
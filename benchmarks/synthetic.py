@@ -0,0 +1,107 @@
+"""Generate synthetic parquet files for benchmarking.
+
+Usage: python -m benchmarks.synthetic file_path [--rows N] [--columns N] [--types int64:1,float64:2,...]
+       [--row-group-size N] [--compression snappy] [--null-ratio 0.0]
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_TYPE_MIX = "float64:4,float32:2,int64:1,int32:1,timestamp:1,string:1"
+
+
+@dataclass(frozen=True)
+class SyntheticSpec:
+    """Shape and content of a generated parquet file."""
+
+    rows: int = 1_000_000
+    columns: int = 20
+    # comma separated type:weight list, the columns are assigned round robin by weight
+    type_mix: str = DEFAULT_TYPE_MIX
+    row_group_size: int = 128 * 1024
+    compression: str = "snappy"
+    null_ratio: float = 0.0
+    seed: int = 42
+
+
+def column_types(spec: SyntheticSpec) -> list[str]:
+    """Get the type names of the columns distributed by the weights of the type mix."""
+    weighted: list[str] = []
+    for item in spec.type_mix.split(","):
+        name, _, weight = item.partition(":")
+        weighted.extend([name.strip()] * int(weight or 1))
+    if not weighted:
+        raise ValueError(f"Empty type mix '{spec.type_mix}'!")
+    return [weighted[i % len(weighted)] for i in range(spec.columns)]
+
+
+def _values(type_name: str, rows: int, rng: np.random.Generator) -> tuple[np.ndarray, pa.DataType | None]:
+    match type_name:
+        case "float64":
+            return np.cumsum(rng.standard_normal(rows)), None
+        case "float32":
+            return rng.standard_normal(rows).astype(np.float32), None
+        case "int64" | "int32" | "int16" | "int8" | "uint8" | "uint16" | "uint32" | "uint64":
+            info = np.iinfo(type_name)
+            return rng.integers(max(info.min, -1000), min(info.max, 1000), rows).astype(type_name), None
+        case "timestamp":
+            return 1_600_000_000_000_000 + np.arange(rows, dtype=np.int64) * 1000, pa.timestamp("us")
+        case "string":
+            return np.char.add("value_", rng.integers(0, 1000, rows).astype(str)).astype(object), pa.string()
+    raise ValueError(f"Unsupported type '{type_name}'!")
+
+
+def generate_table(spec: SyntheticSpec) -> pa.Table:
+    rng = np.random.default_rng(spec.seed)
+    columns = {}
+    for index, type_name in enumerate(column_types(spec)):
+        values, data_type = _values(type_name, spec.rows, rng)
+        mask = rng.random(spec.rows) < spec.null_ratio if spec.null_ratio > 0 else None
+        columns[f"{type_name}_{index}"] = pa.array(values, data_type, mask=mask)
+    return pa.table(columns)
+
+
+def generate_file(file_path: str, spec: SyntheticSpec) -> None:
+    pq.write_table(
+        generate_table(spec),
+        file_path,
+        row_group_size=spec.row_group_size,
+        compression=None if "none" == spec.compression else spec.compression,
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = SyntheticSpec()
+    parser.add_argument("--rows", type=int, default=defaults.rows)
+    parser.add_argument("--columns", type=int, default=defaults.columns)
+    parser.add_argument("--types", dest="type_mix", default=defaults.type_mix, help="e.g. float64:4,string:1")
+    parser.add_argument("--row-group-size", type=int, default=defaults.row_group_size)
+    parser.add_argument("--compression", default=defaults.compression, help="snappy, zstd, gzip, lz4 or none")
+    parser.add_argument("--null-ratio", type=float, default=defaults.null_ratio)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def spec_from_arguments(arguments: argparse.Namespace) -> SyntheticSpec:
+    return SyntheticSpec(
+        rows=arguments.rows,
+        columns=arguments.columns,
+        type_mix=arguments.type_mix,
+        row_group_size=arguments.row_group_size,
+        compression=arguments.compression,
+        null_ratio=arguments.null_ratio,
+        seed=arguments.seed,
+    )
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    argument_parser.add_argument("file_path")
+    add_arguments(argument_parser)
+    parsed = argument_parser.parse_args()
+    generate_file(parsed.file_path, spec_from_arguments(parsed))
@@ -2,16 +2,2048 @@
 
 from __future__ import annotations
 
-import re
-from typing import override
+import base64
+import bisect
+import functools
+import hashlib
+import itertools
+import json
+import logging
+import os
+import posixpath
+import struct
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass, field, fields, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, TypeVar, override
 
 import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
 import pyarrow.parquet as pq
+from google.protobuf.message import Message
 from ods_exd_api_box import ExdFileInterface, exd_api, ods, serve_plugin
+from ods_exd_api_box.utils import ParamParser
 
 # pylint: disable=no-member
 
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_COLUMN_CACHE_SIZE = 256 * 1024 * 1024
+DEFAULT_SHARED_CACHE_SIZE = 1024 * 1024 * 1024
+MANIFEST_SUFFIX = ".parquet.json"
+STREAM_BATCH_SIZE = 64 * 1024
+# ODS flags AO_VF_VALID | AO_VF_VISIBLE | AO_VF_UNMODIFIED | AO_VF_DEFINED of non null values, nulls are flagged 0
+FLAG_VALID = 15
+# rows per bucket of the finest decimation pyramid level and factor between the bucket sizes of the levels
+PYRAMID_BASE = 256
+PYRAMID_FACTOR = 8
+# column chunks smaller than this are read as a whole, cheaper than reading the offset index and single pages
+PAGE_INDEX_MIN_CHUNK_SIZE = 1024 * 1024
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in {"1", "true", "yes", "on"}:
+        return True
+    if text in {"0", "false", "no", "off"}:
+        return False
+    raise ValueError(f"'{value}' is not a boolean value")
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, bool):
+        raise ValueError(f"'{value}' is not an integer value")
+    return int(value)
+
+
+@dataclass(frozen=True)
+class FileOptions:
+    """I/O options of a file handle parsed from the parameters passed to Open.
+
+    Parameters are given as "key=value;key=value", JSON or base64 encoded string, e.g.
+    "memory_map=true;pre_buffer=false;column_cache_size=67108864".
+    """
+
+    # map the file into memory instead of reading it with file I/O
+    memory_map: bool = False
+    # coalesce and read the byte ranges of all column chunks of a row group concurrently
+    pre_buffer: bool = False
+    # read column chunks through a buffered stream of this size, 0 reads each chunk at once
+    buffer_size: int = 0
+    # decode using the arrow thread pool, false decodes on the requesting thread
+    use_threads: bool = True
+    # byte budget of the decoded column chunks kept per handle
+    column_cache_size: int = DEFAULT_COLUMN_CACHE_SIZE
+    # "" exposes the file as a single group, "row_group" each row group and "metadata" the segments
+    # listed in the file key value metadata entry group_metadata_key as their own group
+    group_by: str = ""
+    # file metadata key holding a JSON list of {"name": ..., "num_rows": ...} segments for group_by=metadata
+    group_metadata_key: str = "groups"
+    # estimated byte limit of the values returned by a single request, 0 is unlimited
+    max_response_size: int = 0
+    # "clamp" shortens a window exceeding max_response_size, "fail" rejects the request
+    response_size_policy: str = "clamp"
+    # row groups read ahead in the background when windows are requested one after the other, 0 disables
+    prefetch_depth: int = 0
+    # channel attributes minimum, maximum and null_count in GetStructure: "none" omits them, "footer" only takes
+    # them from the row group statistics in the footer and "scan" reads the column if the statistics are missing
+    channel_statistics: str = "footer"
+    # byte ranges of the column chunks read from remote filesystems, which are always pre buffered, are merged if
+    # the gap between them is at most hole_size_limit and the merged range stays below range_size_limit
+    hole_size_limit: int = 8 * 1024
+    range_size_limit: int = 32 * 1024 * 1024
+    # read small windows inside large row groups page by page using the page index of the file if present
+    page_index: bool = True
+    # "" returns all values, "stride", "mean" or "minmax" return a decimated view of windows larger than
+    # decimation_points: the first value, the mean or the minimum and maximum of each bucket of rows
+    decimation: str = ""
+    decimation_points: int = 2000
+    # byte budget of the decimation pyramids kept per handle, the least recently used channels are dropped first
+    pyramid_cache_size: int = 64 * 1024 * 1024
+
+    @classmethod
+    def parse(cls, parameters: str) -> FileOptions:
+        values = ParamParser.parse_params(parameters)
+        converters = {"bool": _to_bool, "int": _to_int, "str": str}
+        kwargs: dict[str, Any] = {}
+        for option in fields(cls):
+            if option.name in values:
+                try:
+                    kwargs[option.name] = converters[str(option.type)](values.pop(option.name))
+                except ValueError as e:
+                    raise ValueError(f"Invalid value for parameter '{option.name}': {e}") from e
+        if values:
+            log.warning("Ignoring unknown parameters %s", sorted(values))
+
+        rv = cls(**kwargs)
+        if (
+            rv.buffer_size < 0
+            or rv.column_cache_size < 0
+            or rv.max_response_size < 0
+            or rv.hole_size_limit < 0
+            or rv.range_size_limit < 0
+            or rv.pyramid_cache_size < 0
+        ):
+            raise ValueError("Sizes must not be negative!")
+        if rv.prefetch_depth < 0:
+            raise ValueError("Parameter 'prefetch_depth' must not be negative!")
+        if rv.channel_statistics not in ("none", "footer", "scan"):
+            raise ValueError(f"Invalid value for parameter 'channel_statistics': '{rv.channel_statistics}'")
+        if rv.response_size_policy not in ("clamp", "fail"):
+            raise ValueError(f"Invalid value for parameter 'response_size_policy': '{rv.response_size_policy}'")
+        if rv.decimation not in ("", "stride", "mean", "minmax"):
+            raise ValueError(f"Invalid value for parameter 'decimation': '{rv.decimation}'")
+        if rv.decimation_points < 2:
+            raise ValueError("Parameter 'decimation_points' must be at least 2!")
+        if rv.group_by not in ("", "row_group", "metadata"):
+            raise ValueError(f"Invalid value for parameter 'group_by': '{rv.group_by}'")
+        return rv
+
+
+@dataclass(frozen=True)
+class GroupInfo:
+    """Contiguous row range of the file exposed as EXD group."""
+
+    name: str
+    start: int
+    num_rows: int
+
+
+@dataclass(frozen=True)
+class ChannelInfo:
+    """EXD channel of a column or of a component of a fixed size list column."""
+
+    name: str
+    # index of the column in the schema
+    column: int
+    # type of the channel values, the value type for components
+    data_type: pa.DataType
+    component: int | None = None
+
+
+class ColumnCache:
+    """LRU cache of decoded arrow column chunks bounded by a byte budget."""
+
+    def __init__(self, max_bytes: int = DEFAULT_COLUMN_CACHE_SIZE):
+        self.max_bytes: int = max_bytes
+        self.size: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: OrderedDict[Hashable, pa.ChunkedArray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: Hashable) -> pa.ChunkedArray | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable) -> pa.ChunkedArray | None:
+        """Get an entry like get without counting the lookup as hit or miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: pa.ChunkedArray) -> None:
+        nbytes = value.nbytes
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.nbytes
+            self._entries[key] = value
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.nbytes
+                self.evictions += 1
+
+    def discard(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop the entries of which the key matches the predicate. Returns the number of released bytes."""
+        released = 0
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                released += self._entries.pop(key).nbytes
+            self.size -= released
+        return released
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class ColumnCacheView:
+    """LRU of the column chunks used by a handle bounded by a byte budget, holding only keys into a shared cache.
+
+    The shared cache owns the decoded chunks, so a chunk used by several handles is held once and the budget of
+    the shared cache bounds the column data of all handles together. Chunks evicted from the shared cache are
+    misses and read again.
+    """
+
+    def __init__(self, shared: ColumnCache, max_bytes: int = DEFAULT_COLUMN_CACHE_SIZE):
+        self.shared: ColumnCache = shared
+        self.max_bytes: int = max_bytes
+        self.size: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        # key of the handle to key into the shared cache and size of the chunk
+        self._entries: OrderedDict[Hashable, tuple[Hashable, int]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] in self.shared
+
+    def get(self, key: Hashable) -> pa.ChunkedArray | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            value = None if entry is None else self.shared.peek(entry[0])
+            if value is None:
+                if entry is not None:
+                    del self._entries[key]
+                    self.size -= entry[1]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, shared_key: Hashable, value: pa.ChunkedArray) -> None:
+        nbytes = value.nbytes
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            self.shared.put(shared_key, value)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (shared_key, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+FileKey = tuple[str, int, int]
+
+
+def statistics_type(data_type: pa.DataType) -> pa.DataType:
+    """Get the type minimum and maximum of a column are computed in, pyarrow has no kernels for views."""
+    if pa.types.is_dictionary(data_type):
+        data_type = data_type.value_type
+    if pa.types.is_string_view(data_type):
+        return pa.large_string()
+    if pa.types.is_binary_view(data_type):
+        return pa.large_binary()
+    return data_type
+
+
+@dataclass
+class FooterStatistics:
+    """Minimum, maximum and null count of the column chunks of the flat columns taken from a parquet footer.
+
+    Each statistic of a column is one array over the row groups, so that it is aggregated over row groups by a
+    single compute call.
+    """
+
+    # per file column one value per row group, None for nested columns and statistics not representable in the
+    # column type
+    minima: list[pa.Array | None]
+    maxima: list[pa.Array | None]
+    # shape (row groups, file columns), -1 marks missing statistics
+    null_counts: np.ndarray
+
+    @classmethod
+    def from_metadata(cls, metadata: pq.FileMetaData, schema: pa.Schema) -> FooterStatistics:
+        # schema.types builds a new list on each access
+        types = schema.types
+        num_leaves = [num_leaf_columns(data_type) for data_type in types]
+        leaf_offsets = np.cumsum([0] + num_leaves)
+        flat_columns = [
+            index
+            for index, data_type in enumerate(types)
+            if 1 == num_leaves[index] and not pa.types.is_nested(data_type)
+        ]
+        null_counts = np.full((metadata.num_row_groups, len(schema)), -1, np.int64)
+        extrema: list[tuple[list[Any], list[Any]]] = [([], []) for _ in flat_columns]
+        for row_group_index in range(metadata.num_row_groups):
+            row_group = metadata.row_group(row_group_index)
+            for index, (minima, maxima) in zip(flat_columns, extrema):
+                column_chunk = row_group.column(int(leaf_offsets[index]))
+                statistics = column_chunk.statistics
+                complete = (
+                    statistics is not None
+                    and statistics.has_null_count
+                    and (statistics.has_min_max or statistics.null_count == column_chunk.num_values)
+                )
+                has_min_max = complete and statistics.has_min_max
+                minima.append(statistics.min if has_min_max else None)
+                maxima.append(statistics.max if has_min_max else None)
+                if complete:
+                    null_counts[row_group_index, index] = statistics.null_count
+
+        rv = cls([None] * len(schema), [None] * len(schema), null_counts)
+        for index, (minima, maxima) in zip(flat_columns, extrema):
+            data_type = statistics_type(types[index])
+            try:
+                rv.minima[index], rv.maxima[index] = pa.array(minima, data_type), pa.array(maxima, data_type)
+            except (pa.ArrowException, TypeError, ValueError):
+                log.debug("Statistics of column %s can not be stored as %s", schema.field(index).name, data_type)
+                null_counts[:, index] = -1
+        return rv
+
+    @classmethod
+    def from_table(cls, table: pa.Table, num_columns: int) -> FooterStatistics:
+        """Get the statistics from the columns min.<i>, max.<i> and null_counts of a persisted footer index."""
+        rv = cls([None] * num_columns, [None] * num_columns, np.zeros((len(table), num_columns), np.int64))
+        if len(table):
+            rv.null_counts = table.column("null_counts").combine_chunks().flatten().to_numpy().reshape(len(table), -1)
+        for name, column in zip(table.column_names, table.columns):
+            statistic, _, index = name.partition(".")
+            if "min" == statistic:
+                rv.minima[int(index)] = column.combine_chunks()
+            elif "max" == statistic:
+                rv.maxima[int(index)] = column.combine_chunks()
+        return rv
+
+    def to_table(self) -> pa.Table:
+        """Get the statistics as table with one row per row group."""
+        num_row_groups, num_columns = self.null_counts.shape
+        columns: dict[str, pa.Array] = {
+            "null_counts": pa.LargeListArray.from_arrays(
+                pa.array(np.arange(num_row_groups + 1, dtype=np.int64) * num_columns),
+                pa.array(self.null_counts.ravel()),
+            )
+        }
+        for index, (minimum, maximum) in enumerate(zip(self.minima, self.maxima)):
+            if minimum is not None and maximum is not None:
+                columns[f"min.{index}"] = minimum
+                columns[f"max.{index}"] = maximum
+        return pa.table(columns)
+
+    def aggregate(self, index: int, row_groups: slice) -> tuple[pa.Array, pa.Array, int] | None:
+        """Get the minima and maxima of a column in the row groups and their total null count.
+
+        None if the statistics of a row group are missing.
+        """
+        minima, maxima = self.minima[index], self.maxima[index]
+        null_counts = self.null_counts[row_groups, index]
+        if minima is None or maxima is None or (null_counts < 0).any():
+            return None
+        return minima[row_groups], maxima[row_groups], int(null_counts.sum())
+
+
+@dataclass
+class FooterIndex:
+    """Schema, row group sizes and column chunk statistics extracted from a parquet footer.
+
+    This is everything needed to open a file and fill its structure. It can be persisted as a small arrow IPC file
+    so that reopening a wide file after a restart does not parse its footer until column data is read. The
+    statistics are only extracted from the footer when a structure is requested, an index is persisted when the
+    footer is parsed and again once it contains them.
+    """
+
+    schema: pa.Schema
+    row_group_num_rows: np.ndarray
+    dictionary_columns: list[str]
+    # uncompressed size of each leaf column chunk with shape (row groups, leaf columns)
+    column_chunk_sizes: np.ndarray
+    statistics: FooterStatistics | None = None
+
+    VERSION = 2
+    METADATA_KEY = b"exd_parquet_index"
+
+    @classmethod
+    def from_metadata(cls, metadata: pq.FileMetaData) -> FooterIndex:
+        schema = metadata.schema.to_arrow_schema()
+        row_group_num_rows = np.zeros(metadata.num_row_groups, np.int64)
+        column_chunk_sizes = np.zeros((metadata.num_row_groups, metadata.num_columns), np.int64)
+        for row_group_index in range(metadata.num_row_groups):
+            row_group = metadata.row_group(row_group_index)
+            row_group_num_rows[row_group_index] = row_group.num_rows
+            column_chunk_sizes[row_group_index] = [
+                row_group.column(leaf).total_uncompressed_size for leaf in range(metadata.num_columns)
+            ]
+        return cls(schema, row_group_num_rows, cls.__dictionary_columns(metadata, schema), column_chunk_sizes)
+
+    @staticmethod
+    def __dictionary_columns(metadata: pq.FileMetaData, schema: pa.Schema) -> list[str]:
+        """Get the string and binary columns read as dictionary arrays.
+
+        These are the columns whose dictionary page is small compared to their first column chunk, as for status
+        or label channels with few distinct values. High cardinality columns falling back to plain pages would
+        have to be hashed into a dictionary and are read as plain arrays.
+        """
+        if 0 == metadata.num_row_groups:
+            return []
+        row_group = metadata.row_group(0)
+        types = dict(zip(schema.names, schema.types))
+        rv = []
+        for column_index in range(row_group.num_columns):
+            column_chunk = row_group.column(column_index)
+            name = column_chunk.path_in_schema
+            if types.get(name) not in DICTIONARY_VALUE_TYPES:
+                continue
+            if (
+                column_chunk.has_dictionary_page
+                and 2 * (column_chunk.data_page_offset - column_chunk.dictionary_page_offset)
+                <= column_chunk.total_compressed_size
+            ):
+                rv.append(name)
+        return rv
+
+    def save(self, index_path: str, key: FileKey) -> None:
+        """Write the index and its statistics if extracted atomically, readers never see a partially written file."""
+        num_leaves = self.column_chunk_sizes.shape[1]
+        offsets = np.arange(len(self.row_group_num_rows) + 1, dtype=np.int64) * num_leaves
+        table = pa.table(
+            {
+                "num_rows": pa.array(self.row_group_num_rows),
+                "column_chunk_sizes": pa.LargeListArray.from_arrays(
+                    pa.array(offsets), pa.array(self.column_chunk_sizes.ravel())
+                ),
+            }
+        )
+        if self.statistics is not None:
+            statistics = self.statistics.to_table()
+            for name, column in zip(statistics.column_names, statistics.columns):
+                table = table.append_column(name, column)
+        header = {
+            "version": self.VERSION,
+            "path": key[0],
+            "mtime_ns": key[1],
+            "size": key[2],
+            "dictionary_columns": self.dictionary_columns,
+        }
+        table = table.replace_schema_metadata(
+            {self.METADATA_KEY: json.dumps(header), b"schema": self.schema.serialize().to_pybytes()}
+        )
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        temporary_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with pa.OSFile(temporary_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(temporary_path, index_path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+    @classmethod
+    def load(cls, index_path: str, key: FileKey) -> FooterIndex | None:
+        """Read a persisted index, returning None if it is missing, corrupt or was written for another file state."""
+        try:
+            with pa.OSFile(index_path, "rb") as source:
+                table = pa.ipc.open_file(source).read_all()
+            header = json.loads(table.schema.metadata[cls.METADATA_KEY])
+            if (header["version"], header["path"], header["mtime_ns"], header["size"]) != (cls.VERSION, *key):
+                return None
+            schema = pa.ipc.read_schema(pa.py_buffer(table.schema.metadata[b"schema"]))
+            row_group_num_rows = table.column("num_rows").to_numpy()
+            sizes = table.column("column_chunk_sizes").combine_chunks()
+            statistics = None
+            if "null_counts" in table.column_names:
+                statistics = FooterStatistics.from_table(
+                    table.drop_columns(["num_rows", "column_chunk_sizes"]), len(schema)
+                )
+        except FileNotFoundError:
+            return None
+        except (pa.ArrowException, OSError, KeyError, TypeError, ValueError) as e:
+            log.warning("Ignoring unreadable footer index '%s': %s", index_path, e)
+            return None
+        return cls(
+            schema,
+            row_group_num_rows,
+            header["dictionary_columns"],
+            sizes.flatten().to_numpy().reshape(len(table), -1) if len(table) else np.zeros((0, 0), np.int64),
+            statistics,
+        )
+
+
+@dataclass
+class SharedFileEntry:
+    """Footer index of a file shared by all handles opened on it.
+
+    The parsed footer is only available if the index was built from it, otherwise the parquet file parses it when
+    column data is read.
+    """
+
+    metadata: pq.FileMetaData | None
+    index: FooterIndex
+    ref_count: int = 0
+    page_index: PageIndexFooter | None = None
+    # dataset fragment of a remote file holding its parsed footer, shared so that the footer is read once
+    scan_fragment: ds.ParquetFileFragment | None = None
+
+
+class SharedFileCache:
+    """Process wide cache of parquet footers and decoded column chunks.
+
+    Files are keyed by (path, mtime, size) so a modified file never hits stale entries. The footer and the
+    column chunks of a file are dropped when the last handle on it is closed. If an index directory is given,
+    footer indexes are persisted there and reused by later processes.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_SHARED_CACHE_SIZE, index_directory: str | None = None):
+        self.columns: ColumnCache = ColumnCache(max_bytes)
+        self.index_directory: str | None = index_directory
+        self._files: dict[FileKey, SharedFileEntry] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    @staticmethod
+    def file_key(file_path: str, filesystem: pafs.FileSystem | None = None) -> FileKey:
+        if filesystem is None:
+            stat = os.stat(file_path)
+            return (os.path.realpath(file_path), stat.st_mtime_ns, stat.st_size)
+        info = filesystem.get_file_info(file_path)
+        if pafs.FileType.NotFound == info.type:
+            raise FileNotFoundError(f"File '{file_path}' not found on {filesystem.type_name} filesystem!")
+        return (f"{filesystem.type_name}://{info.path}", info.mtime_ns or 0, info.size or 0)
+
+    def index_path(self, key: FileKey) -> str | None:
+        if not self.index_directory:
+            return None
+        return os.path.join(self.index_directory, hashlib.sha1(key[0].encode()).hexdigest() + ".arrow")
+
+    def acquire(
+        self, file_path: str, filesystem: pafs.FileSystem | None = None
+    ) -> tuple[FileKey, pq.FileMetaData | None, FooterIndex]:
+        """Reference the footer of a file, loading its persisted index or parsing it if no other handle holds it.
+
+        Parsing the footer of a remote file costs a single read of its tail in most cases.
+        """
+        key = self.file_key(file_path, filesystem)
+        with self._lock:
+            entry = self._files.get(key)
+            if entry is not None:
+                entry.ref_count += 1
+                return key, entry.metadata, entry.index
+
+        metadata = None
+        scan_fragment = None
+        index_path = self.index_path(key)
+        index = FooterIndex.load(index_path, key) if index_path else None
+        if index is None:
+            if filesystem is None:
+                metadata = pq.read_metadata(file_path)
+            else:
+                scan_fragment = self.__parse_scan_fragment(key, file_path, filesystem)
+                metadata = scan_fragment.metadata
+            index = FooterIndex.from_metadata(metadata)
+            if index_path:
+                self.__save(index, index_path, key)
+        with self._lock:
+            entry = self._files.setdefault(key, SharedFileEntry(metadata, index, scan_fragment=scan_fragment))
+            entry.ref_count += 1
+            return key, entry.metadata, entry.index
+
+    def scan_fragment(self, key: FileKey, file_path: str, filesystem: pafs.FileSystem) -> ds.ParquetFileFragment:
+        """Get the dataset fragment of an acquired remote file, parsing its footer if the index was loaded."""
+        with self._lock:
+            scan_fragment = self._files[key].scan_fragment
+        if scan_fragment is None:
+            scan_fragment = self.__parse_scan_fragment(key, file_path, filesystem)
+            with self._lock:
+                entry = self._files[key]
+                if entry.scan_fragment is None:
+                    entry.scan_fragment = scan_fragment
+                scan_fragment = entry.scan_fragment
+        return scan_fragment
+
+    @staticmethod
+    def __parse_scan_fragment(key: FileKey, file_path: str, filesystem: pafs.FileSystem) -> ds.ParquetFileFragment:
+        scan_fragment = ds.ParquetFileFormat().make_fragment(file_path, filesystem=filesystem, file_size=key[2])
+        scan_fragment.ensure_complete_metadata()
+        return scan_fragment
+
+    def statistics(self, key: FileKey, file_path: str, filesystem: pafs.FileSystem | None) -> FooterStatistics:
+        """Get the footer statistics of an acquired file, extracting them and persisting its index on first use.
+
+        The footer is parsed again if the index was loaded without statistics.
+        """
+        with self._lock:
+            entry = self._files[key]
+        index = entry.index
+        if index.statistics is None:
+            metadata = entry.metadata
+            if metadata is None:
+                if filesystem is None:
+                    metadata = pq.read_metadata(file_path)
+                else:
+                    metadata = self.scan_fragment(key, file_path, filesystem).metadata
+            index.statistics = FooterStatistics.from_metadata(metadata, index.schema)
+            index_path = self.index_path(key)
+            if index_path:
+                self.__save(index, index_path, key)
+        return index.statistics
+
+    @staticmethod
+    def __save(index: FooterIndex, index_path: str, key: FileKey) -> None:
+        try:
+            index.save(index_path, key)
+        except OSError as e:
+            log.warning("Could not write footer index '%s': %s", index_path, e)
+
+    def page_index(self, key: FileKey) -> PageIndexFooter:
+        """Get the column chunks with offset index of an acquired file decoded so far."""
+        with self._lock:
+            entry = self._files[key]
+            if entry.page_index is None:
+                entry.page_index = PageIndexFooter()
+            return entry.page_index
+
+    def release(self, key: FileKey) -> None:
+        with self._lock:
+            entry = self._files.get(key)
+            if entry is None:
+                return
+            entry.ref_count -= 1
+            if entry.ref_count > 0:
+                return
+            del self._files[key]
+        self.columns.discard(lambda column_key: isinstance(column_key, tuple) and column_key[0] == key)
+
+
+shared_file_cache = SharedFileCache(
+    int(os.environ.get("ODS_EXD_API_PARQUET_SHARED_CACHE_SIZE", DEFAULT_SHARED_CACHE_SIZE)),
+    os.environ.get("ODS_EXD_API_PARQUET_INDEX_CACHE_DIR"),
+)
+
+
+class WorkerPool:
+    """Bounded thread pool shared by all handles for footer reads and channel conversions."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers: int = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def resize(self, max_workers: int) -> None:
+        with self._lock:
+            executor = self._executor
+            self.max_workers = max_workers
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def submit(self, fn: Callable[..., R], *args: Any) -> Future[R]:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="exd_parquet")
+            return self._executor.submit(fn, *args)
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> list[R]:
+        """Apply fn to all items and return the results in order, running inline if it is not worth a thread."""
+        items = list(items)
+        if len(items) < 2 or self.max_workers < 2:
+            return [fn(item) for item in items]
+        return [future.result() for future in [self.submit(fn, item) for item in items]]
+
+
+worker_pool = WorkerPool(int(os.environ.get("ODS_EXD_API_PARQUET_WORKER_THREADS", os.cpu_count() or 1)))
+
+DURATION_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+SIZE_BUCKETS = (10.0, 100.0, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9)
+
+
+class Histogram:
+    """Prometheus histogram with fixed upper bounds."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.sum: float = 0.0
+        self.count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str = "") -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f'{name}_bucket{{{labels}{"," if labels else ""}le="{le}"}} {cumulative}')
+        label_set = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{label_set} {self.sum:.9g}")
+        lines.append(f"{name}_count{label_set} {self.count}")
+        return lines
+
+
+class Metrics:
+    """Process wide durations of the phases of the EXD calls and counts of rows, bytes, row groups and cache hits.
+
+    Phases are open (footer reads), structure, get_values (whole call), read (I/O and decompression of column
+    chunks) and convert (type conversion into the protobuf arrays).
+    """
+
+    def __init__(self):
+        self.durations: dict[str, Histogram] = {}
+        self.response_rows = Histogram(SIZE_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+        self.counters: dict[tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_duration(phase, time.perf_counter() - start)
+
+    def observe_duration(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.durations.get(phase)
+            if histogram is None:
+                histogram = self.durations[phase] = Histogram(DURATION_BUCKETS)
+            histogram.observe(seconds)
+
+    def observe_response(self, rows: int, size: int) -> None:
+        with self._lock:
+            self.response_rows.observe(rows)
+            self.response_bytes.observe(size)
+            self.counters[("exd_parquet_rows_returned_total", "")] = (
+                self.counters.get(("exd_parquet_rows_returned_total", ""), 0) + rows
+            )
+            self.counters[("exd_parquet_bytes_returned_total", "")] = (
+                self.counters.get(("exd_parquet_bytes_returned_total", ""), 0) + size
+            )
+
+    def add(self, name: str, value: float = 1, labels: str = "") -> None:
+        with self._lock:
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0) + value
+
+    def render(self) -> str:
+        """Get the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            lines = ["# TYPE exd_parquet_phase_seconds histogram"]
+            for phase, histogram in sorted(self.durations.items()):
+                lines.extend(histogram.render("exd_parquet_phase_seconds", f'phase="{phase}"'))
+            lines.append("# TYPE exd_parquet_response_rows histogram")
+            lines.extend(self.response_rows.render("exd_parquet_response_rows"))
+            lines.append("# TYPE exd_parquet_response_bytes histogram")
+            lines.extend(self.response_bytes.render("exd_parquet_response_bytes"))
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                lines.append(f"# TYPE {name} counter")
+                for (counter_name, labels), value in sorted(self.counters.items()):
+                    if counter_name == name:
+                        lines.append(f"{name}{{{labels}}} {value:g}" if labels else f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+# instrumentation is only recorded if it is exported by serving it via HTTP or dumping it to the log
+metrics: Metrics | None = (
+    Metrics()
+    if os.environ.get("ODS_EXD_API_PARQUET_METRICS_PORT") or os.environ.get("ODS_EXD_API_PARQUET_METRICS_LOG_INTERVAL")
+    else None
+)
+
+
+def timed(phase: str) -> AbstractContextManager[None]:
+    return nullcontext() if metrics is None else metrics.timer(phase)
+
+
+def instrumented(method: str) -> Callable[[Callable[..., R]], Callable[..., R]]:
+    """Count the calls and errors of a method and record its duration as phase."""
+
+    def decorator(function: Callable[..., R]) -> Callable[..., R]:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> R:
+            if metrics is None:
+                return function(*args, **kwargs)
+            metrics.add("exd_parquet_calls_total", labels=f'method="{method}"')
+            try:
+                with metrics.timer(method):
+                    return function(*args, **kwargs)
+            except Exception:
+                metrics.add("exd_parquet_errors_total", labels=f'method="{method}"')
+                raise
+
+        return wrapper
+
+    return decorator
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serve the metrics on /metrics."""
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        if metrics is None or self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+        log.debug(format, *args)
+
+
+def start_metrics_export(port: int | None = None, log_interval: float | None = None) -> ThreadingHTTPServer | None:
+    """Serve the metrics on a local HTTP port and/or dump them periodically to the log in background threads."""
+    server = None
+    if port is not None:
+        server = ThreadingHTTPServer(("", port), MetricsRequestHandler)
+        threading.Thread(target=server.serve_forever, name="exd_parquet_metrics", daemon=True).start()
+        log.info("Serving metrics on port %s", server.server_address[1])
+    if log_interval:
+
+        def dump() -> None:
+            while True:
+                time.sleep(log_interval)
+                if metrics is not None:
+                    log.info("Metrics\n%s", metrics.render())
+
+        threading.Thread(target=dump, name="exd_parquet_metrics_log", daemon=True).start()
+    return server
+
+
+class MemoryGovernor:
+    """Process wide bound of the decoded column data in the shared cache and the decimation pyramids of the handles.
+
+    Handles are ordered by their last use. When both together exceed the watermark, the column chunks, pyramids
+    and readers of the files of the least recently used handles not serving a request are dropped, keeping their
+    footers. Dropped data is read again on the next request. A watermark of 0 disables eviction.
+    """
+
+    def __init__(self, watermark: int = 0):
+        self.watermark: int = watermark
+        self.evictions: int = 0
+        self._handles: OrderedDict[int, ExternalDataFile] = OrderedDict()
+        self._active: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    @property
+    def size(self) -> int:
+        return shared_file_cache.columns.size + sum(handle.pyramid_size for handle in list(self._handles.values()))
+
+    @contextmanager
+    def use(self, handle: ExternalDataFile) -> Iterator[None]:
+        """Mark a handle as used for the duration of a request and enforce the watermark afterwards."""
+        key = id(handle)
+        with self._lock:
+            self._handles[key] = handle
+            self._handles.move_to_end(key)
+            self._active[key] = self._active.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active[key] -= 1
+                if 0 == self._active[key]:
+                    del self._active[key]
+            self.enforce()
+
+    def discard(self, handle: ExternalDataFile) -> None:
+        with self._lock:
+            self._handles.pop(id(handle), None)
+
+    def enforce(self) -> None:
+        if 0 == self.watermark:
+            return
+        # handles are released while holding the lock, so that none starts serving a request meanwhile
+        with self._lock:
+            for key, handle in list(self._handles.items()):
+                if self.size <= self.watermark:
+                    return
+                if key in self._active:
+                    continue
+                released = handle.release_memory()
+                if released > 0:
+                    self.evictions += 1
+                    log.info("Released %s bytes of idle handle on '%s'", released, handle.file_path)
+                    if metrics is not None:
+                        metrics.add("exd_parquet_handle_evictions_total")
+
+
+memory_governor = MemoryGovernor(int(os.environ.get("ODS_EXD_API_PARQUET_MEMORY_WATERMARK", 0)))
+
+
+def governed(function: Callable[..., R]) -> Callable[..., R]:
+    """Account a handle method as use of the handle in the memory governor."""
+
+    @functools.wraps(function)
+    def wrapper(self: ExternalDataFile, *args: Any, **kwargs: Any) -> R:
+        with memory_governor.use(self):
+            return function(self, *args, **kwargs)
+
+    return wrapper
+
+
+# thrift compact protocol types used by the parquet footer and page index
+THRIFT_TRUE, THRIFT_FALSE, THRIFT_BYTE, THRIFT_I16, THRIFT_I32, THRIFT_I64 = 1, 2, 3, 4, 5, 6
+THRIFT_DOUBLE, THRIFT_BINARY, THRIFT_LIST, THRIFT_SET, THRIFT_MAP, THRIFT_STRUCT = 7, 8, 9, 10, 11, 12
+
+# thrift structs are dicts of field id to (type, value), lists are (element type, values)
+ThriftStruct = dict[int, tuple[int, Any]]
+
+
+class ThriftCompactReader:
+    """Minimal generic reader of the thrift compact protocol, pyarrow does not expose the page index."""
+
+    def __init__(self, data: bytes):
+        self.data: bytes = data
+        self.position: int = 0
+
+    def byte(self) -> int:
+        self.position += 1
+        return self.data[self.position - 1]
+
+    def varint(self) -> int:
+        rv = 0
+        shift = 0
+        while True:
+            byte = self.byte()
+            rv |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return rv
+            shift += 7
+
+    def zigzag(self) -> int:
+        value = self.varint()
+        return (value >> 1) ^ -(value & 1)
+
+    def value(self, thrift_type: int) -> Any:
+        if thrift_type in (THRIFT_TRUE, THRIFT_FALSE):
+            return THRIFT_TRUE == thrift_type
+        if THRIFT_BYTE == thrift_type:
+            byte = self.byte()
+            return byte - 256 if byte > 127 else byte
+        if thrift_type in (THRIFT_I16, THRIFT_I32, THRIFT_I64):
+            return self.zigzag()
+        if THRIFT_DOUBLE == thrift_type:
+            self.position += 8
+            return struct.unpack_from("<d", self.data, self.position - 8)[0]
+        if THRIFT_BINARY == thrift_type:
+            size = self.varint()
+            self.position += size
+            return bytes(self.data[self.position - size : self.position])
+        if thrift_type in (THRIFT_LIST, THRIFT_SET):
+            element_type, size = self.list_header()
+            if element_type in (THRIFT_TRUE, THRIFT_FALSE):
+                return element_type, [THRIFT_TRUE == self.byte() for _ in range(size)]
+            return element_type, [self.value(element_type) for _ in range(size)]
+        if THRIFT_MAP == thrift_type:
+            size = self.varint()
+            types = self.byte() if size else 0
+            return types, [(self.value(types >> 4), self.value(types & 0x0F)) for _ in range(size)]
+        if THRIFT_STRUCT == thrift_type:
+            return self.struct()
+        raise ValueError(f"Invalid thrift type {thrift_type}!")
+
+    def skip(self, thrift_type: int) -> None:
+        """Skip a value without decoding it, much faster than value() for large structures."""
+        if thrift_type in (THRIFT_I16, THRIFT_I32, THRIFT_I64):
+            while self.data[self.position] & 0x80:
+                self.position += 1
+            self.position += 1
+        elif THRIFT_BINARY == thrift_type:
+            size = self.varint()
+            self.position += size
+        elif thrift_type in (THRIFT_BYTE, THRIFT_DOUBLE):
+            self.position += 1 if THRIFT_BYTE == thrift_type else 8
+        elif thrift_type in (THRIFT_LIST, THRIFT_SET):
+            element_type, size = self.list_header()
+            if element_type in (THRIFT_TRUE, THRIFT_FALSE, THRIFT_BYTE):
+                self.position += size
+            else:
+                for _ in range(size):
+                    self.skip(element_type)
+        elif THRIFT_MAP == thrift_type:
+            size = self.varint()
+            types = self.byte() if size else 0
+            for _ in range(size):
+                self.skip(types >> 4)
+                self.skip(types & 0x0F)
+        elif THRIFT_STRUCT == thrift_type:
+            field_id, thrift_type = self.field_header(0)
+            while field_id:
+                self.skip(thrift_type)
+                field_id, thrift_type = self.field_header(field_id)
+        elif thrift_type not in (THRIFT_TRUE, THRIFT_FALSE):
+            raise ValueError(f"Invalid thrift type {thrift_type}!")
+
+    def list_header(self) -> tuple[int, int]:
+        """Read the header of a list or set, returns (element type, size)."""
+        header = self.byte()
+        size = header >> 4
+        if 15 == size:
+            size = self.varint()
+        return header & 0x0F, size
+
+    def field_header(self, last_field_id: int) -> tuple[int, int]:
+        """Read the header of the next struct field, returns (field id, type), field id 0 at the end of the struct."""
+        header = self.byte()
+        if 0 == header:
+            return 0, 0
+        return last_field_id + (header >> 4) if header >> 4 else self.zigzag(), header & 0x0F
+
+    def struct(self) -> ThriftStruct:
+        rv: ThriftStruct = {}
+        field_id = 0
+        while True:
+            field_id, thrift_type = self.field_header(field_id)
+            if 0 == field_id:
+                return rv
+            rv[field_id] = (thrift_type, self.value(thrift_type))
+
+
+class ThriftCompactWriter:
+    """Writer of the structures read by ThriftCompactReader."""
+
+    def __init__(self) -> None:
+        self.data: bytearray = bytearray()
+
+    def varint(self, value: int) -> None:
+        while value > 0x7F:
+            self.data.append((value & 0x7F) | 0x80)
+            value >>= 7
+        self.data.append(value)
+
+    def zigzag(self, value: int) -> None:
+        self.varint((value << 1) ^ (value >> 63))
+
+    def value(self, thrift_type: int, value: Any) -> None:
+        if THRIFT_BYTE == thrift_type:
+            self.data.append(value & 0xFF)
+        elif thrift_type in (THRIFT_I16, THRIFT_I32, THRIFT_I64):
+            self.zigzag(value)
+        elif THRIFT_DOUBLE == thrift_type:
+            self.data += struct.pack("<d", value)
+        elif THRIFT_BINARY == thrift_type:
+            self.varint(len(value))
+            self.data += value
+        elif thrift_type in (THRIFT_LIST, THRIFT_SET):
+            element_type, values = value
+            if len(values) < 15:
+                self.data.append(len(values) << 4 | element_type)
+            else:
+                self.data.append(0xF0 | element_type)
+                self.varint(len(values))
+            for element in values:
+                if element_type in (THRIFT_TRUE, THRIFT_FALSE):
+                    self.data.append(THRIFT_TRUE if element else THRIFT_FALSE)
+                else:
+                    self.value(element_type, element)
+        elif THRIFT_MAP == thrift_type:
+            types, items = value
+            self.varint(len(items))
+            if items:
+                self.data.append(types)
+            for key, item in items:
+                self.value(types >> 4, key)
+                self.value(types & 0x0F, item)
+        elif THRIFT_STRUCT == thrift_type:
+            self.struct(value)
+        else:
+            raise ValueError(f"Invalid thrift type {thrift_type}!")
+
+    def struct(self, fields: ThriftStruct) -> None:
+        last_field_id = 0
+        for field_id in sorted(fields):
+            thrift_type, value = fields[field_id]
+            if thrift_type in (THRIFT_TRUE, THRIFT_FALSE):
+                thrift_type = THRIFT_TRUE if value else THRIFT_FALSE
+            if 0 < field_id - last_field_id <= 15:
+                self.data.append((field_id - last_field_id) << 4 | thrift_type)
+            else:
+                self.data.append(thrift_type)
+                self.zigzag(field_id)
+            if thrift_type not in (THRIFT_TRUE, THRIFT_FALSE):
+                self.value(thrift_type, value)
+            last_field_id = field_id
+        self.data.append(0)
+
+
+@dataclass
+class ColumnChunkPages:
+    """Parts of the footer describing a column chunk, needed to decode some of its data pages."""
+
+    version: tuple[int, Any]
+    schema_root: ThriftStruct
+    schema_element: ThriftStruct
+    # without statistics and index locations, they do not describe the selected pages
+    column_metadata: ThriftStruct
+    num_rows: int
+    # (offset, compressed size, first row) of the data pages from the offset index
+    locations: np.ndarray
+
+
+class PageIndexFooter:
+    """Column chunks of a file with offset index, decoded from its footer on demand and shared by all handles.
+
+    pyarrow does not expose the offset index and parsing the whole footer in Python takes seconds for files with
+    thousands of columns. A column chunk is found instead by the bytes of its compressed size and data page offset
+    known from the footer parsed by pyarrow, and only it is decoded. The footer bytes are not kept, just the decoded
+    column chunks and the positions of the schema elements of the fields walked to find a column.
+    """
+
+    def __init__(self) -> None:
+        self.version: tuple[int, Any] | None = None
+        self.schema_root: ThriftStruct | None = None
+        # positions of the schema elements of the top level fields and of the end of the last walked one
+        self.field_positions: list[int] = []
+        self.schema_position: int = 0
+        self.column_chunks: dict[tuple[int, int], ColumnChunkPages | None] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        read_range: Callable[[int, int], pa.Buffer],
+        metadata: pq.FileMetaData,
+        row_group_index: int,
+        columns: list[tuple[int, int]],
+    ) -> list[ColumnChunkPages | None]:
+        """Get the column chunks of (field index, leaf) of flat columns, None if they have no offset index.
+
+        The footer is read at most once for all column chunks not decoded yet.
+        """
+        with self._lock:
+            data: bytes | None = None
+            for field_index, leaf in columns:
+                key = (row_group_index, leaf)
+                if key in self.column_chunks:
+                    continue
+                if data is None:
+                    data = self.__read_footer(read_range)
+                self.column_chunks[key] = (
+                    self.__decode(read_range, data, metadata, row_group_index, field_index, leaf) if data else None
+                )
+            return [self.column_chunks[(row_group_index, leaf)] for _, leaf in columns]
+
+    @staticmethod
+    def __read_footer(read_range: Callable[[int, int], pa.Buffer]) -> bytes:
+        """Read the thrift footer, empty for encrypted files."""
+        tail = read_range(-8, 8).to_pybytes()
+        if b"PAR1" != tail[4:]:
+            return b""
+        footer_size = int.from_bytes(tail[:4], "little")
+        return read_range(-8 - footer_size, footer_size).to_pybytes()
+
+    def __decode(
+        self,
+        read_range: Callable[[int, int], pa.Buffer],
+        data: bytes,
+        metadata: pq.FileMetaData,
+        row_group_index: int,
+        field_index: int,
+        leaf: int,
+    ) -> ColumnChunkPages | None:
+        column_chunk = self.__find_column_chunk(data, metadata.row_group(row_group_index).column(leaf))
+        if column_chunk is None or 4 not in column_chunk or 5 not in column_chunk:
+            return None
+        offset_index = ThriftCompactReader(read_range(column_chunk[4][1], column_chunk[5][1]).to_pybytes()).struct()
+        locations = np.array(
+            [(location[1][1], location[2][1], location[3][1]) for location in offset_index[1][1][1]], np.int64
+        ).reshape(-1, 3)
+        column_metadata = column_chunk[3][1]
+        for field_id in (10, *range(12, 18)):
+            column_metadata.pop(field_id, None)
+        schema_element = self.__schema_element(data, field_index)
+        assert self.version is not None and self.schema_root is not None
+        return ColumnChunkPages(
+            self.version,
+            self.schema_root,
+            schema_element,
+            column_metadata,
+            metadata.row_group(row_group_index).num_rows,
+            locations,
+        )
+
+    @staticmethod
+    def __find_column_chunk(data: bytes, column: pq.ColumnChunkMetaData) -> ThriftStruct | None:
+        """Decode the column chunk whose column metadata ends the sizes with its compressed size and data page offset.
+
+        None if the column chunk is in another file or has key value metadata between both.
+        """
+        anchor = ThriftCompactWriter()
+        anchor.data += b"\x16"  # total_compressed_size (7)
+        anchor.zigzag(column.total_compressed_size)
+        anchor.data += b"\x26"  # data_page_offset (9)
+        anchor.zigzag(column.data_page_offset)
+        start = ThriftCompactWriter()
+        start.data += b"\x26"  # file_offset (2)
+        start.zigzag(column.file_offset)
+        start.data += b"\x1c\x15"  # meta_data (3) and its first field type (1)
+        path = [part.encode() for part in column.path_in_schema.split(".")]
+        end = data.find(anchor.data)
+        while end >= 0:
+            position = data.rfind(start.data, 0, end)
+            if position >= 0:
+                reader = ThriftCompactReader(data)
+                reader.position = position
+                try:
+                    column_chunk = reader.struct()
+                    column_metadata = column_chunk[3][1]
+                    if (
+                        column_metadata[7][1] == column.total_compressed_size
+                        and column_metadata[9][1] == column.data_page_offset
+                        and column_metadata[3][1][1] == path
+                    ):
+                        return column_chunk
+                except (IndexError, KeyError, TypeError, ValueError):
+                    pass
+            end = data.find(anchor.data, end + 1)
+        return None
+
+    def __schema_element(self, data: bytes, field_index: int) -> ThriftStruct:
+        """Get the schema element of a top level field, walking the schema up to it once."""
+        reader = ThriftCompactReader(data)
+        if self.schema_root is None:
+            field_id, thrift_type = reader.field_header(0)
+            if 1 != field_id:
+                raise ValueError("Footer does not start with the version!")
+            self.version = (thrift_type, reader.value(thrift_type))
+            field_id, thrift_type = reader.field_header(field_id)
+            if 2 != field_id:
+                raise ValueError("Footer does not continue with the schema!")
+            reader.list_header()
+            self.schema_root = reader.struct()
+            self.schema_position = reader.position
+        reader.position = self.schema_position
+        while len(self.field_positions) <= field_index:
+            self.field_positions.append(reader.position)
+            remaining = 1
+            while remaining:
+                remaining -= 1
+                field_id, thrift_type = reader.field_header(0)
+                while field_id:
+                    if 5 == field_id:  # num_children
+                        remaining += reader.value(thrift_type)
+                    else:
+                        reader.skip(thrift_type)
+                    field_id, thrift_type = reader.field_header(field_id)
+        self.schema_position = reader.position
+        reader.position = self.field_positions[field_index]
+        return reader.struct()
+
+
+def resolve_filesystem(
+    file_path: str, filesystem: pafs.FileSystem | None = None
+) -> tuple[pafs.FileSystem | None, str]:
+    """Get the filesystem and the path in it of a local path or URI like s3://bucket/run.parquet.
+
+    Local files are returned without filesystem, they are opened by path to allow memory mapping.
+    """
+    if filesystem is None and "://" in file_path:
+        filesystem, file_path = pafs.FileSystem.from_uri(file_path)
+    if isinstance(filesystem, pafs.LocalFileSystem):
+        return None, file_path
+    return filesystem, file_path
+
+
+@dataclass
+class Fragment:
+    """Parquet file of an opened file or dataset with its footer and hive partition values."""
+
+    path: str
+    file_key: FileKey
+    metadata: pq.FileMetaData | None
+    index: FooterIndex
+    partition_values: dict[str, Any] = field(default_factory=dict)
+    # None for local files
+    filesystem: pafs.FileSystem | None = None
+    # dictionary columns chosen for all files of the dataset, the ones of the index if None
+    read_dictionary: list[str] | None = None
+    parquet_file: pq.ParquetFile | None = None
+    # column data of remote files is read through a dataset fragment pre buffering coalesced byte ranges
+    scan_fragment: ds.ParquetFileFragment | None = None
+    scan_options: ds.ParquetFragmentScanOptions | None = None
+    scan_schema: pa.Schema | None = None
+    # raw access to footer, offset indexes and data pages for reads skipping pages
+    raw_file: pa.NativeFile | None = None
+    # serializes reads of request and prefetch threads on the parquet file
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False, compare=False)
+
+    def open(self, options: FileOptions) -> pq.ParquetFile:
+        """Open the file for reading column data, reusing the already parsed footer."""
+        with self.lock:
+            if self.parquet_file is None:
+                source: str | pa.NativeFile = self.path
+                if self.filesystem is not None:
+                    source = self.filesystem.open_input_file(self.path)
+                self.parquet_file = pq.ParquetFile(
+                    source,
+                    metadata=self.metadata,
+                    memory_map=options.memory_map,
+                    pre_buffer=options.pre_buffer,
+                    buffer_size=options.buffer_size,
+                    read_dictionary=self.dictionary_columns(),
+                )
+            return self.parquet_file
+
+    def open_scan_fragment(self, options: FileOptions) -> ds.ParquetFileFragment:
+        """Open a remote file for reading column data as dataset fragment, reusing the footer it parsed on acquire.
+
+        Object stores pay a round trip per request, so the column chunks of the row groups read are fetched in
+        few coalesced requests by the I/O threads of arrow before decoding instead of page by page.
+        """
+        with self.lock:
+            if self.scan_fragment is None:
+                self.scan_options = ds.ParquetFragmentScanOptions(
+                    pre_buffer=True,
+                    cache_options=pa.CacheOptions(
+                        hole_size_limit=options.hole_size_limit, range_size_limit=options.range_size_limit, lazy=True
+                    ),
+                )
+                if options.buffer_size > 0:
+                    self.scan_options.use_buffered_stream = True
+                    self.scan_options.buffer_size = options.buffer_size
+                # dictionary types in the read schema make the reader decode these columns as dictionary arrays
+                self.scan_schema = self.index.schema
+                for name in self.dictionary_columns():
+                    index = self.scan_schema.get_field_index(name)
+                    column_field = self.scan_schema.field(index)
+                    self.scan_schema = self.scan_schema.set(
+                        index, column_field.with_type(pa.dictionary(pa.int32(), column_field.type))
+                    )
+                self.scan_fragment = shared_file_cache.scan_fragment(self.file_key, self.path, self.filesystem)
+            return self.scan_fragment
+
+    def dictionary_columns(self) -> list[str]:
+        """Get the string and binary columns read as dictionary arrays."""
+        return self.index.dictionary_columns if self.read_dictionary is None else self.read_dictionary
+
+    def open_metadata(self) -> pq.FileMetaData:
+        with self.lock:
+            if self.metadata is None:
+                if self.parquet_file is not None:
+                    self.metadata = self.parquet_file.metadata
+                elif self.scan_fragment is not None:
+                    self.metadata = self.scan_fragment.metadata
+                else:
+                    raise RuntimeError(f"File '{self.path}' is not opened!")
+            return self.metadata
+
+    def read_row_group(self, options: FileOptions, row_group_index: int, columns: list[str]) -> pa.Table:
+        with self.lock:
+            if self.filesystem is None:
+                return self.open(options).read_row_group(
+                    row_group_index, columns=columns, use_threads=options.use_threads
+                )
+            return (
+                self.open_scan_fragment(options)
+                .subset(row_group_ids=[row_group_index])
+                .to_table(
+                    schema=self.scan_schema,
+                    columns=columns,
+                    use_threads=options.use_threads,
+                    fragment_scan_options=self.scan_options,
+                )
+            )
+
+    def read_range(self, options: FileOptions, offset: int, length: int) -> pa.Buffer:
+        """Read raw bytes of the file, e.g. parts of the footer and data pages."""
+        with self.lock:
+            if self.raw_file is None:
+                if self.filesystem is not None:
+                    self.raw_file = self.filesystem.open_input_file(self.path)
+                else:
+                    self.raw_file = pa.memory_map(self.path) if options.memory_map else pa.OSFile(self.path)
+            if offset < 0:
+                offset += self.raw_file.size()
+            self.raw_file.seek(offset)
+            return self.raw_file.read_buffer(length)
+
+    def column_chunk_pages(
+        self, options: FileOptions, row_group_index: int, columns: list[tuple[str, int]]
+    ) -> list[ColumnChunkPages | None]:
+        """Get the column chunks of (name, leaf) of flat columns in a row group, None if they have no offset index."""
+        with self.lock:
+            if self.metadata is None:
+                if self.filesystem is None:
+                    self.open(options)
+                else:
+                    self.open_scan_fragment(options)
+            metadata = self.open_metadata()
+        return shared_file_cache.page_index(self.file_key).get(
+            functools.partial(self.read_range, options),
+            metadata,
+            row_group_index,
+            [(self.index.schema.get_field_index(name), leaf) for name, leaf in columns],
+        )
+
+    def read_pages(
+        self,
+        options: FileOptions,
+        pages: ColumnChunkPages,
+        column_field: pa.Field,
+        first_row: int,
+        last_row: int,
+    ) -> pa.ChunkedArray:
+        """Read the rows [first_row, last_row) of a flat column chunk decoding only the overlapping pages.
+
+        The dictionary page and the overlapping data pages are copied into an in memory parquet file with a
+        footer describing just them, so that pyarrow decodes these pages only.
+        """
+        locations = pages.locations
+        first_page = int(np.searchsorted(locations[:, 2], first_row, side="right")) - 1
+        last_page = int(np.searchsorted(locations[:, 2], last_row, side="left"))
+        page_rows = int(locations[first_page, 2])
+        num_rows = (int(locations[last_page, 2]) if last_page < len(locations) else pages.num_rows) - page_rows
+
+        column_metadata = dict(pages.column_metadata)
+        dictionary = b""
+        # some writers set dictionary_page_offset 0 for chunks without dictionary page
+        dictionary_offset = column_metadata.get(11, (THRIFT_I64, 0))[1]
+        if dictionary_offset > 0:
+            dictionary = self.read_range(options, dictionary_offset, int(locations[0, 0]) - dictionary_offset)
+        data_offset = int(locations[first_page, 0])
+        data = self.read_range(
+            options, data_offset, int(locations[last_page - 1, 0] + locations[last_page - 1, 1]) - data_offset
+        )
+
+        size = len(dictionary) + len(data)
+        column_metadata.update(
+            {
+                5: (THRIFT_I64, num_rows),
+                6: (THRIFT_I64, size),
+                7: (THRIFT_I64, size),
+                9: (THRIFT_I64, 4 + len(dictionary)),
+            }
+        )
+        column_metadata.pop(11, None)
+        if dictionary:
+            column_metadata[11] = (THRIFT_I64, 4)
+        root = dict(pages.schema_root)
+        root[5] = (THRIFT_I32, 1)
+        file_metadata: ThriftStruct = {
+            1: pages.version,
+            2: (THRIFT_LIST, (THRIFT_STRUCT, [root, pages.schema_element])),
+            3: (THRIFT_I64, num_rows),
+            4: (
+                THRIFT_LIST,
+                (
+                    THRIFT_STRUCT,
+                    [
+                        {
+                            1: (
+                                THRIFT_LIST,
+                                (THRIFT_STRUCT, [{2: (THRIFT_I64, 4), 3: (THRIFT_STRUCT, column_metadata)}]),
+                            ),
+                            2: (THRIFT_I64, size),
+                            3: (THRIFT_I64, num_rows),
+                            6: (THRIFT_I64, size),
+                        }
+                    ],
+                ),
+            ),
+            5: (
+                THRIFT_LIST,
+                (
+                    THRIFT_STRUCT,
+                    [
+                        {
+                            1: (THRIFT_BINARY, b"ARROW:schema"),
+                            2: (THRIFT_BINARY, base64.b64encode(pa.schema([column_field]).serialize().to_pybytes())),
+                        }
+                    ],
+                ),
+            ),
+        }
+        writer = ThriftCompactWriter()
+        writer.struct(file_metadata)
+        pages_file = pa.py_buffer(
+            b"".join([b"PAR1", dictionary, data, writer.data, len(writer.data).to_bytes(4, "little"), b"PAR1"])
+        )
+        table = pq.ParquetFile(
+            pa.BufferReader(pages_file),
+            read_dictionary=[column_field.name] if column_field.name in self.dictionary_columns() else None,
+        ).read_row_group(0, use_threads=options.use_threads)
+        return table.column(0).slice(first_row - page_rows, last_row - first_row)
+
+    def iter_batches(
+        self, options: FileOptions, row_groups: list[int], columns: list[str]
+    ) -> Iterator[pa.RecordBatch]:
+        with self.lock:
+            if self.filesystem is None:
+                batches = self.open(options).iter_batches(
+                    batch_size=STREAM_BATCH_SIZE,
+                    row_groups=row_groups,
+                    columns=columns,
+                    use_threads=options.use_threads,
+                )
+            else:
+                # at most one batch is decoded ahead of the one being converted
+                batches = iter(
+                    self.open_scan_fragment(options)
+                    .subset(row_group_ids=row_groups)
+                    .to_batches(
+                        schema=self.scan_schema,
+                        columns=columns,
+                        batch_size=STREAM_BATCH_SIZE,
+                        batch_readahead=1,
+                        use_threads=options.use_threads,
+                        fragment_scan_options=self.scan_options,
+                    )
+                )
+        while True:
+            with self.lock, timed("read"):
+                batch = next(batches, None)
+            if batch is None:
+                return
+            yield batch
+
+    def close(self) -> None:
+        with self.lock:
+            if self.parquet_file is not None:
+                # keep the footer parsed by the reader so that reopening does not parse it again
+                self.open_metadata()
+                self.parquet_file.close()
+                self.parquet_file = None
+            if self.scan_fragment is not None:
+                self.open_metadata()
+                self.scan_fragment = None
+            if self.raw_file is not None:
+                self.raw_file.close()
+                self.raw_file = None
+
+
+def to_asam_ods_time(values: pa.Array | pa.ChunkedArray) -> pa.Array | pa.ChunkedArray:
+    """Convert timestamps to ASAM ODS time strings YYYYMMDDhhmmss[ffffff[fff]] using arrow compute kernels.
+
+    Sub-second parts are written with 6 digits, or with 9 digits if a nanosecond value is not a whole
+    microsecond, and are omitted for whole seconds. Null values result in empty strings.
+    """
+    unit = values.type.unit
+    number = pc.year(values).cast(pa.int64())
+    for part in (pc.month(values), pc.day(values), pc.hour(values), pc.minute(values), pc.second(values)):
+        number = pc.add(pc.multiply(number, 100), part)
+    text = pc.utf8_lpad(number.cast(pa.string()), width=14, padding="0")
+
+    if "s" != unit:
+        fraction = pc.subtract(values.cast(pa.int64()), pc.floor_temporal(values, unit="second").cast(pa.int64()))
+        if "ms" == unit:
+            fraction = pc.multiply(fraction, 1000)
+        digits = pc.utf8_lpad(fraction.cast(pa.string()), width=9 if "ns" == unit else 6, padding="0")
+        if "ns" == unit:
+            microseconds = pc.divide(fraction, 1000)
+            digits = pc.if_else(
+                pc.equal(pc.multiply(microseconds, 1000), fraction),
+                pc.utf8_lpad(microseconds.cast(pa.string()), width=6, padding="0"),
+                digits,
+            )
+        text = pc.binary_join_element_wise(text, pc.if_else(pc.equal(fraction, 0), "", digits), "")
+
+    return text.fill_null("")
+
+
+Converter = Callable[[pa.ChunkedArray, ods.DataMatrix.Column.UnknownArray], None]
+
+
+@dataclass(frozen=True, slots=True)
+class ChannelConverter:
+    """ASAM ODS data type of a column and the function writing its values to a protobuf array.
+
+    Converters writing a bytes field, which is copied as a whole on every append, take the whole window at once.
+    """
+
+    data_type: ods.DataTypeEnum
+    convert: Converter
+    whole_window: bool = False
+
+
+def to_numpy(values: pa.ChunkedArray, dtype: type[np.generic]) -> np.ndarray:
+    """Get numeric values as numpy array of dtype with at most one copy.
+
+    A single chunk without nulls is a zero copy view on the arrow buffer that is only copied if it has to be
+    cast. Multiple chunks are cast and concatenated in one pass into the result array.
+    """
+    if 1 == values.num_chunks and 0 == values.null_count:
+        return values.chunk(0).to_numpy(zero_copy_only=True).astype(dtype, copy=False)
+
+    # nulls become NaN or 0, chunks of nulls only are not converted at all
+    floating = np.issubdtype(dtype, np.floating)
+    rv = np.empty(len(values), dtype)
+    position = 0
+    for chunk in values.chunks:
+        if chunk.null_count == len(chunk):
+            rv[position : position + len(chunk)] = np.nan if floating else 0
+        elif chunk.null_count:
+            rv[position : position + len(chunk)] = (chunk if floating else chunk.fill_null(0)).to_numpy(
+                zero_copy_only=False
+            )
+        else:
+            rv[position : position + len(chunk)] = chunk.to_numpy(zero_copy_only=True)
+        position += len(chunk)
+    return rv
+
+
+def encode_varints(values: np.ndarray) -> bytes:
+    """Encode integers as protobuf varints, negative values sign extended to 64 bits like int32 and int64 fields.
+
+    The 7 bit groups of all values are written into a matrix as wide as the largest value needs, the groups
+    following the last nonzero one of each value are masked out row by row.
+    """
+    unsigned = values.astype(np.int64, copy=False).view(np.uint64)
+    if 0 == len(unsigned) or unsigned.max() < 0x80:
+        return unsigned.astype(np.uint8).tobytes()
+    width = (int(unsigned.max()).bit_length() + 6) // 7
+    groups = np.empty((len(unsigned), width), np.uint8)
+    lengths = np.ones(len(unsigned), np.int64)
+    remaining = unsigned
+    for byte in range(width):
+        group = (remaining & np.uint64(0x7F)).astype(np.uint8)
+        remaining = remaining >> np.uint64(7)
+        more = remaining != 0
+        groups[:, byte] = group | (more.view(np.uint8) << 7)
+        lengths += more
+    return groups[np.arange(width) < lengths[:, None]].tobytes()
+
+
+def extend_packed(target: Message, values: np.ndarray) -> None:
+    """Append numeric values to the packed repeated field 1 `values` of an ods array message.
+
+    Slice assignment or extend convert element by element. Instead the field is encoded from the numpy buffer,
+    fixed width types as little endian bytes and integer types as varints, and merged into the message, which
+    appends to existing values and keeps the message identical to one filled by extend.
+    """
+    with timed("encode"):
+        if 0 == len(values):
+            # like extend, an empty slice still selects the array in the oneof of the column
+            target.SetInParent()
+            return
+        if np.issubdtype(values.dtype, np.floating):
+            data = values.astype(values.dtype.newbyteorder("<"), copy=False).tobytes()
+        else:
+            data = encode_varints(values)
+        target.MergeFromString(b"\x0a" + encode_varints(np.array([len(data)])) + data)
+
+
+def extend_numeric(target: Message, values: pa.ChunkedArray, dtype: type[np.generic]) -> None:
+    """Append numeric values to an ods array message, timing their conversion and encoding as separate phases."""
+    with timed("convert"):
+        data = to_numpy(values, dtype)
+    extend_packed(target, data)
+
+
+def _to_byte_array(values: pa.ChunkedArray, target: ods.DataMatrix.Column.UnknownArray) -> None:
+    # the uint8 data buffers are joined into the bytes field without numpy in between
+    with timed("encode"):
+        target.byte_array.values = b"".join(
+            chunk.buffers()[1][chunk.offset : chunk.offset + len(chunk)] for chunk in values.chunks
+        )
+
+
+def _to_long_array(values: pa.ChunkedArray, target: ods.DataMatrix.Column.UnknownArray) -> None:
+    extend_numeric(target.long_array, values, np.int32)
+
+
+def _to_longlong_array(values: pa.ChunkedArray, target: ods.DataMatrix.Column.UnknownArray) -> None:
+    extend_numeric(target.longlong_array, values, np.int64)
+
+
+def _to_float_array(values: pa.ChunkedArray, target: ods.DataMatrix.Column.UnknownArray) -> None:
+    extend_numeric(target.float_array, values, np.float32)
+
+
+def _to_double_array(values: pa.ChunkedArray, target: ods.DataMatrix.Column.UnknownArray) -> None:
+    extend_numeric(target.double_array, values, np.float64)
+
+
+def to_python_values(chunk: pa.Array, null_value: str | bytes) -> list[Any] | np.ndarray:
+    """Get the values of a string or binary array as python objects with nulls replaced by null_value.
+
+    Dictionary arrays are decoded once per distinct value, the result references these objects by index.
+    """
+    if pa.types.is_dictionary(chunk.type):
+        dictionary = np.array(to_python_values(chunk.dictionary, null_value) + [null_value], dtype=object)
+        return dictionary[chunk.indices.fill_null(len(chunk.dictionary)).to_numpy(zero_copy_only=False)]
+    if pa.types.is_string_view(chunk.type) or pa.types.is_binary_view(chunk.type):
+        # view types have no fill_null kernel
+        chunk = chunk.cast(pa.large_string() if pa.types.is_string_view(chunk.type) else pa.large_binary())
+    return chunk.fill_null(null_value).to_pylist()
+
+
+def _to_boolean_array(values: pa.ChunkedArray, target: ods.DataMatrix.Column.UnknownArray) -> None:
+    with timed("convert"):
+        data = values.fill_null(False).to_numpy(zero_copy_only=False).view(np.uint8)
+    extend_packed(target.boolean_array, data)
+
+
+def _to_decimal_array(values: pa.ChunkedArray, target: ods.DataMatrix.Column.UnknownArray) -> None:
+    with timed("convert"):
+        values = values.cast(pa.float64())
+    _to_double_array(values, target)
+
+
+def _to_date_array(values: pa.ChunkedArray, target: ods.DataMatrix.Column.UnknownArray) -> None:
+    with timed("convert"):
+        if pa.types.is_date32(values.type):
+            values = values.cast(pa.timestamp("s"))
+        elif pa.types.is_date64(values.type):
+            values = values.cast(pa.timestamp("ms"))
+        elif values.type.tz is not None:
+            # timezone aware timestamps are written in UTC
+            values = values.cast(pa.timestamp(values.type.unit))
+        strings = to_asam_ods_time(values).to_pylist()
+    with timed("encode"):
+        target.string_array.values.extend(strings)
+
+
+def _to_string_array(values: pa.ChunkedArray, target: ods.DataMatrix.Column.UnknownArray) -> None:
+    # empty windows have no chunks
+    target.string_array.SetInParent()
+    for chunk in values.chunks:
+        with timed("convert"):
+            strings = to_python_values(chunk, "")
+        with timed("encode"):
+            target.string_array.values.extend(strings)
+
+
+def _to_bytestr_array(values: pa.ChunkedArray, target: ods.DataMatrix.Column.UnknownArray) -> None:
+    target.bytestr_array.SetInParent()
+    for chunk in values.chunks:
+        with timed("convert"):
+            byte_strings = to_python_values(chunk, b"")
+        with timed("encode"):
+            target.bytestr_array.values.extend(byte_strings)
+
+
+CHANNEL_CONVERTERS: dict[pa.DataType, ChannelConverter] = {
+    pa.int8(): ChannelConverter(ods.DataTypeEnum.DT_SHORT, _to_long_array),
+    pa.uint8(): ChannelConverter(ods.DataTypeEnum.DT_BYTE, _to_byte_array, whole_window=True),
+    pa.int16(): ChannelConverter(ods.DataTypeEnum.DT_SHORT, _to_long_array),
+    pa.uint16(): ChannelConverter(ods.DataTypeEnum.DT_LONG, _to_long_array),
+    pa.int32(): ChannelConverter(ods.DataTypeEnum.DT_LONG, _to_long_array),
+    pa.uint32(): ChannelConverter(ods.DataTypeEnum.DT_LONGLONG, _to_longlong_array),
+    pa.int64(): ChannelConverter(ods.DataTypeEnum.DT_LONGLONG, _to_longlong_array),
+    pa.uint64(): ChannelConverter(ods.DataTypeEnum.DT_DOUBLE, _to_double_array),
+    pa.bool_(): ChannelConverter(ods.DataTypeEnum.DT_BOOLEAN, _to_boolean_array),
+    pa.date32(): ChannelConverter(ods.DataTypeEnum.DT_DATE, _to_date_array),
+    pa.date64(): ChannelConverter(ods.DataTypeEnum.DT_DATE, _to_date_array),
+    pa.timestamp("s"): ChannelConverter(ods.DataTypeEnum.DT_DATE, _to_date_array),
+    pa.timestamp("ms"): ChannelConverter(ods.DataTypeEnum.DT_DATE, _to_date_array),
+    pa.timestamp("us"): ChannelConverter(ods.DataTypeEnum.DT_DATE, _to_date_array),
+    pa.timestamp("ns"): ChannelConverter(ods.DataTypeEnum.DT_DATE, _to_date_array),
+    pa.float32(): ChannelConverter(ods.DataTypeEnum.DT_FLOAT, _to_float_array),
+    pa.float64(): ChannelConverter(ods.DataTypeEnum.DT_DOUBLE, _to_double_array),
+    pa.string(): ChannelConverter(ods.DataTypeEnum.DT_STRING, _to_string_array),
+    pa.large_string(): ChannelConverter(ods.DataTypeEnum.DT_STRING, _to_string_array),
+    pa.string_view(): ChannelConverter(ods.DataTypeEnum.DT_STRING, _to_string_array),
+    pa.binary(): ChannelConverter(ods.DataTypeEnum.DT_BYTESTR, _to_bytestr_array),
+    pa.large_binary(): ChannelConverter(ods.DataTypeEnum.DT_BYTESTR, _to_bytestr_array),
+    pa.binary_view(): ChannelConverter(ods.DataTypeEnum.DT_BYTESTR, _to_bytestr_array),
+}
+
+# value types whose converters also take dictionary arrays
+DICTIONARY_VALUE_TYPES = {pa.string(), pa.large_string(), pa.binary(), pa.large_binary()}
+
+
+def _decode_dictionary(
+    values: pa.ChunkedArray, target: ods.DataMatrix.Column.UnknownArray, convert: Converter
+) -> None:
+    with timed("convert"):
+        values = values.cast(values.type.value_type)
+    convert(values, target)
+
+
+def _to_component(
+    values: pa.ChunkedArray, target: ods.DataMatrix.Column.UnknownArray, component: int, convert: Converter
+) -> None:
+    with timed("convert"):
+        values = pa.chunked_array(
+            [pc.list_element(chunk, component) for chunk in values.chunks], values.type.value_type
+        )
+    convert(values, target)
+
+
+def get_channel_converter(data_type: pa.DataType) -> ChannelConverter | None:
+    """Get the converter of a column type, None if the type is not supported."""
+    converter = CHANNEL_CONVERTERS.get(data_type)
+    if converter is not None:
+        return converter
+    if pa.types.is_timestamp(data_type):
+        return CHANNEL_CONVERTERS.get(pa.timestamp(data_type.unit))
+    if pa.types.is_decimal(data_type):
+        return ChannelConverter(ods.DataTypeEnum.DT_DOUBLE, _to_decimal_array)
+    if pa.types.is_dictionary(data_type):
+        value_converter = get_channel_converter(data_type.value_type)
+        if value_converter is None or data_type.value_type in DICTIONARY_VALUE_TYPES:
+            return value_converter
+        return replace(value_converter, convert=functools.partial(_decode_dictionary, convert=value_converter.convert))
+    return None
+
+
+def get_channel_info_converter(channel: ChannelInfo) -> ChannelConverter | None:
+    """Get the converter of a channel, components are taken from the fixed size list column."""
+    converter = get_channel_converter(channel.data_type)
+    if converter is None or channel.component is None:
+        return converter
+    return replace(
+        converter, convert=functools.partial(_to_component, component=channel.component, convert=converter.convert)
+    )
+
+
+def add_flags(channel: ChannelInfo, values: pa.ChunkedArray, flags: ods.LongArray, offset: int) -> None:
+    """Append the ODS flags of a slice of channel values starting at row offset of the response.
+
+    Flags are only written once a null is encountered, preceding rows are then marked as valid. Fully valid
+    slices before that do not touch the validity bitmap at all.
+    """
+    with timed("convert"):
+        if channel.component is not None and (
+            values.null_count or any(chunk.flatten().null_count for chunk in values.chunks)
+        ):
+            values = pa.chunked_array([pc.list_element(chunk, channel.component) for chunk in values.chunks])
+        if 0 == values.null_count:
+            valid = None
+        else:
+            valid = values.is_valid().to_numpy(zero_copy_only=False).view(np.uint8) * np.uint8(FLAG_VALID)
+    if valid is None:
+        if len(flags.values):
+            extend_packed(flags, np.full(len(values), FLAG_VALID, np.uint8))
+        return
+    if 0 == len(flags.values) and offset:
+        extend_packed(flags, np.full(offset, FLAG_VALID, np.uint8))
+    extend_packed(flags, valid)
+
+
+def num_leaf_columns(data_type: pa.DataType) -> int:
+    """Get the number of parquet leaf columns an arrow column is stored in."""
+    if isinstance(data_type, pa.ExtensionType):
+        return num_leaf_columns(data_type.storage_type)
+    if pa.types.is_struct(data_type):
+        return sum(num_leaf_columns(data_type.field(i).type) for i in range(data_type.num_fields))
+    if pa.types.is_map(data_type):
+        return num_leaf_columns(data_type.key_type) + num_leaf_columns(data_type.item_type)
+    if (
+        pa.types.is_list(data_type)
+        or pa.types.is_large_list(data_type)
+        or pa.types.is_fixed_size_list(data_type)
+        or pa.types.is_list_view(data_type)
+        or pa.types.is_large_list_view(data_type)
+    ):
+        return num_leaf_columns(data_type.value_type)
+    return 1
+
+
+def decimation_type(data_type: pa.DataType) -> pa.DataType | None:
+    """Get the type numeric values are aggregated in for decimation, None for types only sampled by stride."""
+    if pa.types.is_integer(data_type) or pa.types.is_floating(data_type):
+        return data_type
+    if pa.types.is_decimal(data_type):
+        return pa.float64()
+    return None
+
+
+@dataclass
+class BucketAggregates:
+    """First, minimum, maximum, sum and number of the valid values of consecutive row buckets."""
+
+    first: np.ndarray
+    minimum: np.ndarray
+    maximum: np.ndarray
+    total: np.ndarray
+    count: np.ndarray
+
+    @property
+    def nbytes(self) -> int:
+        return self.first.nbytes + self.minimum.nbytes + self.maximum.nbytes + self.total.nbytes + self.count.nbytes
+
+    @staticmethod
+    def bounds(dtype: np.dtype) -> tuple[Any, Any]:
+        """Get the lowest and highest value of a dtype, the initial maximum and minimum of empty buckets."""
+        if np.issubdtype(dtype, np.floating):
+            return -np.inf, np.inf
+        return np.iinfo(dtype).min, np.iinfo(dtype).max
+
+    @classmethod
+    def empty(cls, num_buckets: int, dtype: np.dtype) -> BucketAggregates:
+        low, high = cls.bounds(dtype)
+        return cls(
+            np.zeros(num_buckets, dtype),
+            np.full(num_buckets, high, dtype),
+            np.full(num_buckets, low, dtype),
+            np.zeros(num_buckets, np.float64),
+            np.zeros(num_buckets, np.int64),
+        )
+
+    @classmethod
+    def aggregate(
+        cls, batches: Iterable[pa.ChunkedArray], starts: np.ndarray, offset: int, data_type: pa.DataType
+    ) -> BucketAggregates:
+        """Aggregate the values of consecutive batches beginning at row offset into buckets beginning at starts.
+
+        Buckets may span several batches, e.g. if row groups are not multiples of the bucket size. Buckets not
+        covered by the batches are empty.
+        """
+        dtype = np.dtype(data_type.to_pandas_dtype())
+        low, high = cls.bounds(dtype)
+        rv = cls.empty(len(starts), dtype)
+        position = offset
+        for values in batches:
+            if 0 == len(values):
+                continue
+            if values.type != data_type:
+                values = values.cast(data_type)
+            valid = values.is_valid().to_numpy(zero_copy_only=False)
+            data = to_numpy(values, dtype.type)
+            first_bucket = int(np.searchsorted(starts, position, side="right")) - 1
+            last_bucket = int(np.searchsorted(starts, position + len(values), side="left"))
+            buckets = slice(first_bucket, last_bucket)
+            indices = np.maximum(starts[buckets] - position, 0)
+            count = np.add.reduceat(valid.astype(np.int64), indices)
+            first = np.minimum.reduceat(np.where(valid, np.arange(len(data)), len(data)), indices)
+            rv.first[buckets] = np.where(
+                (rv.count[buckets] == 0) & (count > 0), data[np.minimum(first, len(data) - 1)], rv.first[buckets]
+            )
+            rv.minimum[buckets] = np.fmin(rv.minimum[buckets], np.fmin.reduceat(np.where(valid, data, high), indices))
+            rv.maximum[buckets] = np.fmax(rv.maximum[buckets], np.fmax.reduceat(np.where(valid, data, low), indices))
+            rv.total[buckets] += np.add.reduceat(np.where(valid, data, 0), indices, dtype=np.float64)
+            rv.count[buckets] += count
+            position += len(values)
+        return rv
+
+    def merge(self, start: int, stop: int, indices: np.ndarray) -> BucketAggregates:
+        """Merge the buckets [start, stop) into buckets beginning at the given non decreasing indices relative to
+        start. Buckets beginning where the next one begins or at stop are empty.
+        """
+        count = self.count[start:stop]
+        rv = BucketAggregates.empty(len(indices), self.first.dtype)
+        # reduceat takes the element at the index for empty ranges, so only the non empty ones are reduced
+        merged = np.append(indices[1:], len(count)) > indices
+        at = indices[merged]
+        if 0 == len(at):
+            return rv
+        first = np.minimum.reduceat(np.where(count > 0, np.arange(len(count)), len(count)), at)
+        rv.first[merged] = self.first[start:stop][np.minimum(first, len(count) - 1)]
+        rv.minimum[merged] = np.fmin.reduceat(self.minimum[start:stop], at)
+        rv.maximum[merged] = np.fmax.reduceat(self.maximum[start:stop], at)
+        rv.total[merged] = np.add.reduceat(self.total[start:stop], at)
+        rv.count[merged] = np.add.reduceat(count, at)
+        return rv
+
+    def combine(self, following: BucketAggregates) -> BucketAggregates:
+        """Combine with the aggregates of the same buckets over rows following the rows aggregated here."""
+        return BucketAggregates(
+            np.where(self.count > 0, self.first, following.first),
+            np.fmin(self.minimum, following.minimum),
+            np.fmax(self.maximum, following.maximum),
+            self.total + following.total,
+            self.count + following.count,
+        )
+
+    def values(self, mode: str, data_type: pa.DataType) -> pa.ChunkedArray:
+        """Get the first value, the mean or minimum and maximum of each bucket, null for buckets without values."""
+        valid = self.count > 0
+        if "stride" == mode:
+            values = self.first
+        elif "mean" == mode:
+            values = self.total / np.maximum(self.count, 1)
+            if not np.issubdtype(self.first.dtype, np.floating):
+                values = np.round(values).astype(self.first.dtype)
+        else:
+            values = np.column_stack([self.minimum, self.maximum]).ravel()
+            valid = np.repeat(valid, 2)
+        return pa.chunked_array([pa.array(values, data_type, mask=~valid)])
+
+
+# bytes per value of the protobuf arrays, DT_DATE is a string of up to 23 digits
+VALUE_SIZES: dict[ods.DataTypeEnum, int] = {
+    ods.DataTypeEnum.DT_BOOLEAN: 1,
+    ods.DataTypeEnum.DT_BYTE: 1,
+    ods.DataTypeEnum.DT_SHORT: 4,
+    ods.DataTypeEnum.DT_LONG: 4,
+    ods.DataTypeEnum.DT_LONGLONG: 8,
+    ods.DataTypeEnum.DT_FLOAT: 4,
+    ods.DataTypeEnum.DT_DOUBLE: 8,
+    ods.DataTypeEnum.DT_DATE: 24,
+}
+
 
 class ExternalDataFile(ExdFileInterface):
     """Class for handling for NI tdms files."""
@@ -23,53 +2055,168 @@ class ExternalDataFile(ExdFileInterface):
         return cls(file_path, parameters)
 
     @override
-    def __init__(self, file_path: str, parameters: str = ""):
+    @instrumented("open")
+    def __init__(self, file_path: str, parameters: str = "", filesystem: pafs.FileSystem | None = None):
 
         self.file_path: str = file_path
         self.parameters: str = parameters
-        self.table: pa.Table | None = pq.read_table(file_path)
+        self.options: FileOptions = FileOptions.parse(parameters)
+        # column chunks used by the handle keyed by (column index, row group index), held by the shared cache
+        self.column_cache: ColumnCacheView = ColumnCacheView(shared_file_cache.columns, self.options.column_cache_size)
+        # requested columns and end of the last window to detect sequential access
+        self.__last_window: tuple[tuple[int, ...], int] | None = None
+        self.__prefetches: dict[int, Future[None]] = {}
+        self.__prefetch_lock = threading.Lock()
+        self.__closed = threading.Event()
+        self.__statistics: dict[tuple[int, int], tuple[pa.Scalar, pa.Scalar, int] | None] = {}
+        # decimation pyramid levels of the channels by last use, bounded by pyramid_cache_size
+        self.__pyramids: OrderedDict[int, list[BucketAggregates]] = OrderedDict()
+        self.pyramid_size: int = 0
+        self.__pyramid_lock = threading.Lock()
+        # only the footers are parsed here, column data is read on demand in get_values
+        self.fragments: list[Fragment]
+        # local paths are opened directly, URIs and paths on a given filesystem through pyarrow.fs
+        self.filesystem: pafs.FileSystem | None
+        self.filesystem, path = resolve_filesystem(file_path, filesystem)
+        self.fragments, partition_schema = self.__open_fragments(path)
+        try:
+            self.file_schema: pa.Schema = self.fragments[0].index.schema
+            for fragment in self.fragments[1:]:
+                if not fragment.index.schema.equals(self.file_schema):
+                    raise ValueError(f"Schema of '{fragment.path}' differs from '{self.fragments[0].path}'!")
+            # columns are read as dictionary only if all files suggest it, so that the chunks of all files share a type
+            dictionary_columns = set.intersection(
+                *[set(fragment.index.dictionary_columns) for fragment in self.fragments]
+            )
+            for fragment in self.fragments:
+                fragment.read_dictionary = [
+                    name for name in fragment.index.dictionary_columns if name in dictionary_columns
+                ]
+            # types the file columns are read as, cached chunks read by handles on other datasets are cast to them
+            self.read_types: list[pa.DataType] = [
+                (
+                    pa.dictionary(pa.int32(), column_field.type)
+                    if column_field.name in dictionary_columns
+                    else column_field.type
+                )
+                for column_field in self.file_schema
+            ]
+            # hive partition keys are appended as channels after the file columns
+            self.schema: pa.Schema = pa.schema(list(self.file_schema) + list(partition_schema))
+            # parquet leaf columns of each file column, nested columns are stored in several
+            leaf_offsets = np.cumsum([0] + [num_leaf_columns(data_type) for data_type in self.file_schema.types])
+            self.leaf_columns: list[range] = [
+                range(int(first), int(last)) for first, last in zip(leaf_offsets[:-1], leaf_offsets[1:])
+            ]
+            # (fragment index, row group index in fragment) of the row groups of all fragments in order
+            self.row_groups: list[tuple[int, int]] = [
+                (fragment_index, row_group_index)
+                for fragment_index, fragment in enumerate(self.fragments)
+                for row_group_index in range(len(fragment.index.row_group_num_rows))
+            ]
+            self.num_row_groups: int = len(self.row_groups)
+            # first row of each row group, the last entry is the total number of rows
+            self.row_group_offsets: np.ndarray = np.cumsum(
+                np.concatenate([[0]] + [fragment.index.row_group_num_rows for fragment in self.fragments]),
+                dtype=np.int64,
+            )
+            self.num_rows: int = int(self.row_group_offsets[-1])
+            self.groups: list[GroupInfo] = self.__get_groups(self.file_schema.metadata)
+        except Exception:
+            self.close()
+            raise
+        # fixed size list columns are exposed as one channel per component
+        self.channels: list[ChannelInfo] = []
+        for column_index, column_field in enumerate(self.schema):
+            if pa.types.is_fixed_size_list(column_field.type):
+                self.channels.extend(
+                    ChannelInfo(
+                        f"{column_field.name}[{component}]", column_index, column_field.type.value_type, component
+                    )
+                    for component in range(column_field.type.list_size)
+                )
+            else:
+                self.channels.append(ChannelInfo(column_field.name, column_index, column_field.type))
+        # resolved once per channel, None marks channels of unsupported type
+        self.converters: list[ChannelConverter | None] = [
+            get_channel_info_converter(channel) for channel in self.channels
+        ]
 
     @override
     def close(self):
-        if self.table is not None:
-            del self.table
-            self.table = None
+        # pending read ahead is cancelled, running read ahead is finished before the files are released
+        self.__closed.set()
+        with self.__prefetch_lock:
+            prefetches = list(self.__prefetches.values())
+            self.__prefetches.clear()
+        for future in prefetches:
+            future.cancel()
+        wait(prefetches)
+
+        memory_governor.discard(self)
+        for fragment in self.fragments:
+            fragment.close()
+            shared_file_cache.release(fragment.file_key)
+        self.fragments = []
+        self.column_cache.clear()
+
+    def release_memory(self) -> int:
+        """Drop the column chunks of the files of the handle from the shared cache, its pyramids and readers.
+
+        The footers are kept and the data is read again by the next request, also by other handles on the same
+        files. Returns the number of bytes released.
+        """
+        file_keys = {fragment.file_key for fragment in self.fragments}
+        released = shared_file_cache.columns.discard(
+            lambda column_key: isinstance(column_key, tuple) and column_key[0] in file_keys
+        )
+        self.column_cache.clear()
+        for fragment in self.fragments:
+            fragment.close()
+        with self.__pyramid_lock:
+            released += self.pyramid_size
+            self.__pyramids.clear()
+            self.pyramid_size = 0
+        return released
 
     @override
+    @instrumented("structure")
+    @governed
     def fill_structure(self, structure: exd_api.StructureResult) -> None:
 
-        if self.table is None:
-            raise RuntimeError("Table is not initialized!")
-
-        table: pa.Table = self.table
-
-        new_group = exd_api.StructureResult.Group()
-        new_group.name = "data"
-        new_group.id = 0
-        new_group.total_number_of_channels = table.num_columns
-        new_group.number_of_rows = table.num_rows
-        for channel_index, channel_name in enumerate(table.schema.names):
-            channel_type = table.schema.types[channel_index]
-            new_channel = exd_api.StructureResult.Channel()
-            new_channel.name = channel_name
-            new_channel.id = channel_index
-            new_channel.data_type = self.__get_datatype(channel_type)
-            new_channel.unit_string = ""
-            new_group.channels.append(new_channel)
-        structure.groups.append(new_group)
+        if not self.fragments:
+            raise RuntimeError("File is not opened!")
+
+        for group_id, group in enumerate(self.groups):
+            new_group = exd_api.StructureResult.Group()
+            new_group.name = group.name
+            new_group.id = group_id
+            new_group.total_number_of_channels = len(self.channels)
+            new_group.number_of_rows = group.num_rows
+            for channel_index, channel in enumerate(self.channels):
+                new_channel = exd_api.StructureResult.Channel()
+                new_channel.name = channel.name
+                new_channel.id = channel_index
+                new_channel.data_type = self.__get_converter(channel_index).data_type
+                new_channel.unit_string = ""
+                self.__add_statistics(new_channel, group_id, channel_index)
+                new_group.channels.append(new_channel)
+            structure.groups.append(new_group)
 
     @override
+    @instrumented("get_values")
+    @governed
     def get_values(self, request: exd_api.ValuesRequest) -> exd_api.ValuesResult:
 
-        if self.table is None:
-            raise RuntimeError("Table is not initialized!")
+        if not self.fragments:
+            raise RuntimeError("File is not opened!")
 
-        table: pa.Table = self.table
         group_id = request.group_id
-        if group_id < 0 or group_id >= 1:
+        if group_id < 0 or group_id >= len(self.groups):
             raise NotImplementedError(f"Invalid group id {request.group_id}!")
 
-        nr_of_rows: int = table.num_rows
+        group = self.groups[group_id]
+        nr_of_rows: int = group.num_rows
         if request.start >= nr_of_rows:
             raise NotImplementedError(f"Channel start index {request.start} out of range!")
 
@@ -77,83 +2224,717 @@ class ExternalDataFile(ExdFileInterface):
         if end_index >= nr_of_rows:
             end_index = nr_of_rows
 
-        rv = exd_api.ValuesResult(id=request.group_id)
         for channel_id in request.channel_ids:
-            if channel_id >= table.num_columns:
+            if channel_id >= len(self.channels):
                 raise NotImplementedError(f"Invalid channel id {channel_id}!")
+            self.__get_converter(channel_id)
+
+        # read only the columns of the requested channels, duplicates only once
+        channel_ids = list(dict.fromkeys(request.channel_ids))
+        column_indices = list(dict.fromkeys(self.channels[channel_id].column for channel_id in channel_ids))
+        column_positions = [column_indices.index(self.channels[channel_id].column) for channel_id in channel_ids]
+        start = group.start + request.start
+        end = group.start + end_index
+        decimated = bool(self.options.decimation) and end - start > self.options.decimation_points
+        if not decimated:
+            end = self.__limit_window(channel_ids, start, end)
+            if self.options.prefetch_depth > 0 and self.__last_window == (tuple(column_indices), start):
+                self.__prefetch(column_indices, end)
+            self.__last_window = (tuple(column_indices), end)
 
-            channel = table.columns[channel_id]
-            ods_data_type = self.__get_datatype(channel.type)
+        channel_values: list[exd_api.ValuesResult.ChannelValues] = []
+        for channel_id in channel_ids:
             new_channel_values = exd_api.ValuesResult.ChannelValues()
             new_channel_values.id = channel_id
-            new_channel_values.values.data_type = ods_data_type
-            if ods.DataTypeEnum.DT_BYTE == ods_data_type:
-                new_channel_values.values.byte_array.values = np.array(
-                    channel[request.start : end_index], np.uint8
-                ).tobytes()
-            elif ods.DataTypeEnum.DT_SHORT == ods_data_type:
-                new_channel_values.values.long_array.values[:] = np.array(channel[request.start : end_index], np.int32)
-            elif ods.DataTypeEnum.DT_LONG == ods_data_type:
-                new_channel_values.values.long_array.values[:] = np.array(channel[request.start : end_index], np.int32)
-            elif ods.DataTypeEnum.DT_LONGLONG == ods_data_type:
-                new_channel_values.values.longlong_array.values[:] = np.array(
-                    channel[request.start : end_index], np.int64
-                )
-            elif ods.DataTypeEnum.DT_FLOAT == ods_data_type:
-                new_channel_values.values.float_array.values[:] = np.array(
-                    channel[request.start : end_index], np.float32
-                )
-            elif ods.DataTypeEnum.DT_DOUBLE == ods_data_type:
-                new_channel_values.values.double_array.values[:] = np.array(
-                    channel[request.start : end_index], np.float64
-                )
-            elif ods.DataTypeEnum.DT_DATE == ods_data_type:
-                datetime_values = channel[request.start : end_index]
-                string_values = []
-                for datetime_value in datetime_values:
-                    string_values.append(self.__to_asam_ods_time(datetime_value))
-                new_channel_values.values.string_array.values[:] = string_values
-            elif ods.DataTypeEnum.DT_STRING == ods_data_type:
-                new_channel_values.values.string_array.values[:] = np.array(
-                    channel[request.start : end_index], np.bytes_
+            new_channel_values.values.data_type = self.__get_converter(channel_id).data_type
+            channel_values.append(new_channel_values)
+
+        if decimated:
+            self.__decimate(channel_ids, channel_values, start, end)
+
+        # the window is converted slice by slice so only one slice of decoded values is held at a time,
+        # the channels of a slice in parallel. The slices of channels converted as whole window are collected.
+        window_slices: dict[int, list[pa.ChunkedArray]] = {
+            position: []
+            for position, channel_id in enumerate(channel_ids)
+            if self.__get_converter(channel_id).whole_window
+        }
+        offset = 0
+        for columns in [] if decimated else self.__iter_window(column_indices, start, end):
+
+            def convert(position: int) -> None:
+                channel_id = channel_ids[position]
+                column = columns[column_positions[position]]
+                if position in window_slices:
+                    window_slices[position].append(column)
+                else:
+                    self.__get_converter(channel_id).convert(column, channel_values[position].values)
+                add_flags(self.channels[channel_id], column, channel_values[position].flags, offset)
+
+            worker_pool.map(convert, range(len(channel_ids)))
+            offset += len(columns[0]) if columns else 0
+
+        for position, slices in window_slices.items():
+            if slices:
+                self.__get_converter(channel_ids[position]).convert(
+                    pa.chunked_array([chunk for column in slices for chunk in column.chunks], slices[0].type),
+                    channel_values[position].values,
                 )
+
+        rv = exd_api.ValuesResult(id=request.group_id)
+        for channel_id in request.channel_ids:
+            rv.channels.append(channel_values[channel_ids.index(channel_id)])
+
+        if metrics is not None:
+            metrics.observe_response(end - start, rv.ByteSize())
+        return rv
+
+    def __open_fragments(self, file_path: str) -> tuple[list[Fragment], pa.Schema]:
+        """Read the footers of a file, a directory or the files listed in a manifest in parallel."""
+        paths: list[str] = [file_path]
+        partition_values: list[dict[str, Any]] = [{}]
+        partition_schema = pa.schema([])
+        if self.__is_directory(file_path, self.filesystem) or file_path.lower().endswith(MANIFEST_SUFFIX):
+            # a manifest may reference files on another filesystem, e.g. an object store
+            paths, partition_values, partition_schema, self.filesystem = self.__discover_dataset(
+                file_path, self.filesystem
+            )
+            if not paths:
+                raise ValueError(f"No parquet files found in '{file_path}'!")
+
+        futures = [worker_pool.submit(shared_file_cache.acquire, path, self.filesystem) for path in paths]
+        fragments: list[Fragment] = []
+        error: Exception | None = None
+        for path, values, future in zip(paths, partition_values, futures):
+            try:
+                file_key, metadata, index = future.result()
+                fragments.append(Fragment(path, file_key, metadata, index, values, self.filesystem))
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                error = error or e
+        if error is not None:
+            for fragment in fragments:
+                shared_file_cache.release(fragment.file_key)
+            raise error
+        return fragments, partition_schema
+
+    @staticmethod
+    def __is_directory(file_path: str, filesystem: pafs.FileSystem | None) -> bool:
+        if filesystem is None:
+            return os.path.isdir(file_path)
+        return pafs.FileType.Directory == filesystem.get_file_info(file_path).type
+
+    @staticmethod
+    def __discover_dataset(
+        file_path: str, filesystem: pafs.FileSystem | None
+    ) -> tuple[list[str], list[dict[str, Any]], pa.Schema, pafs.FileSystem | None]:
+        """List the files of a hive partitioned directory or a manifest file with their partition values.
+
+        A manifest is a JSON file containing either {"directory": ...} or {"files": [...]} with paths relative
+        to the manifest, or relative to the URI of an optional "filesystem" the files are read from instead.
+        """
+        source: str | list[str] = file_path
+        if not ExternalDataFile.__is_directory(file_path, filesystem):
+            if filesystem is None:
+                with open(file_path, "r", encoding="utf-8") as manifest_file:
+                    manifest = json.load(manifest_file)
+                base_path = os.path.dirname(os.path.abspath(file_path))
+            else:
+                with filesystem.open_input_stream(file_path) as manifest_file:
+                    manifest = json.loads(manifest_file.read())
+                base_path = posixpath.dirname(file_path)
+            if "filesystem" in manifest:
+                filesystem, base_path = resolve_filesystem(manifest["filesystem"])
+            join = os.path.join if filesystem is None else posixpath.join
+            if "directory" in manifest:
+                source = join(base_path, manifest["directory"])
+            elif "files" in manifest:
+                source = [join(base_path, path) for path in manifest["files"]]
             else:
-                raise NotImplementedError(f"Not implemented channel type {ods_data_type}!")
+                raise ValueError(f"Manifest '{file_path}' neither contains 'directory' nor 'files'!")
+
+        if isinstance(source, list):
+            return source, [{} for _ in source], pa.schema([]), filesystem
+
+        dataset = ds.dataset(source, format="parquet", partitioning="hive", filesystem=filesystem)
+        fragments = sorted(dataset.get_fragments(), key=lambda fragment: fragment.path)
+        return (
+            [fragment.path for fragment in fragments],
+            [ds.get_partition_keys(fragment.partition_expression) for fragment in fragments],
+            dataset.partitioning.schema,
+            filesystem,
+        )
+
+    def __get_groups(self, file_metadata: dict[bytes, bytes] | None) -> list[GroupInfo]:
+        if "row_group" == self.options.group_by:
+            return [
+                GroupInfo(
+                    f"row_group_{index}",
+                    int(self.row_group_offsets[index]),
+                    int(self.row_group_offsets[index + 1] - self.row_group_offsets[index]),
+                )
+                for index in range(self.num_row_groups)
+            ]
+
+        if "metadata" == self.options.group_by:
+            key = self.options.group_metadata_key.encode()
+            if not file_metadata or key not in file_metadata:
+                raise ValueError(f"File metadata does not contain key '{self.options.group_metadata_key}'!")
+            groups: list[GroupInfo] = []
+            start = 0
+            for segment in json.loads(file_metadata[key]):
+                groups.append(GroupInfo(str(segment["name"]), start, int(segment["num_rows"])))
+                start += groups[-1].num_rows
+            if start != self.num_rows:
+                raise ValueError(f"Groups in file metadata cover {start} of {self.num_rows} rows!")
+            return groups
 
-            rv.channels.append(new_channel_values)
+        return [GroupInfo("data", 0, self.num_rows)]
 
+    def __add_statistics(self, channel: exd_api.StructureResult.Channel, group_id: int, channel_index: int) -> None:
+        if "none" == self.options.channel_statistics:
+            return
+        key = (group_id, channel_index)
+        if key not in self.__statistics:
+            self.__statistics[key] = self.__get_statistics(self.groups[group_id], channel_index)
+            if self.__statistics[key] is None and "scan" == self.options.channel_statistics:
+                # a scan reads the column once for all of its channels
+                for scanned_index, scanned in self.__scan_statistics(self.groups[group_id], channel_index).items():
+                    self.__statistics[(group_id, scanned_index)] = scanned
+        statistics = self.__statistics[key]
+        if statistics is None:
+            return
+
+        # minimum and maximum are written with the data type of the channel
+        minimum, maximum, null_count = statistics
+        for name, value in (("minimum", minimum), ("maximum", maximum)):
+            converter = get_channel_converter(value.type)
+            # context variables have no byte string arrays
+            if value.is_valid and converter is not None and ods.DataTypeEnum.DT_BYTESTR != converter.data_type:
+                converter.convert(pa.chunked_array([pa.array([value])]), channel.attributes.variables[name])
+        channel.attributes.variables["null_count"].longlong_array.values.append(null_count)
+
+    def __get_statistics(self, group: GroupInfo, channel_index: int) -> tuple[pa.Scalar, pa.Scalar, int] | None:
+        """Get minimum, maximum and null count of a channel in a group without reading data.
+
+        They are aggregated from the row group statistics in the footer, None if the group does not consist of
+        whole row groups, a row group has no statistics or the channel is a component of a nested column.
+        """
+        end = group.start + group.num_rows
+        if end <= group.start:
+            return None
+        channel = self.channels[channel_index]
+        index = channel.column
+        row_groups = self.__covering_row_groups(group.start, end)
+
+        if index >= len(self.file_schema):
+            # partition values are constant per fragment
+            extrema: list[Any] = []
+            null_count = 0
+            position = int(self.row_group_offsets[row_groups.start])
+            for fragment, fragment_row_groups in self.__fragment_row_groups(row_groups):
+                num_rows = int(fragment.index.row_group_num_rows[fragment_row_groups].sum())
+                value = fragment.partition_values.get(channel.name)
+                if value is None:
+                    null_count += min(position + num_rows, end) - max(position, group.start)
+                else:
+                    extrema.append(value)
+                position += num_rows
+            values = pa.array(extrema, statistics_type(channel.data_type))
+            return pc.min(values), pc.max(values), null_count
+
+        if (
+            channel.component is None
+            and group.start == self.row_group_offsets[row_groups.start]
+            and end == self.row_group_offsets[row_groups.stop]
+        ):
+            return self.__footer_statistics(row_groups, index)
+        return None
+
+    def __scan_statistics(
+        self, group: GroupInfo, channel_index: int
+    ) -> dict[int, tuple[pa.Scalar, pa.Scalar, int] | None]:
+        """Get minimum, maximum and null count of the channels of a column in a group by reading the column once.
+
+        The channels are the column itself or all components of a fixed size list column.
+        """
+        channel = self.channels[channel_index]
+        first_channel = channel_index - (channel.component or 0)
+        channel_indices = range(
+            first_channel,
+            first_channel + (1 if channel.component is None else self.schema.field(channel.column).type.list_size),
+        )
+        # extrema are aggregated with compute kernels, which do not take dictionary and view types
+        data_type = statistics_type(channel.data_type)
+        extrema: list[list[Any]] = [[] for _ in channel_indices]
+        null_counts = [0 for _ in channel_indices]
+        log.debug("Scanning column %s for missing statistics", self.schema.field(channel.column).name)
+        for (column,) in self.__iter_window([channel.column], group.start, group.start + group.num_rows):
+            for position, scanned_index in enumerate(channel_indices):
+                values = column
+                if channel.component is not None:
+                    component = self.channels[scanned_index].component
+                    values = pa.chunked_array(
+                        [pc.list_element(chunk, component) for chunk in column.chunks], channel.data_type
+                    )
+                if values.type != data_type:
+                    values = values.cast(data_type)
+                null_counts[position] += values.null_count
+                if values.null_count < len(values):
+                    min_max = pc.min_max(values)
+                    extrema[position].extend((min_max["min"], min_max["max"]))
+        rv: dict[int, tuple[pa.Scalar, pa.Scalar, int] | None] = {}
+        for position, scanned_index in enumerate(channel_indices):
+            values = pa.array(extrema[position], data_type)
+            rv[scanned_index] = (pc.min(values), pc.max(values), null_counts[position])
         return rv
 
-    def __to_asam_ods_time(self, datetime_value) -> str:
-        return re.sub("[^0-9]", "", str(datetime_value))
-
-    def __get_datatype(self, data_type: pa.DataType) -> ods.DataTypeEnum:
-        if pa.int8() == data_type:
-            return ods.DataTypeEnum.DT_SHORT
-        elif pa.uint8() == data_type:
-            return ods.DataTypeEnum.DT_BYTE
-        elif pa.int16() == data_type:
-            return ods.DataTypeEnum.DT_SHORT
-        elif pa.uint16() == data_type:
-            return ods.DataTypeEnum.DT_LONG
-        elif pa.int32() == data_type:
-            return ods.DataTypeEnum.DT_LONG
-        elif pa.uint32() == data_type:
-            return ods.DataTypeEnum.DT_LONGLONG
-        elif pa.int64() == data_type:
-            return ods.DataTypeEnum.DT_LONGLONG
-        elif pa.uint64() == data_type:
-            return ods.DataTypeEnum.DT_DOUBLE
-        elif data_type in [pa.timestamp("us"), pa.timestamp("ns"), pa.timestamp("ms")]:
-            return ods.DataTypeEnum.DT_DATE
-        elif pa.float32() == data_type:
-            return ods.DataTypeEnum.DT_FLOAT
-        elif pa.float64() == data_type:
-            return ods.DataTypeEnum.DT_DOUBLE
-        elif pa.string() == data_type:
-            return ods.DataTypeEnum.DT_STRING
-        raise NotImplementedError(f"Unknown type {data_type}!")
+    def __decimate(
+        self, channel_ids: list[int], channel_values: list[exd_api.ValuesResult.ChannelValues], start: int, end: int
+    ) -> None:
+        """Fill the decimated values of the channels for the window [start, end)."""
+        mode = self.options.decimation
+        starts, level = self.__decimation_buckets(start, end)
+        for channel_id, target in zip(channel_ids, channel_values):
+            channel = self.channels[channel_id]
+            data_type = decimation_type(channel.data_type)
+            if data_type is None:
+                values = self.__sample(channel, np.repeat(starts, 2) if "minmax" == mode else starts, end)
+            elif level is None or (pyramid := self.__pyramid(channel_id, data_type, start, end)) is None:
+                values = BucketAggregates.aggregate(
+                    self.__iter_channel(channel, start, end), starts, start, data_type
+                ).values(mode, data_type)
+            else:
+                # whole pyramid buckets inside the window are merged, the partial ones at its edges aggregated
+                # from the column data
+                level_size = PYRAMID_BASE * PYRAMID_FACTOR**level
+                head = min(-(-start // level_size) * level_size, end)
+                tail = max(end // level_size * level_size, head)
+                values = (
+                    BucketAggregates.aggregate(self.__iter_channel(channel, start, head), starts, start, data_type)
+                    .combine(
+                        pyramid[level].merge(
+                            head // level_size, tail // level_size, (np.clip(starts, head, tail) - head) // level_size
+                        )
+                    )
+                    .combine(
+                        BucketAggregates.aggregate(self.__iter_channel(channel, tail, end), starts, tail, data_type)
+                    )
+                    .values(mode, data_type)
+                )
+            # component values are already extracted
+            converter = (
+                self.__get_converter(channel_id)
+                if channel.component is None
+                else get_channel_converter(channel.data_type)
+            )
+            converter.convert(values, target.values)
+            add_flags(replace(channel, component=None), values, target.flags, 0)
+
+    def __decimation_buckets(self, start: int, end: int) -> tuple[np.ndarray, int | None]:
+        """Get the first row of each bucket of a decimated window and the pyramid level to aggregate from.
+
+        Buckets other than the first begin at multiples of the bucket size rounded up to the buckets of the
+        coarsest pyramid level at least four times smaller, at most decimation_points buckets (half of them for
+        minmax) are returned. Windows with buckets smaller than that are aggregated from the column data directly.
+        """
+        num_buckets = self.options.decimation_points
+        if "minmax" == self.options.decimation:
+            num_buckets //= 2
+        bucket_size = -(-(end - start) // num_buckets)
+        level = -1
+        level_size = PYRAMID_BASE
+        while 4 * level_size <= bucket_size:
+            level += 1
+            level_size *= PYRAMID_FACTOR
+        if level < 0:
+            return np.arange(start, end, bucket_size), None
+
+        level_size //= PYRAMID_FACTOR
+        step = -(-bucket_size // level_size) * level_size
+        while True:
+            # the window starts inside the first bucket, so it may span one bucket more than its size suggests
+            boundaries = np.arange(start // step + 1, -(-end // step)) * step
+            if len(boundaries) < num_buckets:
+                return np.concatenate([[start], boundaries]), level
+            step += level_size
+
+    def __pyramid(
+        self, channel_id: int, data_type: pa.DataType, start: int, end: int
+    ) -> list[BucketAggregates] | None:
+        """Get the decimation pyramid of a channel, aggregating the whole column on first use.
+
+        Each level merges PYRAMID_FACTOR buckets of the level below, so that zooming in and out of previews only
+        reads the column once. It is only built for a window [start, end) covering at least a PYRAMID_FACTOR-th of
+        the column, smaller windows are not worth reading the whole column and get None.
+        """
+        with self.__pyramid_lock:
+            levels = self.__pyramids.get(channel_id)
+            if levels is not None:
+                self.__pyramids.move_to_end(channel_id)
+                return levels
+        if PYRAMID_FACTOR * (end - start) < self.num_rows:
+            return None
+
+        # the column is scanned without holding the lock, so that other channels are not blocked meanwhile
+        levels = [
+            BucketAggregates.aggregate(
+                self.__iter_channel(self.channels[channel_id], 0, self.num_rows),
+                np.arange(0, self.num_rows, PYRAMID_BASE),
+                0,
+                data_type,
+            )
+        ]
+        while len(levels[-1].count) > 1:
+            num_buckets = len(levels[-1].count)
+            levels.append(levels[-1].merge(0, num_buckets, np.arange(0, num_buckets, PYRAMID_FACTOR)))
+        size = sum(level.nbytes for level in levels)
+        with self.__pyramid_lock:
+            if channel_id not in self.__pyramids and size <= self.options.pyramid_cache_size:
+                self.__pyramids[channel_id] = levels
+                self.pyramid_size += size
+                while self.pyramid_size > self.options.pyramid_cache_size:
+                    _, evicted = self.__pyramids.popitem(last=False)
+                    self.pyramid_size -= sum(level.nbytes for level in evicted)
+        return levels
+
+    def __sample(self, channel: ChannelInfo, rows: np.ndarray, end: int) -> pa.ChunkedArray:
+        """Get the values of a channel at the given sorted rows of the window [rows[0], end)."""
+        samples: list[pa.ChunkedArray] = []
+        position = int(rows[0])
+        for column in self.__iter_channel(channel, position, end):
+            first, last = np.searchsorted(rows, [position, position + len(column)])
+            samples.append(column.take(pa.array(rows[first:last] - position)))
+            position += len(column)
+        return pa.chunked_array([chunk for sample in samples for chunk in sample.chunks], samples[0].type)
+
+    def __iter_channel(self, channel: ChannelInfo, start: int, end: int) -> Iterator[pa.ChunkedArray]:
+        """Yield the values of a channel in the window [start, end) slice by slice."""
+        for (column,) in self.__iter_window([channel.column], start, end):
+            if channel.component is not None:
+                column = pa.chunked_array(
+                    [pc.list_element(chunk, channel.component) for chunk in column.chunks], channel.data_type
+                )
+            yield column
+
+    def __covering_row_groups(self, start: int, end: int) -> range:
+        first_row_group = int(np.searchsorted(self.row_group_offsets, start, side="right")) - 1
+        last_row_group = int(np.searchsorted(self.row_group_offsets, end, side="left")) - 1
+        return range(first_row_group, last_row_group + 1)
+
+    def __fragment_row_groups(self, row_groups: range) -> Iterator[tuple[Fragment, slice]]:
+        """Split global row groups into the consecutive row groups of each fragment."""
+        position = row_groups.start
+        while position < row_groups.stop:
+            fragment_index, first = self.row_groups[position]
+            fragment = self.fragments[fragment_index]
+            count = min(row_groups.stop - position, len(fragment.index.row_group_num_rows) - first)
+            yield fragment, slice(first, first + count)
+            position += count
+
+    def __footer_statistics(self, row_groups: range, index: int) -> tuple[pa.Scalar, pa.Scalar, int] | None:
+        """Combine the footer statistics of a column over whole row groups, None if some are missing."""
+        minima: list[pa.Array] = []
+        maxima: list[pa.Array] = []
+        null_count = 0
+        for fragment, fragment_row_groups in self.__fragment_row_groups(row_groups):
+            statistics = shared_file_cache.statistics(fragment.file_key, fragment.path, fragment.filesystem).aggregate(
+                index, fragment_row_groups
+            )
+            if statistics is None:
+                return None
+            minima.append(statistics[0])
+            maxima.append(statistics[1])
+            null_count += statistics[2]
+        data_type = statistics_type(self.file_schema.field(index).type)
+        return (
+            pc.min(pa.chunked_array(minima, data_type)),
+            pc.max(pa.chunked_array(maxima, data_type)),
+            null_count,
+        )
+
+    def __column_chunks_size(self, row_groups: range, column_indices: list[int]) -> int:
+        """Get the uncompressed size of the column chunks of the given columns and row groups."""
+        leaves = [
+            leaf for index in column_indices if index < len(self.file_schema) for leaf in self.leaf_columns[index]
+        ]
+        if not leaves:
+            return 0
+        return sum(
+            int(fragment.index.column_chunk_sizes[fragment_row_groups, leaves].sum())
+            for fragment, fragment_row_groups in self.__fragment_row_groups(row_groups)
+        )
+
+    def __limit_window(self, channel_ids: list[int], start: int, end: int) -> int:
+        """Get the end of the window so that the estimated response size stays below max_response_size."""
+        max_response_size = self.options.max_response_size
+        if 0 == max_response_size or end <= start:
+            return end
+
+        # fixed size values are exact, strings are estimated from the uncompressed size of their column chunks
+        row_size = 0.0
+        variable_size_columns: list[int] = []
+        for channel_id in channel_ids:
+            index = self.channels[channel_id].column
+            value_size = VALUE_SIZES.get(self.__get_converter(channel_id).data_type)
+            if value_size is not None:
+                row_size += value_size
+            elif index >= len(self.file_schema):
+                row_size += len(str(self.fragments[0].partition_values.get(self.schema.names[index], "")))
+            elif index not in variable_size_columns:
+                variable_size_columns.append(index)
+        if variable_size_columns:
+            row_groups = self.__covering_row_groups(start, end)
+            num_rows = int(self.row_group_offsets[row_groups.stop] - self.row_group_offsets[row_groups.start])
+            row_size += self.__column_chunks_size(row_groups, variable_size_columns) / max(num_rows, 1)
+
+        max_rows = int(max_response_size // row_size) if row_size > 0 else end - start
+        if max_rows >= end - start:
+            return end
+        if "fail" == self.options.response_size_policy or 0 == max_rows:
+            raise ValueError(
+                f"Estimated response size of {int(row_size * (end - start))} bytes exceeds "
+                f"max_response_size of {max_response_size} bytes, request at most {max_rows} rows!"
+            )
+        log.info(
+            "Clamping request of %s rows to %s rows to stay below %s bytes", end - start, max_rows, max_response_size
+        )
+        return start + max_rows
+
+    def __iter_window(self, column_indices: list[int], start: int, end: int) -> Iterator[list[pa.ChunkedArray]]:
+        """Yield the rows [start, end) of the given columns slice by slice touching only the covering row groups.
+
+        Windows fitting into the column cache are read row group by row group through the caches. Larger windows
+        are streamed in batches using iter_batches without caching, so that decoded data never exceeds a batch.
+        Row groups at the edges of the window of which only a small part is requested are read page by page if
+        the file has a page index.
+        """
+        if end <= start:
+            yield [pa.chunked_array([], self.schema.types[index]) for index in column_indices]
+            return
+
+        row_groups = self.__covering_row_groups(start, end)
+        first_pages = last_pages = None
+        if self.options.page_index:
+            first_pages = self.__read_pages(row_groups.start, column_indices, start, end)
+            if first_pages is not None:
+                row_groups = range(row_groups.start + 1, row_groups.stop)
+            if len(row_groups) > 0:
+                last_pages = self.__read_pages(row_groups.stop - 1, column_indices, start, end)
+            if last_pages is not None:
+                row_groups = range(row_groups.start, row_groups.stop - 1)
+
+        window_size = self.__column_chunks_size(row_groups, column_indices)
+        batches = (
+            self.__iter_row_groups(row_groups, column_indices)
+            if window_size <= self.column_cache.max_bytes
+            else self.__iter_batches(row_groups, column_indices)
+        )
+
+        # batches are yielded with their first row and trimmed to the window
+        for position, columns in itertools.chain(
+            [] if first_pages is None else [first_pages], batches, [] if last_pages is None else [last_pages]
+        ):
+            num_rows = len(columns[0]) if columns else 0
+            offset = max(start - position, 0)
+            length = min(end, position + num_rows) - position - offset
+            if length > 0:
+                yield [column.slice(offset, length) for column in columns]
+            if position + num_rows >= end:
+                return
+
+    def __read_pages(
+        self, row_group_index: int, column_indices: list[int], start: int, end: int
+    ) -> tuple[int, list[pa.ChunkedArray]] | None:
+        """Read the part of the window in a row group decoding only the data pages overlapping it.
+
+        None if more than half of the row group is requested, the column chunks are small, a column is cached or
+        is not flat or a column chunk has no offset index. The row group is then read as a whole.
+        """
+        fragment_index, fragment_row_group_index = self.row_groups[row_group_index]
+        fragment = self.fragments[fragment_index]
+        row_group_start = int(self.row_group_offsets[row_group_index])
+        first_row = max(start, row_group_start)
+        last_row = min(end, int(self.row_group_offsets[row_group_index + 1]))
+        if 2 * (last_row - first_row) > self.row_group_offsets[row_group_index + 1] - row_group_start:
+            return None
+        if self.__column_chunks_size(range(row_group_index, row_group_index + 1), column_indices) < (
+            PAGE_INDEX_MIN_CHUNK_SIZE
+        ):
+            return None
+        file_columns = [index for index in column_indices if index < len(self.file_schema)]
+        for index in file_columns:
+            if (
+                (fragment.file_key, index, fragment_row_group_index) in shared_file_cache.columns
+                or len(self.leaf_columns[index]) != 1
+                or pa.types.is_nested(self.file_schema.types[index])
+            ):
+                return None
+        column_chunks = fragment.column_chunk_pages(
+            self.options,
+            fragment_row_group_index,
+            [(self.file_schema.field(index).name, self.leaf_columns[index].start) for index in file_columns],
+        )
+        if any(pages is None for pages in column_chunks):
+            return None
+
+        columns = []
+        pages_of_columns = dict(zip(file_columns, column_chunks))
+        for index in column_indices:
+            if index >= len(self.file_schema):
+                columns.append(self.__partition_column(fragment, index, last_row - first_row))
+                continue
+            with timed("read"):
+                try:
+                    columns.append(
+                        fragment.read_pages(
+                            self.options,
+                            pages_of_columns[index],
+                            self.file_schema.field(index),
+                            first_row - row_group_start,
+                            last_row - row_group_start,
+                        )
+                    )
+                except pa.ArrowException as e:
+                    log.warning(
+                        "Could not decode pages of column '%s' in row group %d of '%s', reading it whole: %s",
+                        self.file_schema.field(index).name,
+                        fragment_row_group_index,
+                        fragment.path,
+                        e,
+                    )
+                    return None
+        if metrics is not None:
+            metrics.add("exd_parquet_page_index_reads_total")
+        return first_row, columns
+
+    def __iter_row_groups(
+        self, row_groups: range, column_indices: list[int]
+    ) -> Iterator[tuple[int, list[pa.ChunkedArray]]]:
+        for row_group_index in row_groups:
+            with self.__prefetch_lock:
+                prefetch = self.__prefetches.get(row_group_index)
+            if prefetch is not None:
+                wait([prefetch])
+            yield int(self.row_group_offsets[row_group_index]), self.__read_row_group(row_group_index, column_indices)
+
+    def __prefetch(self, column_indices: list[int], end: int) -> None:
+        """Read the row groups following the window ahead into the column cache on the worker pool."""
+        file_columns = [index for index in column_indices if index < len(self.file_schema)]
+        first_row_group = int(np.searchsorted(self.row_group_offsets, end, side="right")) - 1
+        for row_group_index in range(
+            first_row_group, min(first_row_group + self.options.prefetch_depth, self.num_row_groups)
+        ):
+            if all((index, row_group_index) in self.column_cache for index in file_columns):
+                continue
+            with self.__prefetch_lock:
+                if row_group_index not in self.__prefetches and not self.__closed.is_set():
+                    self.__prefetches[row_group_index] = worker_pool.submit(
+                        self.__prefetch_row_group, row_group_index, file_columns
+                    )
+
+    def __prefetch_row_group(self, row_group_index: int, column_indices: list[int]) -> None:
+        try:
+            if not self.__closed.is_set():
+                self.__read_row_group(row_group_index, column_indices)
+        except Exception:  # pylint: disable=broad-exception-caught
+            # the request reading this row group reports the error
+            log.debug("Read ahead of row group %s failed", row_group_index, exc_info=True)
+        finally:
+            with self.__prefetch_lock:
+                self.__prefetches.pop(row_group_index, None)
+
+    def __iter_batches(
+        self, row_groups: range, column_indices: list[int]
+    ) -> Iterator[tuple[int, list[pa.ChunkedArray]]]:
+        # consecutive row groups of the same fragment are streamed together
+        position = int(self.row_group_offsets[row_groups.start])
+        for fragment_index in dict.fromkeys(self.row_groups[row_group_index][0] for row_group_index in row_groups):
+            fragment = self.fragments[fragment_index]
+            fragment_row_groups = [
+                self.row_groups[row_group_index][1]
+                for row_group_index in row_groups
+                if self.row_groups[row_group_index][0] == fragment_index
+            ]
+            file_columns = [index for index in column_indices if index < len(self.file_schema)]
+            if metrics is not None:
+                metrics.add("exd_parquet_row_groups_read_total", len(fragment_row_groups))
+            for batch in fragment.iter_batches(
+                self.options, fragment_row_groups, [self.schema.names[index] for index in file_columns]
+            ):
+                columns: list[pa.ChunkedArray] = []
+                for index in column_indices:
+                    if index < len(self.file_schema):
+                        columns.append(pa.chunked_array([batch.column(file_columns.index(index))]))
+                    else:
+                        columns.append(self.__partition_column(fragment, index, batch.num_rows))
+                yield position, columns
+                position += batch.num_rows
+
+    def __partition_column(self, fragment: Fragment, index: int, num_rows: int) -> pa.ChunkedArray:
+        partition_field = self.schema.field(index)
+        value = pa.scalar(fragment.partition_values.get(partition_field.name), partition_field.type)
+        return pa.chunked_array([pa.repeat(value, num_rows)])
+
+    def __read_row_group(self, row_group_index: int, column_indices: list[int]) -> list[pa.ChunkedArray]:
+        """Get the given columns of a row group from the handle or shared cache, reading the missing ones in one go."""
+        if not self.fragments:
+            raise RuntimeError("File is not opened!")
+
+        fragment_index, fragment_row_group_index = self.row_groups[row_group_index]
+        fragment = self.fragments[fragment_index]
+        columns: dict[int, pa.ChunkedArray] = {}
+        missing: list[int] = []
+        for index in column_indices:
+            if index >= len(self.file_schema):
+                num_rows = int(self.row_group_offsets[row_group_index + 1] - self.row_group_offsets[row_group_index])
+                columns[index] = self.__partition_column(fragment, index, num_rows)
+                continue
+            shared_key = (fragment.file_key, index, fragment_row_group_index)
+            column = self.column_cache.get((index, row_group_index))
+            cache = "handle"
+            if column is None:
+                column = shared_file_cache.columns.get(shared_key)
+                cache = "shared"
+                if column is not None:
+                    self.column_cache.put((index, row_group_index), shared_key, column)
+            if column is None:
+                missing.append(index)
+            else:
+                columns[index] = (
+                    column if column.type == self.read_types[index] else column.cast(self.read_types[index])
+                )
+                if metrics is not None:
+                    metrics.add("exd_parquet_cache_hits_total", labels=f'cache="{cache}"')
+
+        if missing:
+            if metrics is not None:
+                metrics.add("exd_parquet_cache_misses_total", len(missing))
+                metrics.add("exd_parquet_row_groups_read_total")
+            with timed("read"):
+                table = fragment.read_row_group(
+                    self.options, fragment_row_group_index, [self.schema.names[index] for index in missing]
+                )
+            for index, column in zip(missing, table.columns):
+                self.column_cache.put(
+                    (index, row_group_index), (fragment.file_key, index, fragment_row_group_index), column
+                )
+                columns[index] = column
+        return [columns[index] for index in column_indices]
+
+    def __get_converter(self, channel_index: int) -> ChannelConverter:
+        converter = self.converters[channel_index]
+        if converter is None:
+            raise NotImplementedError(f"Unknown type {self.channels[channel_index].data_type}!")
+        return converter
 
 
 if __name__ == "__main__":
-    serve_plugin("PARQUET", ExternalDataFile.create, ["*.parquet"])
+    start_metrics_export(
+        (
+            int(os.environ["ODS_EXD_API_PARQUET_METRICS_PORT"])
+            if os.environ.get("ODS_EXD_API_PARQUET_METRICS_PORT")
+            else None
+        ),
+        float(os.environ.get("ODS_EXD_API_PARQUET_METRICS_LOG_INTERVAL") or 0),
+    )
+    serve_plugin("PARQUET", ExternalDataFile.create, ["*.parquet", f"*{MANIFEST_SUFFIX}"])
@@ -0,0 +1,113 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import exd_api
+
+from external_data_file import ExternalDataFile, shared_file_cache
+
+# pylint: disable=no-member
+
+
+class TestSharedFileCache(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temporary_directory.name, "shared.parquet")
+        pq.write_table(
+            pa.table({"index": pa.array(np.arange(300, dtype=np.int64))}), self.file_path, row_group_size=100
+        )
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_handles_share_footer_and_columns(self):
+        first = ExternalDataFile(self.file_path)
+        with mock.patch("external_data_file.pq.read_metadata") as read_metadata:
+            second = ExternalDataFile(self.file_path, "other=parameters")
+            read_metadata.assert_not_called()
+        try:
+            self.assertEqual(first.fragments[0].file_key, second.fragments[0].file_key)
+            self.assertEqual(second.num_rows, 300)
+
+            request = exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=50, limit=100)
+            first_values = first.get_values(request)
+            with mock.patch.object(second.fragments[0].open(second.options), "read_row_group") as read_row_group:
+                second_values = second.get_values(request)
+                read_row_group.assert_not_called()
+            self.assertEqual(first_values, second_values)
+        finally:
+            first.close()
+            second.close()
+
+    def test_handles_hold_columns_once_in_shared_cache(self):
+        first = ExternalDataFile(self.file_path)
+        second = ExternalDataFile(self.file_path)
+        key = first.fragments[0].file_key
+        try:
+            size = shared_file_cache.columns.size
+            request = exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=0, limit=300)
+            first.get_values(request)
+            second.get_values(request)
+            self.assertGreater(first.column_cache.size, 0)
+            self.assertEqual(second.column_cache.size, first.column_cache.size)
+            self.assertEqual(shared_file_cache.columns.size - size, first.column_cache.size)
+
+            # chunks evicted from the shared cache are not kept alive by the handles
+            shared_file_cache.columns.discard(lambda column_key: column_key[0] == key)
+            self.assertNotIn((0, 0), first.column_cache)
+            with mock.patch.object(
+                first.fragments[0].open(first.options),
+                "read_row_group",
+                wraps=first.fragments[0].parquet_file.read_row_group,
+            ) as read_row_group:
+                values = first.get_values(request)
+                self.assertEqual(read_row_group.call_count, 3)
+            self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(300))
+        finally:
+            first.close()
+            second.close()
+
+    def test_close_releases_entries(self):
+        first = ExternalDataFile(self.file_path)
+        second = ExternalDataFile(self.file_path)
+        key = first.fragments[0].file_key
+        first.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=0, limit=300))
+
+        def cached_columns():
+            return [index for index in range(3) if shared_file_cache.columns.get((key, 0, index)) is not None]
+
+        first.close()
+        first.close()
+        self.assertEqual(len(cached_columns()), 3)
+        second.close()
+        self.assertEqual(len(cached_columns()), 0)
+        self.assertNotIn(key, shared_file_cache._files)  # pylint: disable=protected-access
+
+    def test_modified_file_is_not_served_from_cache(self):
+        first = ExternalDataFile(self.file_path)
+        try:
+            first.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=0, limit=10))
+            pq.write_table(pa.table({"index": pa.array(np.arange(10, 20, dtype=np.int64))}), self.file_path)
+            os.utime(self.file_path, ns=(0, first.fragments[0].file_key[1] + 1))
+
+            second = ExternalDataFile(self.file_path)
+            try:
+                self.assertNotEqual(first.fragments[0].file_key, second.fragments[0].file_key)
+                self.assertEqual(second.num_rows, 10)
+                values = second.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=0, limit=10))
+                self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(10, 20))
+            finally:
+                second.close()
+        finally:
+            first.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
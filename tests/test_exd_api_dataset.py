@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import ExternalDataReader, FileHandlerRegistry, exd_api, ods
+
+from external_data_file import ExternalDataFile
+from tests.mock_servicer_context import MockServicerContext
+
+# pylint: disable=no-member
+
+
+class TestDataset(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        """Register ExternalDataFile handler before each test."""
+        FileHandlerRegistry.register(file_type_name="test", factory=ExternalDataFile)
+        self.context = MockServicerContext()
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.temporary_directory.name, "logger")
+        # one file per minute, 100 rows each, partitioned by run
+        for minute in range(6):
+            partition = os.path.join(self.directory, f"run={minute // 3 + 1}")
+            os.makedirs(partition, exist_ok=True)
+            rows = np.arange(minute * 100, (minute + 1) * 100, dtype=np.int64)
+            pq.write_table(
+                pa.table({"index": pa.array(rows), "value": pa.array(rows / 10)}),
+                os.path.join(partition, f"minute_{minute:02d}.parquet"),
+                row_group_size=50,
+            )
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_directory(self):
+        file = ExternalDataFile(self.directory)
+        try:
+            self.assertEqual(len(file.fragments), 6)
+            self.assertEqual(file.num_rows, 600)
+            self.assertEqual(file.num_row_groups, 12)
+
+            structure = exd_api.StructureResult()
+            file.fill_structure(structure)
+            self.assertEqual(len(structure.groups), 1)
+            self.assertEqual(structure.groups[0].number_of_rows, 600)
+            self.assertEqual([channel.name for channel in structure.groups[0].channels], ["index", "value", "run"])
+            self.assertEqual(structure.groups[0].channels[2].data_type, ods.DataTypeEnum.DT_LONG)
+            self.assertTrue(all(fragment.parquet_file is None for fragment in file.fragments))
+
+            values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0, 2], start=280, limit=40))
+            self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(280, 320))
+            self.assertSequenceEqual(values.channels[1].values.long_array.values, [1] * 20 + [2] * 20)
+            # only the fragments overlapping the window are opened
+            self.assertEqual([fragment.parquet_file is not None for fragment in file.fragments], [0, 0, 1, 1, 0, 0])
+        finally:
+            file.close()
+        self.assertEqual(len(file.fragments), 0)
+
+    def test_manifest(self):
+        manifest_path = os.path.join(self.temporary_directory.name, "minutes.parquet.json")
+        with open(manifest_path, "w", encoding="utf-8") as manifest_file:
+            json.dump({"files": ["logger/run=2/minute_04.parquet", "logger/run=1/minute_00.parquet"]}, manifest_file)
+
+        service = ExternalDataReader()
+        handle = service.Open(
+            exd_api.Identifier(url=pathlib.Path(manifest_path).resolve().as_uri(), parameters=""), self.context
+        )
+        try:
+            structure = service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+            self.assertEqual(structure.groups[0].number_of_rows, 200)
+            self.assertEqual(len(structure.groups[0].channels), 2)
+
+            values = service.GetValues(
+                exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[0], start=90, limit=20), self.context
+            )
+            self.assertSequenceEqual(
+                values.channels[0].values.longlong_array.values, list(range(490, 500)) + list(range(0, 10))
+            )
+        finally:
+            service.Close(handle, self.context)
+
+    def test_manifest_directory(self):
+        manifest_path = os.path.join(self.temporary_directory.name, "logger.parquet.json")
+        with open(manifest_path, "w", encoding="utf-8") as manifest_file:
+            json.dump({"directory": "logger"}, manifest_file)
+
+        file = ExternalDataFile(manifest_path, "group_by=row_group")
+        try:
+            self.assertEqual(len(file.groups), 12)
+            values = file.get_values(exd_api.ValuesRequest(group_id=11, channel_ids=[0], start=0, limit=50))
+            self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(550, 600))
+        finally:
+            file.close()
+
+    def test_string_channel_read_as_dictionary_in_some_files(self):
+        # few distinct labels are read as dictionary, unique names are not
+        pq.write_table(
+            pa.table({"label": pa.array([f"state{i % 3}" for i in range(1000)])}),
+            os.path.join(self.temporary_directory.name, "labels.parquet"),
+        )
+        pq.write_table(
+            pa.table({"label": pa.array([f"unique{i:04}" for i in range(1000)])}),
+            os.path.join(self.temporary_directory.name, "names.parquet"),
+        )
+        manifest_path = os.path.join(self.temporary_directory.name, "labels.parquet.json")
+        with open(manifest_path, "w", encoding="utf-8") as manifest_file:
+            json.dump({"files": ["labels.parquet", "names.parquet"]}, manifest_file)
+
+        single = ExternalDataFile(os.path.join(self.temporary_directory.name, "labels.parquet"))
+        file = ExternalDataFile(manifest_path)
+        try:
+            # the single file handle fills the shared cache with dictionary arrays
+            single.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=0, limit=1000))
+            values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=990, limit=20))
+            self.assertSequenceEqual(
+                values.channels[0].values.string_array.values,
+                [f"state{i % 3}" for i in range(990, 1000)] + [f"unique{i:04}" for i in range(10)],
+            )
+            for decimation in ["stride", "minmax"]:
+                decimated = ExternalDataFile(manifest_path, f"decimation={decimation};decimation_points=20")
+                try:
+                    values = decimated.get_values(
+                        exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=0, limit=2000)
+                    )
+                    strings = values.channels[0].values.string_array.values
+                    self.assertEqual(len(strings), 20)
+                    self.assertTrue(strings[0].startswith("state") and strings[-1].startswith("unique"))
+                finally:
+                    decimated.close()
+        finally:
+            single.close()
+            file.close()
+
+    def test_schema_mismatch(self):
+        os.makedirs(os.path.join(self.directory, "run=3"))
+        pq.write_table(pa.table({"other": [1.0]}), os.path.join(self.directory, "run=3", "other.parquet"))
+        with self.assertRaises(ValueError):
+            ExternalDataFile(self.directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,11 @@
 import logging
 import os
 import pathlib
+import re
 import tempfile
 import unittest
 from datetime import datetime
+from decimal import Decimal
 
 import numpy as np
 import pandas as pd
@@ -11,7 +13,7 @@ import pyarrow as pa
 import pyarrow.parquet as pq
 from ods_exd_api_box import ExternalDataReader, FileHandlerRegistry, exd_api, ods
 
-from external_data_file import ExternalDataFile
+from external_data_file import ExternalDataFile, to_asam_ods_time, to_numpy, to_python_values
 from tests.mock_servicer_context import MockServicerContext
 
 # pylint: disable=no-member
@@ -135,6 +137,220 @@ class TestDataTypes(unittest.TestCase):
             finally:
                 service.Close(handle, self.context)
 
+    def test_unsupported_datatype(self):
+        with tempfile.TemporaryDirectory() as temporary_directory_name:
+            file_path = os.path.join(temporary_directory_name, "unsupported.parquet")
+            pq.write_table(
+                pa.table({"float64_data": [1.5, 2.5], "list_data": pa.array([[1], [2, 3]], pa.list_(pa.int32()))}),
+                file_path,
+            )
+
+            file = ExternalDataFile(file_path)
+            try:
+                self.assertEqual(file.converters[0].data_type, ods.DataTypeEnum.DT_DOUBLE)
+                self.assertIsNone(file.converters[1])
+                with self.assertRaises(NotImplementedError):
+                    file.fill_structure(exd_api.StructureResult())
+                with self.assertRaises(NotImplementedError):
+                    file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[1], start=0, limit=2))
+
+                values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=0, limit=2))
+                self.assertSequenceEqual(values.channels[0].values.double_array.values, [1.5, 2.5])
+            finally:
+                file.close()
+
+    def test_numeric_conversion(self):
+        single_chunk = pa.chunked_array([pa.array(np.arange(10, dtype=np.float64))]).slice(2, 5)
+        values = to_numpy(single_chunk, np.float64)
+        self.assertFalse(values.flags.owndata)
+        self.assertSequenceEqual(values.tolist(), [2.0, 3.0, 4.0, 5.0, 6.0])
+
+        values = to_numpy(single_chunk, np.float32)
+        self.assertTrue(values.flags.owndata)
+        self.assertEqual(values.dtype, np.float32)
+
+        multi_chunk = pa.chunked_array([pa.array([1, 2], pa.int16()), pa.array([3, 4, 5], pa.int16())]).slice(1, 3)
+        values = to_numpy(multi_chunk, np.int32)
+        self.assertEqual(values.dtype, np.int32)
+        self.assertSequenceEqual(values.tolist(), [2, 3, 4])
+
+        self.assertEqual(len(to_numpy(pa.chunked_array([], pa.int64()), np.int64)), 0)
+
+    def test_byte_conversion(self):
+        with tempfile.TemporaryDirectory() as temporary_directory_name:
+            file_path = os.path.join(temporary_directory_name, "bytes.parquet")
+            pq.write_table(
+                pa.table({"uint8_data": pa.array(np.arange(250, dtype=np.uint8))}), file_path, row_group_size=100
+            )
+
+            file = ExternalDataFile(file_path)
+            try:
+                values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=95, limit=110))
+                self.assertEqual(values.channels[0].values.byte_array.values, bytes(range(95, 205)))
+            finally:
+                file.close()
+
+    def test_date_conversion(self):
+        rng = np.random.default_rng(0)
+        for unit, ticks_per_second in (("s", 1), ("ms", 10**3), ("us", 10**6), ("ns", 10**9)):
+            ticks = rng.integers(-(10**9) * ticks_per_second, 4 * 10**9 * ticks_per_second, 10000)
+            # whole seconds and whole microseconds
+            ticks[::5] = ticks[::5] // ticks_per_second * ticks_per_second
+            ticks[1::5] = ticks[1::5] // 1000 * 1000
+            mask = np.zeros(len(ticks), bool)
+            mask[2::97] = True
+            values = pa.chunked_array(
+                [
+                    pa.array(ticks[:5000], pa.timestamp(unit)),
+                    pa.array(ticks[5000:], pa.timestamp(unit), mask=mask[5000:]),
+                ]
+            )
+
+            expected = [re.sub("[^0-9]", "", str(value)) for value in values]
+            self.assertListEqual(to_asam_ods_time(values).to_pylist(), expected, unit)
+
+    def test_string_types(self):
+        names = [None if 0 == i % 7 else f"name_{i}" for i in range(300)]
+        statuses = [None if 3 == i % 11 else ("ok", "warning", "error")[i % 3] for i in range(300)]
+        with tempfile.TemporaryDirectory() as temporary_directory_name:
+            file_path = os.path.join(temporary_directory_name, "strings.parquet")
+            pq.write_table(
+                pa.table(
+                    {
+                        "string_data": pa.array(names),
+                        "large_string_data": pa.array(names, pa.large_string()),
+                        "string_view_data": pa.array(names, pa.string_view()),
+                        "binary_data": pa.array([None if n is None else n.encode() for n in names], pa.binary()),
+                        "status": pa.array(statuses),
+                        "status_dictionary": pa.array(statuses).dictionary_encode(),
+                    }
+                ),
+                file_path,
+                row_group_size=100,
+            )
+
+            file = ExternalDataFile(file_path)
+            try:
+                self.assertSequenceEqual(file.fragments[0].dictionary_columns(), ["status"])
+                structure = exd_api.StructureResult()
+                file.fill_structure(structure)
+                self.assertSequenceEqual(
+                    [channel.data_type for channel in structure.groups[0].channels],
+                    [ods.DataTypeEnum.DT_STRING] * 3
+                    + [ods.DataTypeEnum.DT_BYTESTR]
+                    + [ods.DataTypeEnum.DT_STRING] * 2,
+                )
+
+                values = file.get_values(
+                    exd_api.ValuesRequest(group_id=0, channel_ids=[0, 1, 2, 3, 4, 5], start=50, limit=200)
+                )
+                expected = ["" if n is None else n for n in names[50:250]]
+                for channel in values.channels[:3]:
+                    self.assertSequenceEqual(channel.values.string_array.values, expected)
+                self.assertSequenceEqual(
+                    values.channels[3].values.bytestr_array.values, [n.encode() for n in expected]
+                )
+                expected = ["" if n is None else n for n in statuses[50:250]]
+                self.assertSequenceEqual(values.channels[4].values.string_array.values, expected)
+                self.assertSequenceEqual(values.channels[5].values.string_array.values, expected)
+                self.assertTrue(pa.types.is_dictionary(file.column_cache.get((4, 1)).type))
+            finally:
+                file.close()
+
+    def test_extended_datatypes(self):
+        with tempfile.TemporaryDirectory() as temporary_directory_name:
+            file_path = os.path.join(temporary_directory_name, "extended_datatypes.parquet")
+            pq.write_table(
+                pa.table(
+                    {
+                        "bool_data": pa.array([True, None, False, True]),
+                        "date32_data": pa.array(
+                            [datetime(2024, 2, 29).date(), None, None, datetime(1999, 1, 1).date()]
+                        ),
+                        "date64_data": pa.array([0, 86400000, None, 1], pa.date64()),
+                        "timestamp_tz_data": pa.array(
+                            [0, 3600 * 10**6, None, 1], pa.timestamp("us", tz="Europe/Berlin")
+                        ),
+                        "decimal_data": pa.array(
+                            [Decimal("1.25"), Decimal("-3.50"), None, Decimal("0.01")], pa.decimal128(5, 2)
+                        ),
+                        "dictionary_data": pa.array([7, 8, None, 7], pa.int16()).dictionary_encode(),
+                        "vector_data": pa.array(
+                            [[1.0, 2.0, 3.0], None, [4.0, None, 6.0], [7.0, 8.0, 9.0]], pa.list_(pa.float32(), 3)
+                        ),
+                        "seconds_data": pa.array([1, 2, 3, 4], pa.timestamp("s")),
+                    }
+                ),
+                file_path,
+                row_group_size=2,
+            )
+
+            file = ExternalDataFile(file_path, "channel_statistics=scan")
+            try:
+                structure = exd_api.StructureResult()
+                file.fill_structure(structure)
+                channels = structure.groups[0].channels
+                self.assertEqual(structure.groups[0].total_number_of_channels, 10)
+                self.assertSequenceEqual(
+                    [channel.name for channel in channels],
+                    [
+                        "bool_data",
+                        "date32_data",
+                        "date64_data",
+                        "timestamp_tz_data",
+                        "decimal_data",
+                        "dictionary_data",
+                        "vector_data[0]",
+                        "vector_data[1]",
+                        "vector_data[2]",
+                        "seconds_data",
+                    ],
+                )
+                self.assertSequenceEqual(
+                    [channel.data_type for channel in channels],
+                    [ods.DataTypeEnum.DT_BOOLEAN]
+                    + [ods.DataTypeEnum.DT_DATE] * 3
+                    + [ods.DataTypeEnum.DT_DOUBLE, ods.DataTypeEnum.DT_SHORT]
+                    + [ods.DataTypeEnum.DT_FLOAT] * 3
+                    + [ods.DataTypeEnum.DT_DATE],
+                )
+                self.assertSequenceEqual(channels[4].attributes.variables["minimum"].double_array.values, [-3.5])
+                self.assertSequenceEqual(channels[7].attributes.variables["maximum"].float_array.values, [8.0])
+                self.assertSequenceEqual(channels[7].attributes.variables["null_count"].longlong_array.values, [2])
+
+                values = file.get_values(
+                    exd_api.ValuesRequest(group_id=0, channel_ids=list(range(10)), start=0, limit=4)
+                )
+                self.assertSequenceEqual(values.channels[0].values.boolean_array.values, [True, False, False, True])
+                self.assertSequenceEqual(
+                    values.channels[1].values.string_array.values, ["20240229000000", "", "", "19990101000000"]
+                )
+                self.assertSequenceEqual(
+                    values.channels[2].values.string_array.values,
+                    ["19700101000000", "19700102000000", "", "19700101000000"],
+                )
+                self.assertSequenceEqual(
+                    values.channels[3].values.string_array.values,
+                    ["19700101000000", "19700101010000", "", "19700101000000000001"],
+                )
+                self.assertSequenceEqual(values.channels[4].values.double_array.values[:2], [1.25, -3.5])
+                self.assertSequenceEqual(values.channels[4].values.double_array.values[3:], [0.01])
+                self.assertSequenceEqual(values.channels[5].values.long_array.values[:2], [7, 8])
+                self.assertSequenceEqual(values.channels[6].values.float_array.values[2:], [4.0, 7.0])
+                self.assertSequenceEqual(values.channels[8].values.float_array.values[2:], [6.0, 9.0])
+                self.assertSequenceEqual(
+                    values.channels[9].values.string_array.values,
+                    ["19700101000001", "19700101000002", "19700101000003", "19700101000004"],
+                )
+            finally:
+                file.close()
+
+    def test_dictionary_decoded_once(self):
+        chunk = pa.array(["a", None, "b", "a", "a"]).dictionary_encode()
+        values = to_python_values(chunk, "")
+        self.assertSequenceEqual(list(values), ["a", "", "b", "a", "a"])
+        self.assertIs(values[0], values[3])
+
 
 if __name__ == "__main__":
     unittest.main()
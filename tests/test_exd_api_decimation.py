@@ -0,0 +1,202 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import exd_api
+
+from external_data_file import ExternalDataFile, FileOptions, memory_governor
+
+# pylint: disable=no-member
+
+
+class TestDecimation(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temporary_directory.name, "long.parquet")
+        num_rows = 200_000
+        rng = np.random.default_rng(7)
+        self.signal = rng.normal(size=num_rows)
+        self.counter = np.arange(num_rows, dtype=np.int32)
+        valid = np.ones(num_rows, bool)
+        valid[1000:1500] = False
+        self.valid = valid
+        table = pa.table(
+            {
+                "signal": pa.array(self.signal),
+                "counter": pa.array(self.counter, mask=~valid),
+                "name": pa.array([f"n{i}" for i in range(num_rows)]),
+                "vector": pa.FixedSizeListArray.from_arrays(
+                    pa.array(np.stack([self.counter, -self.counter], 1).ravel()), 2
+                ),
+            }
+        )
+        pq.write_table(table, self.file_path, row_group_size=30_000)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def get_values(
+        self, parameters: str, channel_ids: list[int], start: int, limit: int, group_id: int = 0
+    ) -> exd_api.ValuesResult:
+        file = ExternalDataFile(self.file_path, parameters)
+        try:
+            return file.get_values(
+                exd_api.ValuesRequest(group_id=group_id, channel_ids=channel_ids, start=start, limit=limit)
+            )
+        finally:
+            file.close()
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            FileOptions.parse("decimation=average")
+        with self.assertRaises(ValueError):
+            FileOptions.parse("decimation=mean;decimation_points=1")
+
+    def test_small_window_is_not_decimated(self):
+        values = self.get_values("decimation=minmax;decimation_points=100", [1], 10, 100)
+        self.assertSequenceEqual(values.channels[0].values.long_array.values, range(10, 110))
+
+    def test_stride(self):
+        values = self.get_values("decimation=stride;decimation_points=100", [0, 1, 2, 4], 2000, 1000)
+        self.assertSequenceEqual(values.channels[0].values.double_array.values, self.signal[2000:3000:10].tolist())
+        self.assertSequenceEqual(values.channels[1].values.long_array.values, range(2000, 3000, 10))
+        self.assertSequenceEqual(
+            values.channels[2].values.string_array.values, [f"n{i}" for i in range(2000, 3000, 10)]
+        )
+        self.assertSequenceEqual(values.channels[3].values.long_array.values, range(-2000, -3000, -10))
+
+    def test_mean_and_minmax_of_raw_window(self):
+        values = self.get_values("decimation=mean;decimation_points=50", [0, 1], 900, 1000)
+        self.assertTrue(
+            np.allclose(values.channels[0].values.double_array.values, self.signal[900:1900].reshape(50, 20).mean(1))
+        )
+        counter = np.ma.masked_array(self.counter, ~self.valid)[900:1900].reshape(50, 20)
+        expected_valid = ~counter.mask.all(1)
+        self.assertSequenceEqual(values.channels[1].flags.values, (expected_valid.astype(int) * 15).tolist())
+        self.assertSequenceEqual(
+            np.asarray(values.channels[1].values.long_array.values)[expected_valid].tolist(),
+            np.round(counter.mean(1)[expected_valid]).astype(int).tolist(),
+        )
+
+        values = self.get_values("decimation=minmax;decimation_points=100", [0, 2], 900, 1000)
+        signal = self.signal[900:1900].reshape(50, 20)
+        self.assertSequenceEqual(
+            values.channels[0].values.double_array.values,
+            np.column_stack([signal.min(1), signal.max(1)]).ravel().tolist(),
+        )
+        self.assertSequenceEqual(
+            values.channels[1].values.string_array.values, [f"n{i}" for i in range(900, 1900, 20) for _ in range(2)]
+        )
+
+    def test_minmax_from_pyramid(self):
+        file = ExternalDataFile(self.file_path, "decimation=minmax;decimation_points=40")
+        try:
+            with (
+                mock.patch.object(
+                    file.fragments[0], "iter_batches", wraps=file.fragments[0].iter_batches
+                ) as iter_batches,
+                mock.patch.object(
+                    file.fragments[0], "read_row_group", wraps=file.fragments[0].read_row_group
+                ) as read_row_group,
+            ):
+                values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=0, limit=200_000))
+                reads = iter_batches.call_count + read_row_group.call_count
+                self.assertGreater(reads, 0)
+                zoomed = file.get_values(
+                    exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=16384, limit=100_000)
+                )
+                self.assertEqual(iter_batches.call_count + read_row_group.call_count, reads)
+        finally:
+            file.close()
+
+        # buckets of 10000 rows are rounded up to five pyramid buckets of 2048 rows
+        starts = list(range(0, 200_000, 10240)) + [200_000]
+        expected = [
+            extremum(self.signal[first:last])
+            for first, last in zip(starts[:-1], starts[1:])
+            for extremum in (np.min, np.max)
+        ]
+        self.assertSequenceEqual(values.channels[0].values.double_array.values, expected)
+        self.assertEqual(len(values.channels[0].flags.values), 0)
+
+        # buckets of 5000 rows are rounded up to 20 pyramid buckets of 256 rows, the edges are clipped to the window
+        starts = [16384] + list(range(20480, 116_384, 5120)) + [116_384]
+        expected = [
+            extremum(self.signal[first:last])
+            for first, last in zip(starts[:-1], starts[1:])
+            for extremum in (np.min, np.max)
+        ]
+        self.assertSequenceEqual(zoomed.channels[0].values.double_array.values, expected)
+
+    def test_pyramids_are_bounded_and_released(self):
+        # the pyramid of a channel of 200000 rows takes about 36 kB, only one fits
+        file = ExternalDataFile(self.file_path, "decimation=mean;decimation_points=40;pyramid_cache_size=50000")
+        try:
+            file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0, 1], start=0, limit=200_000))
+            self.assertGreater(file.pyramid_size, 0)
+            self.assertLessEqual(file.pyramid_size, 50_000)
+            self.assertGreaterEqual(memory_governor.size, file.pyramid_size)
+            pyramid_size = file.pyramid_size
+            self.assertGreaterEqual(file.release_memory(), pyramid_size)
+            self.assertEqual(file.pyramid_size, 0)
+        finally:
+            file.close()
+
+    def test_small_window_does_not_build_pyramid(self):
+        file = ExternalDataFile(self.file_path, "decimation=mean;decimation_points=10")
+        try:
+            with mock.patch.object(
+                file.fragments[0], "read_row_group", wraps=file.fragments[0].read_row_group
+            ) as read_row_group:
+                values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=0, limit=20_000))
+                self.assertEqual(read_row_group.call_count, 1)
+            self.assertEqual(file.pyramid_size, 0)
+        finally:
+            file.close()
+        self.assertEqual(len(values.channels[0].values.double_array.values), 10)
+
+    def test_pyramid_buckets_are_clipped_to_window(self):
+        for mode in ("stride", "mean", "minmax"):
+            with self.subTest(mode):
+                values = self.get_values(f"decimation={mode};decimation_points=100", [1], 12345, 150_003)
+                counter = np.asarray(values.channels[0].values.long_array.values)
+                self.assertLessEqual(len(counter), 100)
+                if "minmax" == mode:
+                    self.assertEqual(counter.min(), 12345)
+                    self.assertEqual(counter.max(), 162_347)
+                else:
+                    self.assertGreaterEqual(counter.min(), 12345)
+                    self.assertLess(counter.max(), 162_347)
+                    self.assertEqual(counter[0] == 12345, "stride" == mode)
+
+    def test_buckets_stay_inside_group(self):
+        for mode in ("mean", "minmax"):
+            with self.subTest(mode):
+                values = self.get_values(
+                    f"group_by=row_group;decimation={mode};decimation_points=20", [1], 0, 30_000, group_id=1
+                )
+                counter = np.asarray(values.channels[0].values.long_array.values)
+                self.assertLessEqual(len(counter), 20)
+                self.assertGreaterEqual(counter.min(), 30_000)
+                self.assertLessEqual(counter.max(), 59_999)
+                if "minmax" == mode:
+                    self.assertEqual(counter.min(), 30_000)
+                    self.assertEqual(counter.max(), 59_999)
+
+    def test_number_of_values_is_capped(self):
+        for limit in (1_000, 99_999, 123_457, 199_999):
+            for mode in ("stride", "mean", "minmax"):
+                with self.subTest(limit=limit, mode=mode):
+                    values = self.get_values(f"decimation={mode};decimation_points=100", [0], 1, limit)
+                    self.assertLessEqual(len(values.channels[0].values.double_array.values), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import logging
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import exd_api, ods
+
+from external_data_file import ExternalDataFile, encode_varints, extend_packed
+
+# pylint: disable=no-member
+
+EDGE_VALUES = {
+    "long_array": np.array([0, 1, 127, 128, 16383, 16384, -1, -128, 2**31 - 1, -(2**31)], np.int32),
+    "longlong_array": np.array([0, 1, 127, 128, 2**35, -1, -(2**40), 2**63 - 1, -(2**63)], np.int64),
+    "float_array": np.array([0.0, -0.0, 1.5, -3.25, np.inf, -np.inf, np.nan, 1e-45], np.float32),
+    "double_array": np.array([0.0, -0.0, 1.5, -3.25, np.inf, -np.inf, np.nan, 5e-324, 1e308], np.float64),
+    "boolean_array": np.array([True, False, False, True], bool),
+}
+
+
+class TestPackedEncoding(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def assert_same_as_extend(self, field_name: str, slices: list[np.ndarray]) -> None:
+        expected = ods.DataMatrix.Column.UnknownArray(data_type=ods.DataTypeEnum.DT_DOUBLE)
+        actual = ods.DataMatrix.Column.UnknownArray(data_type=ods.DataTypeEnum.DT_DOUBLE)
+        for values in slices:
+            getattr(expected, field_name).values.extend(values)
+            extend_packed(getattr(actual, field_name), values.view(np.uint8) if values.dtype == bool else values)
+        self.assertEqual(expected.SerializeToString(), actual.SerializeToString())
+        parsed = ods.DataMatrix.Column.UnknownArray.FromString(actual.SerializeToString())
+        np.testing.assert_array_equal(
+            np.asarray(getattr(parsed, field_name).values, np.concatenate(slices).dtype), np.concatenate(slices)
+        )
+
+    def test_edge_values(self):
+        for field_name, values in EDGE_VALUES.items():
+            with self.subTest(field_name):
+                self.assert_same_as_extend(field_name, [values])
+
+    def test_random_slices_are_appended(self):
+        rng = np.random.default_rng(3)
+        for field_name, values in EDGE_VALUES.items():
+            if values.dtype == bool:
+                generated = rng.integers(0, 2, 3000).astype(bool)
+            elif np.issubdtype(values.dtype, np.floating):
+                generated = rng.normal(scale=1e6, size=3000).astype(values.dtype)
+            else:
+                info = np.iinfo(values.dtype)
+                generated = rng.integers(info.min, info.max, 3000, dtype=values.dtype, endpoint=True)
+            with self.subTest(field_name):
+                self.assert_same_as_extend(field_name, [generated[:1000], generated[1000:1000], generated[1000:]])
+
+    def test_encode_varints(self):
+        self.assertEqual(encode_varints(np.array([], np.int64)), b"")
+        self.assertEqual(encode_varints(np.array([0, 1, 127], np.int32)), b"\x00\x01\x7f")
+        self.assertEqual(encode_varints(np.array([300, 1], np.int64)), b"\xac\x02\x01")
+        self.assertEqual(encode_varints(np.array([-1], np.int32)), b"\xff" * 9 + b"\x01")
+
+    def test_values_result_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "types.parquet")
+            num_rows = 5000
+            valid = np.arange(num_rows) % 5 != 0
+            table = pa.table(
+                {
+                    "i32": pa.array(np.arange(num_rows, dtype=np.int32) - 2500, mask=~valid),
+                    "i64": pa.array(np.arange(num_rows, dtype=np.int64) * 2**40),
+                    "f32": pa.array(np.linspace(-1, 1, num_rows, dtype=np.float32)),
+                    "f64": pa.array(np.linspace(-1e9, 1e9, num_rows), mask=~valid),
+                    "b": pa.array(valid),
+                }
+            )
+            pq.write_table(table, file_path, row_group_size=1000)
+            file = ExternalDataFile(file_path)
+            try:
+                values = file.get_values(
+                    exd_api.ValuesRequest(group_id=0, channel_ids=[0, 1, 2, 3, 4], start=100, limit=4000)
+                )
+            finally:
+                file.close()
+
+        self.assertEqual(exd_api.ValuesResult.FromString(values.SerializeToString()), values)
+        expected = exd_api.ValuesResult(id=0)
+        for channel_id, (name, field_name) in enumerate(
+            [
+                ("i32", "long_array"),
+                ("i64", "longlong_array"),
+                ("f32", "float_array"),
+                ("f64", "double_array"),
+                ("b", "boolean_array"),
+            ]
+        ):
+            channel = expected.channels.add(id=channel_id)
+            channel.values.data_type = values.channels[channel_id].values.data_type
+            column = table.column(name).slice(100, 4000)
+            # nulls are returned as NaN, 0 or False
+            null_value = {"f64": np.nan, "b": False}.get(name, 0)
+            getattr(channel.values, field_name).values.extend(column.fill_null(null_value).to_numpy())
+            if column.null_count:
+                channel.flags.values.extend(column.is_valid().to_numpy(zero_copy_only=False).astype(np.int32) * 15)
+        self.assertEqual(values.SerializeToString(), expected.SerializeToString())
+
+    def test_empty_window_selects_array(self):
+        columns = {
+            "long_array": pa.array([1], pa.int32()),
+            "longlong_array": pa.array([1], pa.int64()),
+            "float_array": pa.array([1], pa.float32()),
+            "double_array": pa.array([1], pa.float64()),
+            "boolean_array": pa.array([True]),
+            "byte_array": pa.array([1], pa.uint8()),
+            "string_array": pa.array(["a"]),
+            "bytestr_array": pa.array([b"a"]),
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "empty.parquet")
+            pq.write_table(pa.table(columns), file_path)
+            file = ExternalDataFile(file_path)
+            try:
+                values = file.get_values(
+                    exd_api.ValuesRequest(group_id=0, channel_ids=list(range(len(columns))), start=0, limit=0)
+                )
+            finally:
+                file.close()
+
+        values = exd_api.ValuesResult.FromString(values.SerializeToString())
+        for channel, field_name in zip(values.channels, columns):
+            with self.subTest(field_name):
+                self.assertEqual(channel.values.WhichOneof("UnknownOneOf"), field_name)
+                self.assertEqual(len(getattr(channel.values, field_name).values), 0)
+                self.assertEqual(len(channel.flags.values), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,246 @@
+import json
+import logging
+import os
+import pathlib
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from ods_exd_api_box import ExternalDataReader, FileHandlerRegistry, exd_api
+
+from external_data_file import ExternalDataFile, resolve_filesystem
+from tests.mock_servicer_context import MockServicerContext
+
+# pylint: disable=no-member
+
+
+class LatencyFile:
+    """File object counting reads and delaying each like a request to an object store."""
+
+    def __init__(self, handler: "LatencyFileSystemHandler", source: pa.NativeFile):
+        self.handler = handler
+        self.source = source
+
+    @property
+    def closed(self):
+        return self.source.closed
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def writable(self):
+        return False
+
+    def read(self, nbytes=-1):
+        self.handler.reads += 1
+        time.sleep(self.handler.latency)
+        return self.source.read(None if nbytes < 0 else nbytes)
+
+    def seek(self, offset, whence=0):
+        return self.source.seek(offset, whence)
+
+    def tell(self):
+        return self.source.tell()
+
+    def close(self):
+        self.source.close()
+
+
+class LatencyFileSystemHandler(pafs.FileSystemHandler):
+    """Local filesystem standing in for an object store."""
+
+    def __init__(self, latency: float = 0.001):
+        self.local = pafs.LocalFileSystem()
+        self.latency = latency
+        self.reads = 0
+
+    def __eq__(self, other):
+        return self is other
+
+    def __ne__(self, other):
+        return self is not other
+
+    def get_type_name(self):
+        return "latency"
+
+    def normalize_path(self, path):
+        return self.local.normalize_path(path)
+
+    def get_file_info(self, paths):
+        return self.local.get_file_info(paths)
+
+    def get_file_info_selector(self, selector):
+        return self.local.get_file_info(selector)
+
+    def create_dir(self, path, recursive):
+        self.local.create_dir(path, recursive=recursive)
+
+    def delete_dir(self, path):
+        self.local.delete_dir(path)
+
+    def delete_dir_contents(self, path, missing_dir_ok=False):
+        self.local.delete_dir_contents(path, missing_dir_ok=missing_dir_ok)
+
+    def delete_root_dir_contents(self):
+        raise NotImplementedError()
+
+    def delete_file(self, path):
+        self.local.delete_file(path)
+
+    def move(self, src, dest):
+        self.local.move(src, dest)
+
+    def copy_file(self, src, dest):
+        self.local.copy_file(src, dest)
+
+    def open_input_stream(self, path):
+        return self.local.open_input_stream(path)
+
+    def open_input_file(self, path):
+        return pa.PythonFile(LatencyFile(self, self.local.open_input_file(path)), mode="r")
+
+    def open_output_stream(self, path, metadata):
+        return self.local.open_output_stream(path, metadata=metadata)
+
+    def open_append_stream(self, path, metadata):
+        return self.local.open_append_stream(path, metadata=metadata)
+
+
+class TestFileSystem(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temporary_directory.name, "archived.parquet")
+        columns = {f"c{i}": pa.array(np.arange(1000, dtype=np.float64) * i) for i in range(20)}
+        pq.write_table(pa.table(columns), self.file_path, row_group_size=250)
+        self.handler = LatencyFileSystemHandler()
+        self.filesystem = pafs.PyFileSystem(self.handler)
+        self.request = exd_api.ValuesRequest(group_id=0, channel_ids=[10, 0, 5], start=300, limit=100)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_resolve_filesystem(self):
+        self.assertEqual(resolve_filesystem(self.file_path), (None, self.file_path))
+        filesystem, path = resolve_filesystem(pathlib.Path(self.file_path).as_uri())
+        self.assertIsNone(filesystem)
+        self.assertEqual(path, self.file_path)
+        self.assertEqual(resolve_filesystem(self.file_path, self.filesystem), (self.filesystem, self.file_path))
+
+    def test_footer_and_coalesced_column_chunks(self):
+        local = ExternalDataFile(self.file_path)
+        try:
+            expected = local.get_values(self.request)
+        finally:
+            local.close()
+
+        file = ExternalDataFile(self.file_path, filesystem=self.filesystem)
+        try:
+            self.assertEqual(self.handler.reads, 1)
+            structure = exd_api.StructureResult()
+            file.fill_structure(structure)
+            self.assertEqual(structure.groups[0].number_of_rows, 1000)
+            self.assertEqual(self.handler.reads, 1)
+
+            # the reader of the column data reuses the parsed footer, the column chunks take one request
+            self.assertEqual(file.get_values(self.request), expected)
+            self.assertEqual(self.handler.reads, 2)
+
+            # other handles and reopened fragments share the footer
+            other = ExternalDataFile(self.file_path, "hole_size_limit=0", filesystem=self.filesystem)
+            try:
+                file.release_memory()
+                self.handler.reads = 0
+                self.assertEqual(other.get_values(self.request), expected)
+                self.assertEqual(self.handler.reads, 3)
+            finally:
+                other.close()
+        finally:
+            file.close()
+
+    def test_streamed_column_chunks_are_coalesced(self):
+        request = exd_api.ValuesRequest(group_id=0, channel_ids=[4, 3, 2], start=100, limit=800)
+        local = ExternalDataFile(self.file_path)
+        try:
+            expected = local.get_values(request)
+        finally:
+            local.close()
+
+        file = ExternalDataFile(self.file_path, "column_cache_size=1000", filesystem=self.filesystem)
+        try:
+            self.handler.reads = 0
+            self.assertEqual(file.get_values(request), expected)
+            self.assertEqual(len(file.column_cache), 0)
+            # one request per row group of the window
+            self.assertEqual(self.handler.reads, 4)
+        finally:
+            file.close()
+
+    def test_partitioned_directory(self):
+        for run in range(2):
+            directory = os.path.join(self.temporary_directory.name, "dataset", f"run={run}")
+            os.makedirs(directory)
+            table = pa.table({"value": pa.array(np.arange(100, dtype=np.int64) + 100 * run)})
+            pq.write_table(table, os.path.join(directory, "part.parquet"))
+
+        file = ExternalDataFile(os.path.join(self.temporary_directory.name, "dataset"), filesystem=self.filesystem)
+        try:
+            self.assertEqual(file.num_rows, 200)
+            values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0, 1], start=50, limit=100))
+            self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(50, 150))
+            self.assertSequenceEqual(values.channels[1].values.long_array.values, [0] * 50 + [1] * 50)
+        finally:
+            file.close()
+
+    def test_manifest_references_filesystem_through_server(self):
+        manifest_path = os.path.join(self.temporary_directory.name, "remote.parquet.json")
+        with open(manifest_path, "w", encoding="utf-8") as manifest_file:
+            json.dump(
+                {"filesystem": f"latency://{self.temporary_directory.name}", "files": ["archived.parquet"]},
+                manifest_file,
+            )
+
+        def resolve(file_path, filesystem=None):
+            if file_path.startswith("latency://"):
+                return self.filesystem, file_path.removeprefix("latency://")
+            return resolve_filesystem(file_path, filesystem)
+
+        local = ExternalDataFile(self.file_path)
+        try:
+            expected = local.get_values(self.request)
+        finally:
+            local.close()
+
+        FileHandlerRegistry.register(file_type_name="test", factory=ExternalDataFile)
+        context = MockServicerContext()
+        service = ExternalDataReader()
+        with mock.patch("external_data_file.resolve_filesystem", side_effect=resolve):
+            handle = service.Open(exd_api.Identifier(url=pathlib.Path(manifest_path).as_uri()), context)
+            try:
+                values = service.GetValues(
+                    exd_api.ValuesRequest(
+                        handle=handle,
+                        group_id=self.request.group_id,
+                        channel_ids=self.request.channel_ids,
+                        start=self.request.start,
+                        limit=self.request.limit,
+                    ),
+                    context,
+                )
+            finally:
+                service.Close(handle, context)
+        self.assertEqual(values.channels, expected.channels)
+        self.assertGreater(self.handler.reads, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import ExternalDataReader, FileHandlerRegistry, exd_api
+
+from external_data_file import ExternalDataFile
+from tests.mock_servicer_context import MockServicerContext
+
+# pylint: disable=no-member
+
+
+class TestGroups(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        """Register ExternalDataFile handler before each test."""
+        FileHandlerRegistry.register(file_type_name="test", factory=ExternalDataFile)
+        self.context = MockServicerContext()
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temporary_directory.name, "runs.parquet")
+        table = pa.table({"index": pa.array(np.arange(250, dtype=np.int64)), "value": pa.array(np.ones(250))})
+        table = table.replace_schema_metadata(
+            {"groups": json.dumps([{"name": "run 1", "num_rows": 60}, {"name": "run 2", "num_rows": 190}])}
+        )
+        pq.write_table(table, self.file_path, row_group_size=100)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_single_group_by_default(self):
+        file = ExternalDataFile(self.file_path)
+        try:
+            structure = exd_api.StructureResult()
+            file.fill_structure(structure)
+            self.assertEqual(len(structure.groups), 1)
+            self.assertEqual(structure.groups[0].name, "data")
+            with self.assertRaises(NotImplementedError):
+                file.get_values(exd_api.ValuesRequest(group_id=1, channel_ids=[0], start=0, limit=10))
+        finally:
+            file.close()
+
+    def test_group_by_row_group(self):
+        service = ExternalDataReader()
+        handle = service.Open(
+            exd_api.Identifier(url=pathlib.Path(self.file_path).resolve().as_uri(), parameters="group_by=row_group"),
+            self.context,
+        )
+        try:
+            structure = service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+            self.assertEqual([group.name for group in structure.groups], ["row_group_0", "row_group_1", "row_group_2"])
+            self.assertEqual([group.id for group in structure.groups], [0, 1, 2])
+            self.assertEqual([group.number_of_rows for group in structure.groups], [100, 100, 50])
+            self.assertEqual(len(structure.groups[2].channels), 2)
+
+            values = service.GetValues(
+                exd_api.ValuesRequest(handle=handle, group_id=2, channel_ids=[0], start=10, limit=100), self.context
+            )
+            self.assertEqual(values.id, 2)
+            self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(210, 250))
+        finally:
+            service.Close(handle, self.context)
+
+    def test_group_reads_its_row_groups_only(self):
+        file = ExternalDataFile(self.file_path, "group_by=row_group")
+        try:
+            with mock.patch.object(
+                file.fragments[0].open(file.options),
+                "read_row_group",
+                wraps=file.fragments[0].open(file.options).read_row_group,
+            ) as read_row_group:
+                file.get_values(exd_api.ValuesRequest(group_id=1, channel_ids=[0, 1], start=0, limit=100))
+                self.assertSequenceEqual([call.args[0] for call in read_row_group.call_args_list], [1])
+        finally:
+            file.close()
+
+    def test_group_by_metadata(self):
+        file = ExternalDataFile(self.file_path, "group_by=metadata")
+        try:
+            structure = exd_api.StructureResult()
+            file.fill_structure(structure)
+            self.assertEqual([group.name for group in structure.groups], ["run 1", "run 2"])
+            self.assertEqual([group.number_of_rows for group in structure.groups], [60, 190])
+
+            values = file.get_values(exd_api.ValuesRequest(group_id=1, channel_ids=[0], start=30, limit=20))
+            self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(90, 110))
+            with self.assertRaises(NotImplementedError):
+                file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=60, limit=1))
+        finally:
+            file.close()
+
+    def test_group_by_missing_metadata(self):
+        with self.assertRaises(ValueError):
+            ExternalDataFile(self.file_path, "group_by=metadata;group_metadata_key=segments")
+        with self.assertRaises(ValueError):
+            ExternalDataFile(self.file_path, "group_by=column")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import exd_api
+
+from external_data_file import ExternalDataFile, FooterIndex, FooterStatistics, shared_file_cache
+
+# pylint: disable=no-member
+
+
+class TestFooterIndexCache(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.index_directory = os.path.join(self.temporary_directory.name, "index")
+        self.file_path = os.path.join(self.temporary_directory.name, "wide.parquet")
+        self.write_file(300)
+        self.index_directory_patch = mock.patch.object(shared_file_cache, "index_directory", self.index_directory)
+        self.index_directory_patch.start()
+
+    def tearDown(self):
+        self.index_directory_patch.stop()
+        self.temporary_directory.cleanup()
+
+    def write_file(self, num_rows: int) -> None:
+        columns = {"index": pa.array(np.arange(num_rows, dtype=np.int64))}
+        for i in range(20):
+            columns[f"f{i}"] = pa.array(np.arange(num_rows, dtype=np.float64) * i)
+        columns["name"] = pa.array([f"n{i % 3}" if i % 50 else None for i in range(num_rows)])
+        columns["vector"] = pa.array([[i, -i] for i in range(num_rows)], pa.list_(pa.int32(), 2))
+        pq.write_table(pa.table(columns), self.file_path, row_group_size=100)
+
+    def open_and_read(self) -> tuple[exd_api.StructureResult, exd_api.ValuesResult]:
+        file = ExternalDataFile(self.file_path)
+        try:
+            structure = exd_api.StructureResult()
+            file.fill_structure(structure)
+            values = file.get_values(
+                exd_api.ValuesRequest(group_id=0, channel_ids=[0, 5, 21, 23], start=90, limit=120)
+            )
+            return structure, values
+        finally:
+            file.close()
+
+    def test_reopen_uses_persisted_index(self):
+        cold_structure, cold_values = self.open_and_read()
+        index_files = os.listdir(self.index_directory)
+        self.assertEqual(len(index_files), 1)
+        self.assertEqual(len(shared_file_cache), 0)
+
+        with mock.patch("external_data_file.pq.read_metadata") as read_metadata:
+            warm_structure, warm_values = self.open_and_read()
+            read_metadata.assert_not_called()
+        self.assertEqual(cold_structure, warm_structure)
+        self.assertEqual(cold_values, warm_values)
+        self.assertSequenceEqual(warm_values.channels[0].values.longlong_array.values, range(90, 210))
+        self.assertSequenceEqual(warm_values.channels[3].values.long_array.values, range(-90, -210, -1))
+
+    def test_index_matches_footer(self):
+        self.open_and_read()
+        key = shared_file_cache.file_key(self.file_path)
+        loaded = FooterIndex.load(shared_file_cache.index_path(key), key)
+        built = FooterIndex.from_metadata(pq.read_metadata(self.file_path))
+        self.assertIsNotNone(loaded)
+        self.assertTrue(loaded.schema.equals(built.schema, check_metadata=True))
+        np.testing.assert_array_equal(loaded.row_group_num_rows, built.row_group_num_rows)
+        np.testing.assert_array_equal(loaded.column_chunk_sizes, built.column_chunk_sizes)
+        self.assertEqual(loaded.dictionary_columns, built.dictionary_columns)
+        self.assertIsNone(built.statistics)
+        built.statistics = FooterStatistics.from_metadata(pq.read_metadata(self.file_path), built.schema)
+        np.testing.assert_array_equal(loaded.statistics.null_counts, built.statistics.null_counts)
+        for loaded_extrema, built_extrema in [
+            (loaded.statistics.minima, built.statistics.minima),
+            (loaded.statistics.maxima, built.statistics.maxima),
+        ]:
+            self.assertEqual(len(loaded_extrema), 23)
+            for loaded_values, built_values in zip(loaded_extrema, built_extrema):
+                self.assertTrue(
+                    loaded_values.equals(built_values) if built_values is not None else loaded_values is None
+                )
+        self.assertIsNotNone(loaded.statistics.minima[21])
+        self.assertIsNone(loaded.statistics.minima[22])
+        self.assertTrue((loaded.statistics.null_counts[:, 22] < 0).all())
+
+    def test_statistics_are_extracted_for_structure_only(self):
+        with mock.patch(
+            "external_data_file.FooterStatistics.from_metadata", wraps=FooterStatistics.from_metadata
+        ) as from_metadata:
+            file = ExternalDataFile(self.file_path)
+            try:
+                file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=0, limit=10))
+                from_metadata.assert_not_called()
+                key = shared_file_cache.file_key(self.file_path)
+                self.assertIsNone(FooterIndex.load(shared_file_cache.index_path(key), key).statistics)
+                file.fill_structure(exd_api.StructureResult())
+                file.fill_structure(exd_api.StructureResult())
+                from_metadata.assert_called_once()
+            finally:
+                file.close()
+        self.assertEqual(len(os.listdir(self.index_directory)), 1)
+
+    def test_index_is_persisted_without_statistics(self):
+        file = ExternalDataFile(self.file_path, "channel_statistics=none")
+        try:
+            structure = exd_api.StructureResult()
+            file.fill_structure(structure)
+            self.assertNotIn("minimum", structure.groups[0].channels[1].attributes.variables)
+        finally:
+            file.close()
+        self.assertEqual(len(os.listdir(self.index_directory)), 1)
+
+        with mock.patch("external_data_file.pq.read_metadata", wraps=pq.read_metadata) as read_metadata:
+            file = ExternalDataFile(self.file_path, "channel_statistics=none")
+            file.close()
+            read_metadata.assert_not_called()
+            # statistics missing in the index are extracted from the footer once and persisted
+            structure, _ = self.open_and_read()
+            read_metadata.assert_called_once()
+            self.open_and_read()
+            read_metadata.assert_called_once()
+        self.assertEqual(structure.groups[0].channels[2].attributes.variables["maximum"].double_array.values[0], 299)
+
+    def test_wide_file_reopens_from_index(self):
+        columns = {f"c{i}": pa.array(np.arange(300, dtype=np.float64) + i) for i in range(2000)}
+        pq.write_table(pa.table(columns), self.file_path, row_group_size=100)
+        cold_structure, _ = self.open_and_read()
+        with (
+            mock.patch("external_data_file.pq.read_metadata") as read_metadata,
+            mock.patch("external_data_file.FooterStatistics.from_metadata") as from_metadata,
+        ):
+            warm_structure, _ = self.open_and_read()
+            read_metadata.assert_not_called()
+            from_metadata.assert_not_called()
+        self.assertEqual(cold_structure, warm_structure)
+        channel = warm_structure.groups[0].channels[1999]
+        self.assertEqual(channel.attributes.variables["minimum"].double_array.values[0], 1999)
+        self.assertEqual(channel.attributes.variables["maximum"].double_array.values[0], 2298)
+
+    def test_modified_file_rebuilds_index(self):
+        self.open_and_read()
+        self.write_file(500)
+        os.utime(self.file_path, ns=(0, 0))
+        with mock.patch("external_data_file.pq.read_metadata", wraps=pq.read_metadata) as read_metadata:
+            structure, _ = self.open_and_read()
+            read_metadata.assert_called_once()
+        self.assertEqual(structure.groups[0].number_of_rows, 500)
+
+        with mock.patch("external_data_file.pq.read_metadata") as read_metadata:
+            structure, _ = self.open_and_read()
+            read_metadata.assert_not_called()
+        self.assertEqual(structure.groups[0].number_of_rows, 500)
+
+    def test_corrupt_index_is_ignored(self):
+        self.open_and_read()
+        key = shared_file_cache.file_key(self.file_path)
+        with open(shared_file_cache.index_path(key), "wb") as index_file:
+            index_file.write(b"not an arrow file")
+        structure, values = self.open_and_read()
+        self.assertEqual(structure.groups[0].number_of_rows, 300)
+        self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(90, 210))
+        self.assertIsNotNone(FooterIndex.load(shared_file_cache.index_path(key), key))
+
+
+if __name__ == "__main__":
+    unittest.main()
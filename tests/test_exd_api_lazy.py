@@ -0,0 +1,134 @@
+import logging
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import ExternalDataReader, FileHandlerRegistry, exd_api, ods
+
+from external_data_file import ExternalDataFile
+from tests.mock_servicer_context import MockServicerContext
+
+# pylint: disable=no-member
+
+
+class TestLazyLoading(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        """Register ExternalDataFile handler before each test."""
+        FileHandlerRegistry.register(file_type_name="test", factory=ExternalDataFile)
+        self.context = MockServicerContext()
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temporary_directory.name, "row_groups.parquet")
+        table = pa.table(
+            {
+                "index": pa.array(np.arange(1000, dtype=np.int64)),
+                "value": pa.array(np.arange(1000, dtype=np.float64) / 2),
+                "name": pa.array([f"n{i}" for i in range(1000)]),
+            }
+        )
+        pq.write_table(table, self.file_path, row_group_size=100)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_open_reads_footer_only(self):
+        file = ExternalDataFile(self.file_path)
+        try:
+            self.assertEqual(file.num_rows, 1000)
+            self.assertFalse(hasattr(file, "table"))
+
+            structure = exd_api.StructureResult()
+            file.fill_structure(structure)
+            self.assertEqual(structure.groups[0].number_of_rows, 1000)
+            self.assertEqual(structure.groups[0].total_number_of_channels, 3)
+            self.assertEqual(structure.groups[0].channels[0].data_type, ods.DataTypeEnum.DT_LONGLONG)
+            self.assertEqual(structure.groups[0].channels[1].data_type, ods.DataTypeEnum.DT_DOUBLE)
+            self.assertEqual(structure.groups[0].channels[2].data_type, ods.DataTypeEnum.DT_STRING)
+        finally:
+            file.close()
+
+    def test_get_values_subset(self):
+        service = ExternalDataReader()
+        handle = service.Open(
+            exd_api.Identifier(url=pathlib.Path(self.file_path).resolve().as_uri(), parameters=""), self.context
+        )
+        try:
+            values = service.GetValues(
+                exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[2, 0, 2], start=95, limit=10),
+                self.context,
+            )
+            self.assertEqual(len(values.channels), 3)
+            self.assertEqual(values.channels[0].id, 2)
+            self.assertSequenceEqual(values.channels[0].values.string_array.values, [f"n{i}" for i in range(95, 105)])
+            self.assertSequenceEqual(values.channels[1].values.longlong_array.values, list(range(95, 105)))
+            self.assertSequenceEqual(values.channels[2].values.string_array.values, [f"n{i}" for i in range(95, 105)])
+        finally:
+            service.Close(handle, self.context)
+
+    def test_get_values_reads_covering_row_groups_only(self):
+        file = ExternalDataFile(self.file_path)
+        try:
+            self.assertSequenceEqual(list(file.row_group_offsets), list(range(0, 1001, 100)))
+            with mock.patch.object(
+                file.fragments[0].open(file.options),
+                "read_row_group",
+                wraps=file.fragments[0].open(file.options).read_row_group,
+            ) as read_row_group:
+                values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[1], start=250, limit=200))
+                self.assertSequenceEqual([call.args[0] for call in read_row_group.call_args_list], [2, 3, 4])
+                self.assertEqual(read_row_group.call_args.kwargs["columns"], ["value"])
+            self.assertSequenceEqual(values.channels[0].values.double_array.values, [i / 2 for i in range(250, 450)])
+
+            values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=990, limit=100))
+            self.assertSequenceEqual(values.channels[0].values.longlong_array.values, list(range(990, 1000)))
+
+            values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=10, limit=0))
+            self.assertEqual(len(values.channels[0].values.longlong_array.values), 0)
+        finally:
+            file.close()
+
+    def test_column_cache(self):
+        file = ExternalDataFile(self.file_path)
+        try:
+            request = exd_api.ValuesRequest(group_id=0, channel_ids=[0, 1], start=150, limit=100)
+            first = file.get_values(request)
+            self.assertEqual(file.column_cache.misses, 4)
+            self.assertEqual(file.column_cache.hits, 0)
+            self.assertEqual(len(file.column_cache), 4)
+
+            with mock.patch.object(file.fragments[0].open(file.options), "read_row_group") as read_row_group:
+                second = file.get_values(request)
+                read_row_group.assert_not_called()
+            self.assertEqual(file.column_cache.hits, 4)
+            self.assertEqual(first, second)
+
+            file.close()
+            self.assertEqual(len(file.column_cache), 0)
+            self.assertEqual(file.column_cache.size, 0)
+        finally:
+            file.close()
+
+    def test_column_cache_eviction(self):
+        file = ExternalDataFile(self.file_path, "column_cache_size=2000")
+        try:
+            for start in range(0, 500, 100):
+                values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=start, limit=100))
+                self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(start, start + 100))
+            self.assertEqual(len(file.column_cache), 2)
+            self.assertEqual(file.column_cache.evictions, 3)
+            self.assertLessEqual(file.column_cache.size, file.column_cache.max_bytes)
+
+            file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=400, limit=10))
+            self.assertEqual(file.column_cache.hits, 1)
+        finally:
+            file.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
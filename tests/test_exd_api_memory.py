@@ -0,0 +1,99 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import exd_api
+
+from external_data_file import ExternalDataFile, memory_governor, shared_file_cache
+
+# pylint: disable=no-member
+
+
+class TestMemoryGovernor(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.file_paths = []
+        for i in range(3):
+            file_path = os.path.join(self.temporary_directory.name, f"session_{i}.parquet")
+            table = pa.table({"index": pa.array(np.arange(1000, dtype=np.int64) + i * 1000)})
+            pq.write_table(table, file_path, row_group_size=250)
+            self.file_paths.append(file_path)
+        self.request = exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=0, limit=1000)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_idle_handles_are_released_and_reloaded(self):
+        files = [ExternalDataFile(file_path) for file_path in self.file_paths]
+        try:
+            files[0].get_values(self.request)
+            handle_size = files[0].column_cache.size
+            self.assertGreater(handle_size, 0)
+
+            with mock.patch.object(memory_governor, "watermark", 2 * handle_size):
+                evictions = memory_governor.evictions
+                files[1].get_values(self.request)
+                allocated = pa.total_allocated_bytes()
+                files[2].get_values(self.request)
+                self.assertEqual(memory_governor.evictions, evictions + 1)
+                self.assertEqual(files[0].column_cache.size, 0)
+                self.assertIsNone(files[0].fragments[0].parquet_file)
+                self.assertEqual(files[1].column_cache.size, handle_size)
+                self.assertEqual(files[2].column_cache.size, handle_size)
+                self.assertLessEqual(memory_governor.size, 2 * handle_size)
+                # the chunks of the released handle are dropped from the shared cache and freed
+                key = files[0].fragments[0].file_key
+                self.assertTrue(all((key, 0, index) not in shared_file_cache.columns for index in range(4)))
+                self.assertLessEqual(pa.total_allocated_bytes(), allocated)
+
+                with (
+                    mock.patch("external_data_file.pq.read_metadata") as read_metadata,
+                    mock.patch.object(
+                        pq.ParquetFile, "read_row_group", autospec=True, side_effect=pq.ParquetFile.read_row_group
+                    ) as read_row_group,
+                ):
+                    values = files[0].get_values(self.request)
+                    read_metadata.assert_not_called()
+                    self.assertEqual(read_row_group.call_count, 4)
+                self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(1000))
+                self.assertEqual(files[0].column_cache.size, handle_size)
+                self.assertEqual(files[1].column_cache.size, 0)
+        finally:
+            for file in files:
+                file.close()
+        self.assertEqual(memory_governor.size, 0)
+
+    def test_active_handle_is_kept(self):
+        file = ExternalDataFile(self.file_paths[0])
+        try:
+            with mock.patch.object(memory_governor, "watermark", 1):
+                values = file.get_values(self.request)
+                self.assertEqual(file.column_cache.size, 0)
+                with memory_governor.use(file):
+                    file.get_values(self.request)
+                    self.assertGreater(file.column_cache.size, 0)
+            self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(1000))
+        finally:
+            file.close()
+
+    def test_disabled_without_watermark(self):
+        files = [ExternalDataFile(file_path) for file_path in self.file_paths]
+        try:
+            for file in files:
+                file.get_values(self.request)
+            self.assertTrue(all(file.column_cache.size > 0 for file in files))
+        finally:
+            for file in files:
+                file.close()
+        self.assertEqual(len(memory_governor), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
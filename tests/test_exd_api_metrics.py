@@ -0,0 +1,109 @@
+import logging
+import os
+import pathlib
+import tempfile
+import unittest
+import urllib.request
+from unittest import mock
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import ExternalDataReader, FileHandlerRegistry, exd_api
+
+import external_data_file
+from external_data_file import ExternalDataFile, Histogram, Metrics, start_metrics_export
+from tests.mock_servicer_context import MockServicerContext
+
+# pylint: disable=no-member
+
+
+class TestMetrics(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        """Register ExternalDataFile handler before each test."""
+        FileHandlerRegistry.register(file_type_name="test", factory=ExternalDataFile)
+        self.context = MockServicerContext()
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temporary_directory.name, "metrics.parquet")
+        table = pa.table(
+            {
+                "index": pa.array(np.arange(1000, dtype=np.int64)),
+                "value": pa.array(np.arange(1000, dtype=np.float64) / 2),
+            }
+        )
+        pq.write_table(table, self.file_path, row_group_size=100)
+        self.metrics = Metrics()
+        patcher = mock.patch.object(external_data_file, "metrics", self.metrics)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_histogram(self):
+        histogram = Histogram((1.0, 10.0))
+        for value in (0.5, 1.0, 5.0, 50.0):
+            histogram.observe(value)
+        self.assertSequenceEqual(
+            histogram.render("h", 'a="b"'),
+            [
+                'h_bucket{a="b",le="1"} 2',
+                'h_bucket{a="b",le="10"} 3',
+                'h_bucket{a="b",le="+Inf"} 4',
+                'h_sum{a="b"} 56.5',
+                'h_count{a="b"} 4',
+            ],
+        )
+
+    def test_calls_are_recorded(self):
+        service = ExternalDataReader()
+        handle = service.Open(
+            exd_api.Identifier(url=pathlib.Path(self.file_path).resolve().as_uri(), parameters=""), self.context
+        )
+        try:
+            service.GetStructure(exd_api.StructureRequest(handle=handle), self.context)
+            for _ in range(2):
+                values = service.GetValues(
+                    exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[0, 1], start=150, limit=100),
+                    self.context,
+                )
+        finally:
+            service.Close(handle, self.context)
+
+        self.assertEqual(self.metrics.counters[("exd_parquet_calls_total", 'method="get_values"')], 2)
+        self.assertEqual(self.metrics.counters[("exd_parquet_rows_returned_total", "")], 200)
+        self.assertEqual(self.metrics.counters[("exd_parquet_bytes_returned_total", "")], 2 * values.ByteSize())
+        self.assertEqual(self.metrics.counters[("exd_parquet_row_groups_read_total", "")], 2)
+        self.assertEqual(self.metrics.counters[("exd_parquet_cache_misses_total", "")], 4)
+        self.assertEqual(self.metrics.counters[("exd_parquet_cache_hits_total", 'cache="handle"')], 4)
+        for phase in ("open", "structure", "get_values", "read", "convert", "encode"):
+            self.assertIn(phase, self.metrics.durations)
+        self.assertEqual(self.metrics.durations["read"].count, 2)
+
+        text = self.metrics.render()
+        self.assertIn('exd_parquet_phase_seconds_count{phase="get_values"} 2', text)
+        self.assertIn('exd_parquet_calls_total{method="open"} 1', text)
+        self.assertIn("exd_parquet_response_rows_count 2", text)
+
+    def test_errors_are_counted(self):
+        with self.assertRaises(Exception):
+            ExternalDataFile(os.path.join(self.temporary_directory.name, "missing.parquet"))
+        self.assertEqual(self.metrics.counters[("exd_parquet_errors_total", 'method="open"')], 1)
+
+    def test_http_export(self):
+        server = start_metrics_export(port=0)
+        try:
+            file = ExternalDataFile(self.file_path)
+            file.close()
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+                self.assertIn('exd_parquet_calls_total{method="open"} 1', response.read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import logging
+import os
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import FileHandlerRegistry, exd_api
+
+from external_data_file import FLAG_VALID, ExternalDataFile, to_numpy
+
+# pylint: disable=no-member
+
+
+class TestNulls(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        """Register ExternalDataFile handler before each test."""
+        FileHandlerRegistry.register(file_type_name="test", factory=ExternalDataFile)
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temporary_directory.name, "sparse.parquet")
+        # a CAN like signal that is only set in the third row group
+        self.sparse = [i if 200 <= i < 300 and 0 == i % 3 else None for i in range(400)]
+        table = pa.table(
+            {
+                "dense": pa.array(np.arange(400, dtype=np.int32)),
+                "sparse": pa.array(self.sparse, pa.int32()),
+                "sparse_double": pa.array(self.sparse, pa.float64()),
+                "label": pa.array([None if value is None else str(value) for value in self.sparse]),
+                "vector": pa.array([[i, None] for i in range(400)], pa.list_(pa.int64(), 2)),
+            }
+        )
+        pq.write_table(table, self.file_path, row_group_size=100)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_flags(self):
+        file = ExternalDataFile(self.file_path)
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                values = file.get_values(
+                    exd_api.ValuesRequest(group_id=0, channel_ids=[0, 1, 2, 3, 4, 5], start=50, limit=300)
+                )
+            expected_flags = [0 if value is None else FLAG_VALID for value in self.sparse[50:350]]
+
+            self.assertEqual(len(values.channels[0].flags.values), 0)
+            self.assertSequenceEqual(values.channels[1].flags.values, expected_flags)
+            self.assertSequenceEqual(
+                values.channels[1].values.long_array.values, [value or 0 for value in self.sparse[50:350]]
+            )
+            self.assertSequenceEqual(values.channels[2].flags.values, expected_flags)
+            self.assertTrue(np.isnan(values.channels[2].values.double_array.values[0]))
+            self.assertSequenceEqual(values.channels[3].flags.values, expected_flags)
+            self.assertEqual(len(values.channels[4].flags.values), 0)
+            self.assertSequenceEqual(values.channels[5].flags.values, [0] * 300)
+        finally:
+            file.close()
+
+    def test_flags_start_after_valid_rows(self):
+        file = ExternalDataFile(self.file_path)
+        try:
+            values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[1], start=201, limit=5))
+            self.assertSequenceEqual(values.channels[0].flags.values, [FLAG_VALID, 0, 0, FLAG_VALID, 0])
+
+            values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[1], start=0, limit=100))
+            self.assertSequenceEqual(values.channels[0].flags.values, [0] * 100)
+            self.assertSequenceEqual(values.channels[0].values.long_array.values, [0] * 100)
+        finally:
+            file.close()
+
+    def test_to_numpy_nulls(self):
+        values = pa.chunked_array([pa.array([1, None, 3]), pa.array([None, None], pa.int64())])
+        self.assertSequenceEqual(to_numpy(values, np.int32).tolist(), [1, 0, 3, 0, 0])
+        rv = to_numpy(values, np.float64)
+        self.assertSequenceEqual(np.isnan(rv).tolist(), [False, True, False, True, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
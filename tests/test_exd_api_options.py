@@ -0,0 +1,100 @@
+import logging
+import os
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import ExternalDataReader, FileHandlerRegistry, exd_api
+
+from external_data_file import DEFAULT_COLUMN_CACHE_SIZE, ExternalDataFile, FileOptions
+from tests.mock_servicer_context import MockServicerContext
+
+# pylint: disable=no-member
+
+
+class TestFileOptions(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        """Register ExternalDataFile handler before each test."""
+        FileHandlerRegistry.register(file_type_name="test", factory=ExternalDataFile)
+        self.context = MockServicerContext()
+
+    def test_parse(self):
+        self.assertEqual(FileOptions.parse(""), FileOptions())
+        self.assertEqual(FileOptions().column_cache_size, DEFAULT_COLUMN_CACHE_SIZE)
+
+        options = FileOptions.parse("memory_map=true;pre_buffer=1;buffer_size=65536;use_threads=off")
+        self.assertTrue(options.memory_map)
+        self.assertTrue(options.pre_buffer)
+        self.assertEqual(options.buffer_size, 65536)
+        self.assertFalse(options.use_threads)
+
+        options = FileOptions.parse('{"memory_map": true, "column_cache_size": 1024}')
+        self.assertTrue(options.memory_map)
+        self.assertEqual(options.column_cache_size, 1024)
+
+        with self.assertLogs("external_data_file", logging.WARNING):
+            self.assertEqual(FileOptions.parse("unknown=1"), FileOptions())
+
+    def test_parse_invalid(self):
+        with self.assertRaises(ValueError):
+            FileOptions.parse("memory_map=maybe")
+        with self.assertRaises(ValueError):
+            FileOptions.parse("buffer_size=large")
+        with self.assertRaises(ValueError):
+            FileOptions.parse("column_cache_size=-1")
+        with self.assertRaises(ValueError):
+            FileOptions.parse("max_response_size=-1")
+        with self.assertRaises(ValueError):
+            FileOptions.parse("response_size_policy=truncate")
+        with self.assertRaises(ValueError):
+            FileOptions.parse("channel_statistics=exact")
+
+    def test_read_modes_return_same_values(self):
+        with tempfile.TemporaryDirectory() as temporary_directory_name:
+            file_path = os.path.join(temporary_directory_name, "modes.parquet")
+            pq.write_table(
+                pa.table(
+                    {
+                        "int32_data": pa.array(np.arange(5000, dtype=np.int32)),
+                        "float64_data": pa.array(np.linspace(0.0, 1.0, 5000)),
+                        "string_data": pa.array([f"value {i % 17}" for i in range(5000)]),
+                    }
+                ),
+                file_path,
+                row_group_size=1000,
+            )
+            url = pathlib.Path(file_path).resolve().as_uri()
+
+            results = {}
+            for parameters in [
+                "",
+                "memory_map=true",
+                "pre_buffer=true",
+                "buffer_size=4096",
+                "use_threads=false",
+                "column_cache_size=0",
+                "memory_map=true;pre_buffer=true;buffer_size=8192;use_threads=false",
+            ]:
+                service = ExternalDataReader()
+                handle = service.Open(exd_api.Identifier(url=url, parameters=parameters), self.context)
+                try:
+                    results[parameters] = service.GetValues(
+                        exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[0, 1, 2], start=900, limit=2300),
+                        self.context,
+                    )
+                finally:
+                    service.Close(handle, self.context)
+
+            expected = results[""]
+            self.assertSequenceEqual(expected.channels[0].values.long_array.values, range(900, 3200))
+            for parameters, values in results.items():
+                self.assertEqual(values, expected, parameters)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import exd_api
+
+from external_data_file import ExternalDataFile, ThriftCompactReader, shared_file_cache
+
+# pylint: disable=no-member
+
+
+class TestPageIndex(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temporary_directory.name, "pages.parquet")
+        num_rows = 400_000
+        self.index = np.arange(num_rows, dtype=np.int64)
+        self.valid = self.index % 7 != 0
+        self.table = pa.table(
+            {
+                "index": pa.array(self.index),
+                "value": pa.array(self.index / 4, mask=~self.valid),
+                "name": pa.array([f"n{i % 10}" for i in range(num_rows)]).dictionary_encode(),
+            }
+        )
+        pq.write_table(self.table, self.file_path, row_group_size=200_000, data_page_size=8192, write_page_index=True)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def get_values(self, file_path: str, parameters: str, start: int, limit: int) -> exd_api.ValuesResult:
+        file = ExternalDataFile(file_path, parameters)
+        try:
+            return file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0, 1, 2], start=start, limit=limit))
+        finally:
+            file.close()
+
+    def test_small_window_reads_pages(self):
+        file = ExternalDataFile(self.file_path)
+        try:
+            fragment = file.fragments[0]
+            with (
+                mock.patch.object(fragment, "read_row_group", wraps=fragment.read_row_group) as read_row_group,
+                mock.patch.object(fragment, "read_pages", wraps=fragment.read_pages) as read_pages,
+            ):
+                values = file.get_values(
+                    exd_api.ValuesRequest(group_id=0, channel_ids=[0, 1, 2], start=123_457, limit=1000)
+                )
+                read_row_group.assert_not_called()
+                self.assertEqual(read_pages.call_count, 3)
+            self.assertEqual(len(file.column_cache), 0)
+        finally:
+            file.close()
+
+        self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(123_457, 124_457))
+        valid = self.valid[123_457:124_457]
+        self.assertSequenceEqual(values.channels[1].flags.values, (valid.astype(int) * 15).tolist())
+        self.assertSequenceEqual(
+            np.asarray(values.channels[1].values.double_array.values)[valid].tolist(),
+            (self.index[123_457:124_457][valid] / 4).tolist(),
+        )
+        self.assertSequenceEqual(
+            values.channels[2].values.string_array.values, [f"n{i % 10}" for i in range(123_457, 124_457)]
+        )
+
+    def test_matches_row_group_reads(self):
+        # windows inside a row group, at its edges and spanning both row groups
+        for start, limit in [(0, 10), (199_990, 20), (5_000, 80_000), (150_000, 150_000), (399_000, 5000)]:
+            self.assertEqual(
+                self.get_values(self.file_path, "", start, limit),
+                self.get_values(self.file_path, "page_index=false", start, limit),
+            )
+
+    def test_column_chunks_decoded_once_per_file(self):
+        first = ExternalDataFile(self.file_path)
+        second = ExternalDataFile(self.file_path)
+        try:
+            request = exd_api.ValuesRequest(group_id=0, channel_ids=[0, 2], start=250_000, limit=100)
+            first.get_values(request)
+            page_index = shared_file_cache.page_index(first.fragments[0].file_key)
+            # only the column chunks of the requested columns in the row group of the window
+            self.assertSetEqual(set(page_index.column_chunks), {(1, 0), (1, 2)})
+            with mock.patch.object(
+                ThriftCompactReader, "struct", autospec=True, side_effect=ThriftCompactReader.struct
+            ) as struct:
+                values = second.get_values(request)
+                struct.assert_not_called()
+        finally:
+            first.close()
+            second.close()
+        self.assertSequenceEqual(values.channels[1].values.string_array.values, [f"n{i % 10}" for i in range(100)])
+
+    def test_undecodable_pages_fall_back_to_row_group(self):
+        file = ExternalDataFile(self.file_path)
+        try:
+            fragment = file.fragments[0]
+            with (
+                mock.patch.object(fragment, "read_row_group", wraps=fragment.read_row_group) as read_row_group,
+                mock.patch.object(fragment, "read_pages", side_effect=pa.ArrowInvalid("corrupt page")),
+                self.assertLogs("external_data_file", logging.WARNING),
+            ):
+                values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=10, limit=100))
+                self.assertEqual(read_row_group.call_count, 1)
+        finally:
+            file.close()
+        self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(10, 110))
+
+    def test_fallback_to_row_groups(self):
+        without_index = os.path.join(self.temporary_directory.name, "no_index.parquet")
+        pq.write_table(self.table, without_index, row_group_size=200_000, write_page_index=False)
+        for file_path, parameters in [(without_index, ""), (self.file_path, "page_index=false")]:
+            file = ExternalDataFile(file_path, parameters)
+            try:
+                fragment = file.fragments[0]
+                with mock.patch.object(fragment, "read_row_group", wraps=fragment.read_row_group) as read_row_group:
+                    values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=10, limit=100))
+                    self.assertEqual(read_row_group.call_count, 1)
+            finally:
+                file.close()
+            self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(10, 110))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import logging
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import FileHandlerRegistry, exd_api
+
+from external_data_file import ExternalDataFile, WorkerPool, worker_pool
+
+# pylint: disable=no-member
+
+
+class TestParallelConversion(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        """Register ExternalDataFile handler before each test."""
+        FileHandlerRegistry.register(file_type_name="test", factory=ExternalDataFile)
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temporary_directory.name, "wide.parquet")
+        columns = {}
+        for i in range(8):
+            columns[f"i{i}"] = pa.array(np.arange(500, dtype=np.int32) + i)
+            columns[f"f{i}"] = pa.array(np.arange(500, dtype=np.float32) / (i + 1))
+            columns[f"s{i}"] = pa.array([f"{i}_{j}" for j in range(500)])
+        pq.write_table(pa.table(columns), self.file_path, row_group_size=100)
+        self.max_workers = worker_pool.max_workers
+
+    def tearDown(self):
+        worker_pool.resize(self.max_workers)
+        self.temporary_directory.cleanup()
+
+    def test_worker_pool_map_keeps_order(self):
+        pool = WorkerPool(4)
+        try:
+            self.assertSequenceEqual(pool.map(lambda x: x * x, range(50)), [x * x for x in range(50)])
+        finally:
+            pool.resize(1)
+        self.assertSequenceEqual(pool.map(str, [1, 2]), ["1", "2"])
+
+    def test_parallel_matches_sequential(self):
+        channel_ids = [23, 0, 5, 0, 12, 1, 23, 7]
+        request = exd_api.ValuesRequest(group_id=0, channel_ids=channel_ids, start=50, limit=300)
+
+        worker_pool.resize(1)
+        file = ExternalDataFile(self.file_path)
+        try:
+            sequential = file.get_values(request)
+        finally:
+            file.close()
+
+        worker_pool.resize(4)
+        file = ExternalDataFile(self.file_path)
+        try:
+            parallel = file.get_values(request)
+        finally:
+            file.close()
+
+        self.assertSequenceEqual([channel.id for channel in parallel.channels], channel_ids)
+        self.assertEqual(sequential, parallel)
+        self.assertSequenceEqual(parallel.channels[2].values.string_array.values, [f"1_{j}" for j in range(50, 350)])
+
+
+if __name__ == "__main__":
+    unittest.main()
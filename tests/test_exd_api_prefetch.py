@@ -0,0 +1,78 @@
+import logging
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import FileHandlerRegistry, exd_api
+
+from external_data_file import ExternalDataFile
+
+# pylint: disable=no-member
+
+
+class TestPrefetch(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        """Register ExternalDataFile handler before each test."""
+        FileHandlerRegistry.register(file_type_name="test", factory=ExternalDataFile)
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temporary_directory.name, "row_groups.parquet")
+        table = pa.table(
+            {
+                "index": pa.array(np.arange(1000, dtype=np.int64)),
+                "value": pa.array(np.arange(1000, dtype=np.float64) / 2),
+            }
+        )
+        pq.write_table(table, self.file_path, row_group_size=100)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def wait_for_cache(self, file: ExternalDataFile, keys: list[tuple[int, int]]):
+        deadline = time.monotonic() + 10
+        while not all(key in file.column_cache for key in keys):
+            self.assertLess(time.monotonic(), deadline, "Read ahead did not fill the column cache")
+            time.sleep(0.01)
+
+    def test_sequential_access_reads_ahead(self):
+        file = ExternalDataFile(self.file_path, "prefetch_depth=2")
+        try:
+            for start in (0, 100):
+                file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[1], start=start, limit=100))
+            self.wait_for_cache(file, [(1, 2), (1, 3)])
+
+            with mock.patch.object(file.fragments[0].open(file.options), "read_row_group") as read_row_group:
+                values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[1], start=200, limit=200))
+                self.assertNotIn(2, [call.args[0] for call in read_row_group.call_args_list])
+                self.assertNotIn(3, [call.args[0] for call in read_row_group.call_args_list])
+            self.assertSequenceEqual(values.channels[0].values.double_array.values, [i / 2 for i in range(200, 400)])
+        finally:
+            file.close()
+
+    def test_random_access_does_not_read_ahead(self):
+        file = ExternalDataFile(self.file_path, "prefetch_depth=2")
+        try:
+            file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=0, limit=100))
+            file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0], start=500, limit=100))
+            file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0, 1], start=600, limit=100))
+            self.assertEqual(len(file.column_cache), 4)
+        finally:
+            file.close()
+
+    def test_close_cancels_read_ahead(self):
+        file = ExternalDataFile(self.file_path, "prefetch_depth=8")
+        for start in range(0, 300, 100):
+            file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0, 1], start=start, limit=100))
+        file.close()
+        self.assertEqual(len(file.column_cache), 0)
+        self.assertEqual(file.fragments, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
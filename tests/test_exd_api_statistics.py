@@ -0,0 +1,122 @@
+import logging
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import FileHandlerRegistry, exd_api
+
+from external_data_file import ExternalDataFile
+
+# pylint: disable=no-member
+
+
+class TestStatistics(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        """Register ExternalDataFile handler before each test."""
+        FileHandlerRegistry.register(file_type_name="test", factory=ExternalDataFile)
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.table = pa.table(
+            {
+                "index": pa.array(np.arange(300, dtype=np.int64) - 100),
+                "value": pa.array([None if 0 == i % 10 else i / 4 for i in range(300)], pa.float64()),
+                "name": pa.array([f"n{i:03}" for i in range(300)]),
+                "time": pa.array([1_600_000_000_000 + i * 1000 for i in range(300)], pa.timestamp("ms")),
+                "flag": pa.array((np.arange(300) % 7 + 3).astype(np.uint8)),
+            }
+        )
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def write(self, name: str, **kwargs) -> str:
+        file_path = os.path.join(self.temporary_directory.name, name)
+        pq.write_table(self.table, file_path, row_group_size=100, **kwargs)
+        return file_path
+
+    def structure(self, file_path: str, parameters: str = "") -> exd_api.StructureResult:
+        file = ExternalDataFile(file_path, parameters)
+        try:
+            structure = exd_api.StructureResult()
+            file.fill_structure(structure)
+            self.assertIsNone(file.fragments[0].parquet_file)
+            return structure
+        finally:
+            file.close()
+
+    def assert_statistics(self, channels):
+        self.assertSequenceEqual(channels[0].attributes.variables["minimum"].longlong_array.values, [-100])
+        self.assertSequenceEqual(channels[0].attributes.variables["maximum"].longlong_array.values, [199])
+        self.assertSequenceEqual(channels[0].attributes.variables["null_count"].longlong_array.values, [0])
+        self.assertSequenceEqual(channels[1].attributes.variables["minimum"].double_array.values, [0.25])
+        self.assertSequenceEqual(channels[1].attributes.variables["maximum"].double_array.values, [74.75])
+        self.assertSequenceEqual(channels[1].attributes.variables["null_count"].longlong_array.values, [30])
+        self.assertSequenceEqual(channels[2].attributes.variables["minimum"].string_array.values, ["n000"])
+        self.assertSequenceEqual(channels[2].attributes.variables["maximum"].string_array.values, ["n299"])
+        self.assertSequenceEqual(channels[3].attributes.variables["minimum"].string_array.values, ["20200913122640"])
+        self.assertSequenceEqual(channels[3].attributes.variables["maximum"].string_array.values, ["20200913123139"])
+        self.assertEqual(channels[4].attributes.variables["minimum"].byte_array.values, b"\x03")
+        self.assertEqual(channels[4].attributes.variables["maximum"].byte_array.values, b"\x09")
+
+    def test_statistics_from_footer(self):
+        structure = self.structure(self.write("statistics.parquet"))
+        self.assert_statistics(structure.groups[0].channels)
+
+    def test_statistics_per_row_group(self):
+        structure = self.structure(self.write("statistics.parquet"), "group_by=row_group")
+        self.assertEqual(len(structure.groups), 3)
+        channels = structure.groups[1].channels
+        self.assertSequenceEqual(channels[0].attributes.variables["minimum"].longlong_array.values, [0])
+        self.assertSequenceEqual(channels[0].attributes.variables["maximum"].longlong_array.values, [99])
+        self.assertSequenceEqual(channels[1].attributes.variables["null_count"].longlong_array.values, [10])
+
+    def test_statistics_scan_fallback(self):
+        file_path = self.write("no_statistics.parquet", write_statistics=False)
+        file = ExternalDataFile(file_path, "channel_statistics=scan")
+        try:
+            structure = exd_api.StructureResult()
+            file.fill_structure(structure)
+            self.assert_statistics(structure.groups[0].channels)
+        finally:
+            file.close()
+
+        structure = self.structure(file_path)
+        self.assertNotIn("minimum", structure.groups[0].channels[0].attributes.variables)
+
+    def test_scan_reads_components_once(self):
+        file_path = os.path.join(self.temporary_directory.name, "vectors.parquet")
+        pq.write_table(
+            pa.table({"vector": pa.array([[i, -i, 2 * i] for i in range(300)], pa.list_(pa.int32(), 3))}),
+            file_path,
+            row_group_size=100,
+        )
+        structure = self.structure(file_path)
+        self.assertNotIn("minimum", structure.groups[0].channels[0].attributes.variables)
+
+        file = ExternalDataFile(file_path, "channel_statistics=scan")
+        try:
+            fragment = file.fragments[0]
+            with mock.patch.object(fragment, "read_row_group", wraps=fragment.read_row_group) as read_row_group:
+                structure = exd_api.StructureResult()
+                file.fill_structure(structure)
+                self.assertEqual(read_row_group.call_count, 3)
+        finally:
+            file.close()
+        channels = structure.groups[0].channels
+        for channel, (minimum, maximum) in zip(channels, [(0, 299), (-299, 0), (0, 598)]):
+            self.assertSequenceEqual(channel.attributes.variables["minimum"].long_array.values, [minimum])
+            self.assertSequenceEqual(channel.attributes.variables["maximum"].long_array.values, [maximum])
+            self.assertSequenceEqual(channel.attributes.variables["null_count"].longlong_array.values, [0])
+
+    def test_statistics_disabled(self):
+        structure = self.structure(self.write("statistics.parquet"), "channel_statistics=none")
+        self.assertEqual(len(structure.groups[0].channels[0].attributes.variables), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import dataclasses
+import logging
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from ods_exd_api_box import ExternalDataReader, FileHandlerRegistry, exd_api
+
+from external_data_file import ExternalDataFile
+from tests.mock_servicer_context import MockServicerContext
+
+# pylint: disable=no-member
+
+
+class TestStreaming(unittest.TestCase):
+    log = logging.getLogger(__name__)
+
+    def setUp(self):
+        """Register ExternalDataFile handler before each test."""
+        FileHandlerRegistry.register(file_type_name="test", factory=ExternalDataFile)
+        self.context = MockServicerContext()
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temporary_directory.name, "large.parquet")
+        table = pa.table(
+            {
+                "index": pa.array(np.arange(1000, dtype=np.int64)),
+                "value": pa.array(np.arange(1000, dtype=np.float32) / 2),
+                "name": pa.array([f"n{i:04}" for i in range(1000)]),
+                "flag": pa.array((np.arange(1000) % 7).astype(np.uint8)),
+            }
+        )
+        pq.write_table(table, self.file_path, row_group_size=100)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_large_window_is_streamed(self):
+        file = ExternalDataFile(self.file_path, "column_cache_size=1000")
+        try:
+            # the bytes field of uint8 channels is written once for the whole window
+            convert_bytes = mock.Mock(wraps=file.converters[3].convert)
+            file.converters[3] = dataclasses.replace(file.converters[3], convert=convert_bytes)
+            parquet_file = file.fragments[0].open(file.options)
+            with (
+                mock.patch.object(parquet_file, "read_row_group") as read_row_group,
+                mock.patch.object(parquet_file, "iter_batches", wraps=parquet_file.iter_batches) as iter_batches,
+            ):
+                values = file.get_values(
+                    exd_api.ValuesRequest(group_id=0, channel_ids=[3, 0, 2, 1], start=150, limit=700)
+                )
+                read_row_group.assert_not_called()
+                self.assertSequenceEqual(iter_batches.call_args.kwargs["row_groups"], range(1, 9))
+            convert_bytes.assert_called_once()
+            self.assertEqual(len(file.column_cache), 0)
+            self.assertEqual(values.channels[0].values.byte_array.values, bytes(i % 7 for i in range(150, 850)))
+            self.assertSequenceEqual(values.channels[1].values.longlong_array.values, range(150, 850))
+            self.assertSequenceEqual(
+                values.channels[2].values.string_array.values, [f"n{i:04}" for i in range(150, 850)]
+            )
+            self.assertSequenceEqual(values.channels[3].values.float_array.values, [i / 2 for i in range(150, 850)])
+        finally:
+            file.close()
+
+        file = ExternalDataFile(self.file_path)
+        try:
+            cached = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[3, 0, 2, 1], start=150, limit=700))
+            self.assertEqual(values, cached)
+        finally:
+            file.close()
+
+    def test_max_response_size_clamps_window(self):
+        service = ExternalDataReader()
+        handle = service.Open(
+            exd_api.Identifier(
+                url=pathlib.Path(self.file_path).resolve().as_uri(), parameters="max_response_size=1200"
+            ),
+            self.context,
+        )
+        try:
+            values = service.GetValues(
+                exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[0, 1], start=10, limit=1000),
+                self.context,
+            )
+            self.assertSequenceEqual(values.channels[0].values.longlong_array.values, range(10, 110))
+            self.assertEqual(len(values.channels[1].values.float_array.values), 100)
+
+            values = service.GetValues(
+                exd_api.ValuesRequest(handle=handle, group_id=0, channel_ids=[2], start=0, limit=1000),
+                self.context,
+            )
+            self.assertLess(len(values.channels[0].values.string_array.values), 1000)
+            self.assertLessEqual(sum(len(v) for v in values.channels[0].values.string_array.values), 1200)
+        finally:
+            service.Close(handle, self.context)
+
+    def test_max_response_size_fails(self):
+        file = ExternalDataFile(self.file_path, "max_response_size=1200;response_size_policy=fail")
+        try:
+            values = file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0, 1], start=0, limit=100))
+            self.assertEqual(len(values.channels[0].values.longlong_array.values), 100)
+            with self.assertRaises(ValueError):
+                file.get_values(exd_api.ValuesRequest(group_id=0, channel_ids=[0, 1], start=0, limit=101))
+        finally:
+            file.close()
+
+
+if __name__ == "__main__":
+    unittest.main()